@@ -10,6 +10,11 @@ sub-folders recursively are changed.
 
 If backups are requested, then oldfile.py is renamed to 'oldfile.py.bak'.
 
+All old names are replaced in one pass over each file, using one compiled
+pattern. Files are processed in parallel worker processes. Files without old
+names are left untouched. Option '--dry-run' only reports which names would be
+changed in which file, plus timings, without writing anything.
+
 @copyright: (c) 2021 Jorj McKie
 
 Disclaimer
@@ -22,231 +27,237 @@ script contains intended changes only by comparing old and new file.
 
 """
 import os
+import re
 import sys
+import time
 import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Old name -> new name. Listed in no particular order: the pattern below is
+# built longest name first, so e.g. '.deletePageRange' is never mistaken for
+# '.deletePage' followed by 'Range'.
+ALIASES = {
+    b".chapterCount": b".chapter_count",
+    b".chapterPageCount": b".chapter_page_count",
+    b".convertToPDF": b".convert_to_pdf",
+    b".copyPage": b".copy_page",
+    b".deletePage": b".delete_page",
+    b".deletePageRange": b".delete_pages",
+    b".embeddedFileAdd": b".embfile_add",
+    b".embeddedFileCount": b".embfile_count",
+    b".embeddedFileDel": b".embfile_del",
+    b".embeddedFileGet": b".embfile_get",
+    b".embeddedFileInfo": b".embfile_info",
+    b".embeddedFileNames": b".embfile_names",
+    b".embeddedFileUpd": b".embfile_upd",
+    b".extractFont": b".extract_font",
+    b".extractImage": b".extract_image",
+    b".findBookmark": b".find_bookmark",
+    b".fullcopyPage": b".fullcopy_page",
+    b".getCharWidths": b".get_char_widths",
+    b".getOCGs": b".get_ocgs",
+    b".getPageFontList": b".get_page_fonts",
+    b".getPageImageList": b".get_page_images",
+    b".getPagePixmap": b".get_page_pixmap",
+    b".getPageText": b".get_page_text",
+    b".getPageXObjectList": b".get_page_xobjects",
+    b".getSigFlags": b".get_sigflags",
+    b".getToC": b".get_toc",
+    b".getXmlMetadata": b".get_xml_metadata",
+    b".insertPage": b".insert_page",
+    b".insertPDF": b".insert_pdf",
+    b".isDirty": b".is_dirty",
+    b".isFormPDF": b".is_form_pdf",
+    b".isPDF": b".is_pdf",
+    b".isEncrypted": b".is_encrypted",
+    b".isReflowable": b".is_reflowable",
+    b".isRepaired": b".is_repaired",
+    b".isStream": b".is_stream",
+    b".lastLocation": b".last_location",
+    b".loadPage": b".load_page",
+    b".makeBookmark": b".make_bookmark",
+    b".metadataXML": b".xref_xml_metadata",
+    b".movePage": b".move_page",
+    b".needsPass": b".needs_pass",
+    b".newPage": b".new_page",
+    b".nextLocation": b".next_location",
+    b".pageCount": b".page_count",
+    b".pageCropBox": b".page_cropbox",
+    b".pageXref": b".page_xref",
+    b".PDFCatalog": b".pdf_catalog",
+    b".PDFTrailer": b".pdf_trailer",
+    b".previousLocation": b".prev_location",
+    b".resolveLink": b".resolve_link",
+    b".searchPageFor": b".search_page_for",
+    b".setLanguage": b".set_language",
+    b".setMetadata": b".set_metadata",
+    b".setToC": b".set_toc",
+    b".setXmlMetadata": b".set_xml_metadata",
+    b".updateObject": b".update_object",
+    b".updateStream": b".update_stream",
+    b".xrefLength": b".xref_length",
+    b".xrefObject": b".xref_object",
+    b".xrefStream": b".xref_stream",
+    b".xrefStreamRaw": b".xref_stream_raw",
+    b"._isWrapped": b".is_wrapped",
+    b".addCaretAnnot": b".add_caret_annot",
+    b".addCircleAnnot": b".add_circle_annot",
+    b".addFileAnnot": b".add_file_annot",
+    b".addFreetextAnnot": b".add_freetext_annot",
+    b".addHighlightAnnot": b".add_highlight_annot",
+    b".addInkAnnot": b".add_ink_annot",
+    b".addLineAnnot": b".add_line_annot",
+    b".addPolygonAnnot": b".add_polygon_annot",
+    b".addPolylineAnnot": b".add_polyline_annot",
+    b".addRectAnnot": b".add_rect_annot",
+    b".addRedactAnnot": b".add_redact_annot",
+    b".addSquigglyAnnot": b".add_squiggly_annot",
+    b".addStampAnnot": b".add_stamp_annot",
+    b".addStrikeoutAnnot": b".add_strikeout_annot",
+    b".addTextAnnot": b".add_text_annot",
+    b".addUnderlineAnnot": b".add_underline_annot",
+    b".addWidget": b".add_widget",
+    b".cleanContents": b".clean_contents",
+    b"._cleanContents": b".clean_contents",
+    b".CropBox": b".cropbox",
+    b".CropBoxPosition": b".cropbox_position",
+    b".deleteAnnot": b".delete_annot",
+    b".deleteLink": b".delete_link",
+    b".deleteWidget": b".delete_widget",
+    b".derotationMatrix": b".derotation_matrix",
+    b".drawBezier": b".draw_bezier",
+    b".drawCircle": b".draw_circle",
+    b".drawCurve": b".draw_curve",
+    b".drawLine": b".draw_line",
+    b".drawOval": b".draw_oval",
+    b".drawPolyline": b".draw_polyline",
+    b".drawQuad": b".draw_quad",
+    b".drawRect": b".draw_rect",
+    b".drawSector": b".draw_sector",
+    b".drawSquiggle": b".draw_squiggle",
+    b".drawZigzag": b".draw_zigzag",
+    b".firstAnnot": b".first_annot",
+    b".firstLink": b".first_link",
+    b".firstWidget": b".first_widget",
+    b".getContents": b".get_contents",
+    b".getDisplayList": b".get_displaylist",
+    b".getDrawings": b".get_drawings",
+    b".getFontList": b".get_fonts",
+    b".getImageBbox": b".get_image_bbox",
+    b".getImageList": b".get_images",
+    b".getLinks": b".get_links",
+    b".getPixmap": b".get_pixmap",
+    b".getSVGimage": b".get_svg_image",
+    b".getText": b".get_text",
+    b".getTextBlocks": b".get_text_blocks",
+    b".getTextbox": b".get_textbox",
+    b".getTextPage": b".get_textpage",
+    b".getTextWords": b".get_text_words",
+    b".insertFont": b".insert_font",
+    b".insertImage": b".insert_image",
+    b".insertLink": b".insert_link",
+    b".insertText": b".insert_text",
+    b".insertTextbox": b".insert_textbox",
+    b".loadAnnot": b".load_annot",
+    b".loadLinks": b".load_links",
+    b".MediaBox": b".mediabox",
+    b".MediaBoxSize": b".mediabox_size",
+    b".newShape": b".new_shape",
+    b".readContents": b".read_contents",
+    b".rotationMatrix": b".rotation_matrix",
+    b".searchFor": b".search_for",
+    b".setCropBox": b".set_cropbox",
+    b".setMediaBox": b".set_mediabox",
+    b".setRotation": b".set_rotation",
+    b".showPDFpage": b".show_pdf_page",
+    b".transformationMatrix": b".transformation_matrix",
+    b".updateLink": b".update_link",
+    b".wrapContents": b".wrap_contents",
+    b".writeText": b".write_text",
+    b".fileGet": b".get_file",
+    b".fileUpd": b".update_file",
+    b".lineEnds": b".line_ends",
+    b".setBlendMode": b".set_blendmode",
+    b".setBorder": b".set_border",
+    b".setColors": b".set_colors",
+    b".setFlags": b".set_flags",
+    b".setInfo": b".set_info",
+    b".setLineEnds": b".set_line_ends",
+    b".setName": b".set_name",
+    b".setOpacity": b".set_opacity",
+    b".setRect": b".set_rect",
+    b".setOC": b".set_oc",
+    b".soundGet": b".get_sound",
+    b".fillTextbox": b".fill_textbox",
+    b".setAlpha": b".set_alpha",
+    b".gammaWith": b".gamma_with",
+    b".tintWith": b".tint_with",
+    b".clearWith": b".clear_with",
+    b".copyPixmap": b".copy",
+    b".getImageData": b".tobytes",
+    b".getPNGData": b".tobytes",
+    b".getPNGdata": b".tobytes",
+    b".writeImage": b".save",
+    b".writePNG": b".save",
+    b".pillowWrite": b".pil_save",
+    b".pillowData": b".pil_tobytes",
+    b".invertIRect": b".invert_irect",
+    b".setPixel": b".set_pixel",
+    b".setOrigin": b".set_origin",
+    b".setResolution": b".set_dpi",
+    b".getPDFstr": b".get_pdf_str",
+    b".getPDFnow": b".get_pdf_now",
+    b".PaperSize": b".paper_size",
+    b".PaperRect": b".paper_rect",
+    b".paperSizes": b".paper_sizes",
+    b".ImageProperties": b".image_properties",
+    b".planishLine": b".planish_line",
+    b".getTextLength": b".get_text_length",
+    b".getArea": b".get_area",
+    b".getRectArea": b".get_area",
+    b".includePoint": b".include_point",
+    b".includeRect": b".include_rect",
+    b".isInfinite": b".is_infinite",
+    b".isEmpty": b".is_empty",
+    b".isRectangular": b".is_rectangular",
+    b".isRectilinear": b".is_rectilinear",
+    b".isConvex": b".is_convex",
+    b".preRotate": b".prerotate",
+    b".preScale": b".prescale",
+    b".preShear": b".preshear",
+    b".preTranslate": b".pretranslate",
+}
+
+ALIAS_PATTERN = re.compile(
+    b"|".join(re.escape(k) for k in sorted(ALIASES, key=len, reverse=True))
+)
 
 
-def alias_changer(infile, backup):
+def alias_changer(infile, backup, dry_run=False):
+    """Replace old names in one file in a single pass over its text.
+
+    Returns a tuple (infile, counts, seconds), where 'counts' maps each old
+    name found to its number of occurrences, or is None if the file could not
+    be read. Unchanged files are not rewritten. With 'dry_run', no file is
+    written at all.
+    """
+    t0 = time.perf_counter()
     try:
         oldtext = open(infile, "rb").read()
     except:
-        print("Unsupported characters in", infile)
-        return
-    text = oldtext.replace(b".chapterCount", b".chapter_count")
-    text = text.replace(b".chapterPageCount", b".chapter_page_count")
-    text = text.replace(b".convertToPDF", b".convert_to_pdf")
-    text = text.replace(b".copyPage", b".copy_page")
-    text = text.replace(b".deletePage", b".delete_page")
-    text = text.replace(b".deletePageRange", b".delete_pages")
-    text = text.replace(b".embeddedFileAdd", b".embfile_add")
-    text = text.replace(b".embeddedFileCount", b".embfile_count")
-    text = text.replace(b".embeddedFileDel", b".embfile_del")
-    text = text.replace(b".embeddedFileGet", b".embfile_get")
-    text = text.replace(b".embeddedFileInfo", b".embfile_info")
-    text = text.replace(b".embeddedFileNames", b".embfile_names")
-    text = text.replace(b".embeddedFileUpd", b".embfile_upd")
-    text = text.replace(b".extractFont", b".extract_font")
-    text = text.replace(b".extractImage", b".extract_image")
-    text = text.replace(b".findBookmark", b".find_bookmark")
-    text = text.replace(b".fullcopyPage", b".fullcopy_page")
-    text = text.replace(b".getCharWidths", b".get_char_widths")
-    text = text.replace(b".getOCGs", b".get_ocgs")
-    text = text.replace(b".getPageFontList", b".get_page_fonts")
-    text = text.replace(b".getPageImageList", b".get_page_images")
-    text = text.replace(b".getPagePixmap", b".get_page_pixmap")
-    text = text.replace(b".getPageText", b".get_page_text")
-    text = text.replace(b".getPageXObjectList", b".get_page_xobjects")
-    text = text.replace(b".getSigFlags", b".get_sigflags")
-    text = text.replace(b".getToC", b".get_toc")
-    text = text.replace(b".getXmlMetadata", b".get_xml_metadata")
-    text = text.replace(b".insertPage", b".insert_page")
-    text = text.replace(b".insertPDF", b".insert_pdf")
-    text = text.replace(b".isDirty", b".is_dirty")
-    text = text.replace(b".isFormPDF", b".is_form_pdf")
-    text = text.replace(b".isPDF", b".is_pdf")
-    text = text.replace(b".isEncrypted", b".is_encrypted")
-    text = text.replace(b".isReflowable", b".is_reflowable")
-    text = text.replace(b".isRepaired", b".is_repaired")
-    text = text.replace(b".isStream", b".is_stream")
-    text = text.replace(b".lastLocation", b".last_location")
-    text = text.replace(b".loadPage", b".load_page")
-    text = text.replace(b".makeBookmark", b".make_bookmark")
-    text = text.replace(b".metadataXML", b".xref_xml_metadata")
-    text = text.replace(b".movePage", b".move_page")
-    text = text.replace(b".needsPass", b".needs_pass")
-    text = text.replace(b".newPage", b".new_page")
-    text = text.replace(b".nextLocation", b".next_location")
-    text = text.replace(b".pageCount", b".page_count")
-    text = text.replace(b".pageCropBox", b".page_cropbox")
-    text = text.replace(b".pageXref", b".page_xref")
-    text = text.replace(b".PDFCatalog", b".pdf_catalog")
-    text = text.replace(b".PDFTrailer", b".pdf_trailer")
-    text = text.replace(b".previousLocation", b".prev_location")
-    text = text.replace(b".resolveLink", b".resolve_link")
-    text = text.replace(b".searchPageFor", b".search_page_for")
-    text = text.replace(b".setLanguage", b".set_language")
-    text = text.replace(b".setMetadata", b".set_metadata")
-    text = text.replace(b".setToC", b".set_toc")
-    text = text.replace(b".setXmlMetadata", b".set_xml_metadata")
-    text = text.replace(b".updateObject", b".update_object")
-    text = text.replace(b".updateStream", b".update_stream")
-    text = text.replace(b".xrefLength", b".xref_length")
-    text = text.replace(b".xrefObject", b".xref_object")
-    text = text.replace(b".xrefStream", b".xref_stream")
-    text = text.replace(b".xrefStreamRaw", b".xref_stream_raw")
-    text = text.replace(b"._isWrapped", b".is_wrapped")
-    text = text.replace(b".addCaretAnnot", b".add_caret_annot")
-    text = text.replace(b".addCircleAnnot", b".add_circle_annot")
-    text = text.replace(b".addFileAnnot", b".add_file_annot")
-    text = text.replace(b".addFreetextAnnot", b".add_freetext_annot")
-    text = text.replace(b".addHighlightAnnot", b".add_highlight_annot")
-    text = text.replace(b".addInkAnnot", b".add_ink_annot")
-    text = text.replace(b".addLineAnnot", b".add_line_annot")
-    text = text.replace(b".addPolygonAnnot", b".add_polygon_annot")
-    text = text.replace(b".addPolylineAnnot", b".add_polyline_annot")
-    text = text.replace(b".addRectAnnot", b".add_rect_annot")
-    text = text.replace(b".addRedactAnnot", b".add_redact_annot")
-    text = text.replace(b".addSquigglyAnnot", b".add_squiggly_annot")
-    text = text.replace(b".addStampAnnot", b".add_stamp_annot")
-    text = text.replace(b".addStrikeoutAnnot", b".add_strikeout_annot")
-    text = text.replace(b".addTextAnnot", b".add_text_annot")
-    text = text.replace(b".addUnderlineAnnot", b".add_underline_annot")
-    text = text.replace(b".addWidget", b".add_widget")
-    text = text.replace(b".cleanContents", b".clean_contents")
-    text = text.replace(b"._cleanContents", b".clean_contents")
-    text = text.replace(b".CropBox", b".cropbox")
-    text = text.replace(b".CropBoxPosition", b".cropbox_position")
-    text = text.replace(b".deleteAnnot", b".delete_annot")
-    text = text.replace(b".deleteLink", b".delete_link")
-    text = text.replace(b".deleteWidget", b".delete_widget")
-    text = text.replace(b".derotationMatrix", b".derotation_matrix")
-    text = text.replace(b".drawBezier", b".draw_bezier")
-    text = text.replace(b".drawCircle", b".draw_circle")
-    text = text.replace(b".drawCurve", b".draw_curve")
-    text = text.replace(b".drawLine", b".draw_line")
-    text = text.replace(b".drawOval", b".draw_oval")
-    text = text.replace(b".drawPolyline", b".draw_polyline")
-    text = text.replace(b".drawQuad", b".draw_quad")
-    text = text.replace(b".drawRect", b".draw_rect")
-    text = text.replace(b".drawSector", b".draw_sector")
-    text = text.replace(b".drawSquiggle", b".draw_squiggle")
-    text = text.replace(b".drawZigzag", b".draw_zigzag")
-    text = text.replace(b".firstAnnot", b".first_annot")
-    text = text.replace(b".firstLink", b".first_link")
-    text = text.replace(b".firstWidget", b".first_widget")
-    text = text.replace(b".getContents", b".get_contents")
-    text = text.replace(b".getDisplayList", b".get_displaylist")
-    text = text.replace(b".getDrawings", b".get_drawings")
-    text = text.replace(b".getFontList", b".get_fonts")
-    text = text.replace(b".getImageBbox", b".get_image_bbox")
-    text = text.replace(b".getImageList", b".get_images")
-    text = text.replace(b".getLinks", b".get_links")
-    text = text.replace(b".getPixmap", b".get_pixmap")
-    text = text.replace(b".getSVGimage", b".get_svg_image")
-    text = text.replace(b".getText", b".get_text")
-    text = text.replace(b".getTextBlocks", b".get_text_blocks")
-    text = text.replace(b".getTextbox", b".get_textbox")
-    text = text.replace(b".getTextPage", b".get_textpage")
-    text = text.replace(b".getTextWords", b".get_text_words")
-    text = text.replace(b".insertFont", b".insert_font")
-    text = text.replace(b".insertImage", b".insert_image")
-    text = text.replace(b".insertLink", b".insert_link")
-    text = text.replace(b".insertText", b".insert_text")
-    text = text.replace(b".insertTextbox", b".insert_textbox")
-    text = text.replace(b".loadAnnot", b".load_annot")
-    text = text.replace(b".loadLinks", b".load_links")
-    text = text.replace(b".MediaBox", b".mediabox")
-    text = text.replace(b".MediaBoxSize", b".mediabox_size")
-    text = text.replace(b".newShape", b".new_shape")
-    text = text.replace(b".readContents", b".read_contents")
-    text = text.replace(b".rotationMatrix", b".rotation_matrix")
-    text = text.replace(b".searchFor", b".search_for")
-    text = text.replace(b".setCropBox", b".set_cropbox")
-    text = text.replace(b".setMediaBox", b".set_mediabox")
-    text = text.replace(b".setRotation", b".set_rotation")
-    text = text.replace(b".showPDFpage", b".show_pdf_page")
-    text = text.replace(b".transformationMatrix", b".transformation_matrix")
-    text = text.replace(b".updateLink", b".update_link")
-    text = text.replace(b".wrapContents", b".wrap_contents")
-    text = text.replace(b".writeText", b".write_text")
-    text = text.replace(b".drawBezier", b".draw_bezier")
-    text = text.replace(b".drawCircle", b".draw_circle")
-    text = text.replace(b".drawCurve", b".draw_curve")
-    text = text.replace(b".drawLine", b".draw_line")
-    text = text.replace(b".drawOval", b".draw_oval")
-    text = text.replace(b".drawPolyline", b".draw_polyline")
-    text = text.replace(b".drawQuad", b".draw_quad")
-    text = text.replace(b".drawRect", b".draw_rect")
-    text = text.replace(b".drawSector", b".draw_sector")
-    text = text.replace(b".drawSquiggle", b".draw_squiggle")
-    text = text.replace(b".drawZigzag", b".draw_zigzag")
-    text = text.replace(b".insertText", b".insert_text")
-    text = text.replace(b".insertTextbox", b".insert_textbox")
-    text = text.replace(b".getText", b".get_text")
-    text = text.replace(b".getTextbox", b".get_textbox")
-    text = text.replace(b".fileGet", b".get_file")
-    text = text.replace(b".fileUpd", b".update_file")
-    text = text.replace(b".getPixmap", b".get_pixmap")
-    text = text.replace(b".getTextPage", b".get_textpage")
-    text = text.replace(b".lineEnds", b".line_ends")
-    text = text.replace(b".setBlendMode", b".set_blendmode")
-    text = text.replace(b".setBorder", b".set_border")
-    text = text.replace(b".setColors", b".set_colors")
-    text = text.replace(b".setFlags", b".set_flags")
-    text = text.replace(b".setInfo", b".set_info")
-    text = text.replace(b".setLineEnds", b".set_line_ends")
-    text = text.replace(b".setName", b".set_name")
-    text = text.replace(b".setOpacity", b".set_opacity")
-    text = text.replace(b".setRect", b".set_rect")
-    text = text.replace(b".setOC", b".set_oc")
-    text = text.replace(b".soundGet", b".get_sound")
-    text = text.replace(b".writeText", b".write_text")
-    text = text.replace(b".fillTextbox", b".fill_textbox")
-    text = text.replace(b".getPixmap", b".get_pixmap")
-    text = text.replace(b".getTextPage", b".get_textpage")
-    text = text.replace(b".setAlpha", b".set_alpha")
-    text = text.replace(b".gammaWith", b".gamma_with")
-    text = text.replace(b".tintWith", b".tint_with")
-    text = text.replace(b".clearWith", b".clear_with")
-    text = text.replace(b".copyPixmap", b".copy")
-    text = text.replace(b".getImageData", b".tobytes")
-    text = text.replace(b".getPNGData", b".tobytes")
-    text = text.replace(b".getPNGdata", b".tobytes")
-    text = text.replace(b".writeImage", b".save")
-    text = text.replace(b".writePNG", b".save")
-    text = text.replace(b".pillowWrite", b".pil_save")
-    text = text.replace(b".pillowData", b".pil_tobytes")
-    text = text.replace(b".invertIRect", b".invert_irect")
-    text = text.replace(b".setPixel", b".set_pixel")
-    text = text.replace(b".setOrigin", b".set_origin")
-    text = text.replace(b".setRect", b".set_rect")
-    text = text.replace(b".setResolution", b".set_dpi")
-    text = text.replace(b".getPDFstr", b".get_pdf_str")
-    text = text.replace(b".getPDFnow", b".get_pdf_now")
-    text = text.replace(b".PaperSize", b".paper_size")
-    text = text.replace(b".PaperRect", b".paper_rect")
-    text = text.replace(b".paperSizes", b".paper_sizes")
-    text = text.replace(b".ImageProperties", b".image_properties")
-    text = text.replace(b".planishLine", b".planish_line")
-    text = text.replace(b".getTextLength", b".get_text_length")
-    text = text.replace(b".getArea", b".get_area")
-    text = text.replace(b".getRectArea", b".get_area")
-    text = text.replace(b".includePoint", b".include_point")
-    text = text.replace(b".includeRect", b".include_rect")
-    text = text.replace(b".isInfinite", b".is_infinite")
-    text = text.replace(b".isEmpty", b".is_empty")
-    text = text.replace(b".isRectangular", b".is_rectangular")
-    text = text.replace(b".isRectilinear", b".is_rectilinear")
-    text = text.replace(b".isConvex", b".is_convex")
-    text = text.replace(b".preRotate", b".prerotate")
-    text = text.replace(b".preScale", b".prescale")
-    text = text.replace(b".preShear", b".preshear")
-    text = text.replace(b".preTranslate", b".pretranslate")
-    if oldtext == text:
-        print("Nothing to change: '%s'." % infile)
-        return
-    else:
-        print("Updating: '%s'." % infile)
+        return infile, None, time.perf_counter() - t0
+    counts = Counter()
+
+    def repl(match):
+        old = match.group()
+        counts[old] += 1
+        return ALIASES[old]
+
+    text = ALIAS_PATTERN.sub(repl, oldtext)
+    if dry_run or not counts:
+        return infile, counts, time.perf_counter() - t0
     if backup:
         bak_name = infile + ".bak"
         if os.path.exists(bak_name):
@@ -255,6 +266,7 @@ def alias_changer(infile, backup):
     outfile = open(infile, "wb")
     outfile.write(text)
     outfile.close()
+    return infile, counts, time.perf_counter() - t0
 
 
 def main():
@@ -268,9 +280,23 @@ def main():
         action="store_true",
         help="take backups: keep 'file.py' as 'file.py.bak'",
     )
+    parser.add_argument(
+        "-n",
+        "--dry-run",
+        action="store_true",
+        help="change nothing, only report what would be changed",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of worker processes (default: CPU count)",
+    )
     args = parser.parse_args()
     folder = args.folder
     backup = args.backup
+    dry_run = args.dry_run
     print("Taking backups: %s" % backup)
     if not folder:
         sys.exit("Need file or folder.")
@@ -293,9 +319,45 @@ def main():
     else:
         sys.exit("no such file or folder: " + folder)
 
-    for f in files:
-        alias_changer(f, backup)
+    t0 = time.perf_counter()
+    changed = 0
+    total = Counter()
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        results = executor.map(
+            alias_changer,
+            files,
+            [backup] * len(files),
+            [dry_run] * len(files),
+            chunksize=64,
+        )
+        for infile, counts, seconds in results:
+            if counts is None:
+                print("Unsupported characters in", infile)
+                continue
+            if not counts:
+                print("Nothing to change: '%s'." % infile)
+                continue
+            changed += 1
+            total.update(counts)
+            print(
+                "%s: '%s' (%g sec)."
+                % ("Would update" if dry_run else "Updating", infile, round(seconds, 4))
+            )
+            if dry_run:
+                for old, count in sorted(counts.items()):
+                    print("    %s -> %s: %i" % (old.decode(), ALIASES[old].decode(), count))
+    t1 = time.perf_counter()
 
+    print(
+        "%i files checked, %i %s, %i replacements, %g sec."
+        % (
+            len(files),
+            changed,
+            "to change" if dry_run else "changed",
+            sum(total.values()),
+            round(t1 - t0, 3),
+        )
+    )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
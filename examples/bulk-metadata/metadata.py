@@ -0,0 +1,142 @@
+"""
+Export and import the metadata of all PDFs in a folder tree
+-------------------------------------------------------------------------------
+License: GNU GPL V3
+(c) 2023 Jorj X. McKie
+
+Usage
+-----
+python metadata.py export folder metadata.csv [-processes N] [-d ";"]
+python metadata.py import folder metadata.csv [-processes N] [-d ";"]
+
+Description
+-----------
+The bulk version of examples/export-metadata and examples/import-metadata.
+
+export: reads the metadata of every PDF below 'folder' and writes them to
+one file with a row per PDF. Columns are the path relative to 'folder',
+the metadata keys of 'Document.metadata' and "error" (e.g. for damaged or
+encrypted files).
+
+import: the reverse. For every row, the metadata keys present as columns
+are set in the PDF (columns "format", "encryption" and "error" are
+ignored). PDFs whose metadata do not change are not touched. Others are
+saved incrementally, so only the new metadata are appended to the file.
+PDFs which cannot be saved incrementally are rewritten.
+
+Files with extension ".parquet" are written and read with pyarrow, all
+others as CSV. Only a limited number of rows is held in memory, so this
+works for archives with millions of PDFs. Opening the files and reading or
+writing metadata is done by worker processes (default: one per CPU).
+
+Dependencies
+------------
+PyMuPDF, pyarrow (for Parquet files only)
+"""
+
+import argparse
+import functools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pymupdf
+
+# the 'bulkio' helpers live in the parent folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bulkio import find_pdfs, parallel_map, read_rows, write_rows
+
+KEYS = (
+    "title",
+    "author",
+    "subject",
+    "keywords",
+    "creator",
+    "producer",
+    "creationDate",
+    "modDate",
+    "trapped",
+)
+COLUMNS = ("path", "format", "encryption") + KEYS + ("error",)
+BATCH = 10000  # rows handed to the process pool at a time
+
+
+def read_metadata(folder, path):
+    """Return the row of one PDF."""
+    row = dict.fromkeys(COLUMNS, "")
+    row["path"] = path
+    try:
+        with pymupdf.open(os.path.join(folder, path)) as doc:
+            if doc.needs_pass:
+                row["error"] = "encrypted"
+            else:
+                for key, value in doc.metadata.items():
+                    if key in row:
+                        row[key] = value or ""
+    except Exception as e:
+        row["error"] = str(e) or type(e).__name__
+    return row
+
+
+def write_metadata(folder, row):
+    """Set the metadata of one PDF from a row.
+
+    Returns "unchanged", "incremental", "rewritten" or an error message.
+    """
+    filename = os.path.join(folder, row["path"])
+    tempname = filename + ".tmp"
+    try:
+        with pymupdf.open(filename) as doc:
+            if doc.needs_pass:
+                return "encrypted"
+            old = {key: doc.metadata.get(key) or "" for key in KEYS}
+            new = dict(old)
+            new.update({key: row[key] or "" for key in KEYS if key in row})
+            if new == old:
+                return "unchanged"
+            doc.set_metadata(new)
+            if doc.can_save_incrementally():
+                doc.saveIncr()
+                return "incremental"
+            doc.save(tempname, garbage=1)
+        os.replace(tempname, filename)
+        return "rewritten"
+    except Exception as e:
+        return str(e) or type(e).__name__
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk export / import metadata.")
+    parser.add_argument("action", choices=("export", "import"))
+    parser.add_argument("folder", help="folder with PDFs")
+    parser.add_argument("file", help="CSV or Parquet filename")
+    parser.add_argument("-processes", type=int, help="number of processes")
+    parser.add_argument("-d", help="CSV delimiter [;]", default=";")
+    args = parser.parse_args()
+
+    processes = args.processes or os.cpu_count() or 1
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        if args.action == "export":
+            pdfs = find_pdfs(args.folder)
+            read = functools.partial(read_metadata, args.folder)
+            rows = parallel_map(executor, processes, read, pdfs, BATCH)
+            count = write_rows(args.file, rows, COLUMNS, args.d)
+            print("%i PDFs exported to '%s'" % (count, args.file))
+        else:
+            rows = read_rows(args.file, args.d)
+            counts = {}
+            write = functools.partial(write_metadata, args.folder)
+            results = parallel_map(executor, processes, write, rows, BATCH)
+            for result in results:
+                counts[result] = counts.get(result, 0) + 1
+            count = sum(counts.values())
+            for result, n in sorted(counts.items(), key=lambda item: -item[1]):
+                print("%8i %s" % (n, result))
+    t1 = time.perf_counter() - t0
+    print("%i PDFs in %g sec, %g PDFs/sec" % (count, round(t1, 2), round(count / t1)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+"""
+Helpers for scripts processing many PDFs of a folder tree
+--------------------------------------------------------------------------------
+License: GNU GPL V3+
+(c) 2023 Jorj X. McKie
+
+* find_pdfs: the PDFs below a folder, in a stable order.
+* parallel_map: 'executor.map()' for iterators of any length.
+* write_rows, read_rows: rows of dictionaries as CSV or Parquet files.
+* walk_outline: the items of a document's ToC, without recursion.
+
+Used by bulk-metadata/metadata.py, export-toc/bulk.py, edit-toc/toc.py and
+../fields/flatten.py.
+"""
+
+from .outline import walk_outline
+from .pool import find_pdfs, parallel_map
+from .rows import read_rows, write_rows
@@ -0,0 +1,34 @@
+"""
+Walk the outline tree of a document
+--------------------------------------------------------------------------------
+License: GNU GPL V3+
+(c) 2023 Jorj X. McKie
+
+Dependencies
+------------
+PyMuPDF
+"""
+
+
+def walk_outline(doc):
+    """Yield (level, item) for the outline items of a document in ToC order.
+
+    Like 'Document.get_toc()', but leaves it to the caller what to read from
+    each item: 'get_toc(simple=False)' reads colors, fonts and the target
+    page of every item, which makes it about 9 times slower for large ToCs.
+    The tree is walked without recursion.
+    """
+    stack = []  # (outline item, level) to continue with after children
+    ol, lvl = doc.outline, 1
+    while True:
+        if not (ol and ol.this.m_internal):  # end of a chain, or no ToC
+            if not stack:
+                return
+            ol, lvl = stack.pop()
+            continue
+        yield lvl, ol
+        if ol.down:
+            stack.append((ol.next, lvl))
+            ol, lvl = ol.down, lvl + 1
+        else:
+            ol = ol.next
@@ -0,0 +1,56 @@
+"""
+Walk a folder tree and feed a process pool with bounded memory
+--------------------------------------------------------------------------------
+License: GNU GPL V3+
+(c) 2023 Jorj X. McKie
+
+Dependencies
+------------
+None
+"""
+
+import collections
+import itertools
+import os
+
+
+def find_pdfs(folder):
+    """Yield the paths of all PDFs below a folder, relative to it."""
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(".pdf"):
+                yield os.path.relpath(os.path.join(dirpath, filename), folder)
+
+
+def run_chunk(function, chunk):
+    """Worker: return the results of a function for a list of items."""
+    return [function(item) for item in chunk]
+
+
+def parallel_map(executor, processes, function, items, batch=1000):
+    """Like 'executor.map(function, items)', but for an iterator of any
+    length: at most 'batch' items are submitted at a time. Results are
+    yielded in the order of the items.
+
+    Items are submitted in chunks. Whenever the oldest chunk is done, the
+    next one is submitted, so the workers never wait for a whole batch to
+    finish.
+    """
+    items = iter(items)
+    chunksize = max(1, batch // (processes * 4))
+    futures = collections.deque()
+
+    def submit():
+        chunk = list(itertools.islice(items, chunksize))
+        if chunk:
+            futures.append(executor.submit(run_chunk, function, chunk))
+        return bool(chunk)
+
+    for _ in range(max(1, batch // chunksize)):
+        if not submit():
+            break
+    while futures:
+        results = futures.popleft().result()
+        submit()
+        yield from results
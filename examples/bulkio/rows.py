@@ -0,0 +1,79 @@
+"""
+Write and read rows of dictionaries as CSV or Parquet files
+--------------------------------------------------------------------------------
+License: GNU GPL V3+
+(c) 2023 Jorj X. McKie
+
+Description
+-----------
+Files whose name ends with ".parquet" are written and read with pyarrow,
+all others as CSV. Only a limited number of rows is held in memory. Option
+'parquet' overrides the choice by file name, e.g. for temporary files.
+
+Dependencies
+------------
+pyarrow (for Parquet files only)
+"""
+
+import csv
+import itertools
+
+BATCH = 10000  # rows held in memory
+
+
+def write_rows(filename, rows, columns, delimiter=";", types=None, parquet=None):
+    """Write rows (dictionaries) to a CSV or Parquet file. Return the count.
+
+    Args:
+        columns: the column names, in file order.
+        types: for Parquet, {column: pyarrow type name} of columns which are
+            no strings, e.g. {"page": "int32"}. Values are converted, as
+            rows read from CSV files contain strings only.
+    """
+    if parquet is None:
+        parquet = filename.endswith(".parquet")
+    count = 0
+    rows = iter(rows)
+    if parquet:
+        import pyarrow
+        import pyarrow.parquet
+
+        types = types or {}
+        integers = [c for c, t in types.items() if t.startswith("int")]
+        schema = pyarrow.schema(
+            [(c, getattr(pyarrow, types.get(c, "string"))()) for c in columns]
+        )
+        with pyarrow.parquet.ParquetWriter(filename, schema) as writer:
+            while True:
+                batch = list(itertools.islice(rows, BATCH))
+                if not batch:
+                    break
+                for row in batch:
+                    for column in integers:
+                        row[column] = int(row[column])
+                writer.write_table(pyarrow.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+        return count
+
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, delimiter=delimiter)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def read_rows(filename, delimiter=";", parquet=None):
+    """Yield the rows (dictionaries) of a CSV or Parquet file."""
+    if parquet is None:
+        parquet = filename.endswith(".parquet")
+    if parquet:
+        import pyarrow.parquet
+
+        for batch in pyarrow.parquet.ParquetFile(filename).iter_batches(BATCH):
+            yield from batch.to_pylist()
+        return
+
+    with open(filename, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f, delimiter=delimiter)
@@ -26,5 +26,5 @@ if pix.alpha:  # JPEG cannot have alpha!
     pix0 = pymupdf.Pixmap(pix, 0)  # drop alpha channel
     pix = pix0  # rename pixmap
 
-img = Image.frombuffer(rgb, [pix.width, pix.height], pix.samples, "raw", rgb, 0, 1)
+img = Image.frombuffer(rgb, [pix.width, pix.height], pix.samples_mv, "raw", rgb, 0, 1)
 img.save("output.jpg")
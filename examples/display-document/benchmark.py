@@ -0,0 +1,79 @@
+"""
+Measure page-turn latency of the page cache - no display needed
+--------------------------------------------------------------------------------
+License: GNU GPL V3+
+(c) 2018-2019 Jorj X. McKie
+
+Usage
+-----
+python benchmark.py input.pdf [pause]
+
+Description
+-----------
+Pages forward through the document like display.py does, once without and
+once with 'PageCache'. After each page turn we wait 'pause' seconds
+(default 0.05), simulating a user looking at the page - this is when the
+prefetch thread does its work.
+
+Prints median and maximum time per page turn and the final cache size.
+
+Dependencies
+------------
+PyMuPDF
+"""
+
+import os
+import statistics
+import sys
+import time
+
+import pymupdf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pageview import PageCache
+
+matrix = pymupdf.Matrix(1.2, 1.2)  # zoom of display.py
+
+
+def turn_uncached(doc, pno):
+    dl = doc[pno].get_displaylist()
+    return dl.get_pixmap(matrix=matrix, alpha=False)
+
+
+def turn_cached(cache, pno):
+    pix = cache.get_pixmap(pno, matrix=matrix, alpha=False)
+    cache.prefetch(pno)
+    return pix
+
+
+def run(turn, arg, page_count, pause):
+    times = []
+    for pno in range(page_count):
+        t0 = time.perf_counter()
+        turn(arg, pno)
+        times.append(time.perf_counter() - t0)
+        time.sleep(pause)
+    return times
+
+
+def report(name, times):
+    print(
+        "%-10s median %7.2f ms, max %7.2f ms"
+        % (name, statistics.median(times) * 1000, max(times) * 1000)
+    )
+
+
+def main():
+    doc = pymupdf.open(sys.argv[1])
+    pause = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    print("%i pages, pause %g sec" % (doc.page_count, pause))
+    report("uncached", run(turn_uncached, doc, doc.page_count, pause))
+
+    cache = PageCache(doc, max_bytes=64 << 20)
+    report("cached", run(turn_cached, cache, doc.page_count, pause))
+    print("cache: %i items, %g MB" % (len(cache.items), round(cache.size / 2**20, 1)))
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
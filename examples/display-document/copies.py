@@ -0,0 +1,112 @@
+"""
+Count raster copies per page turn: Pixmap.samples versus zero-copy views
+--------------------------------------------------------------------------------
+License: GNU GPL V3+
+(c) 2018-2019 Jorj X. McKie
+
+Usage
+-----
+python copies.py input.pdf
+
+Description
+-----------
+For every frontend we compare the old way of passing 'pix.samples' (a bytes
+copy) with the zero-copy functions of 'pageview.bridge'.
+
+Whether a frontend object shares the pixmap memory is not assumed, but
+tested: we change a pixel of the pixmap and look if the object sees it.
+A wx.Bitmap always owns its memory, so it is counted as one copy - wxPython
+is not needed to run this script.
+
+Prints copies per frame, MB copied per page turn and time per frame, using
+the first 20 pages of the input document at the zoom of display.py. Frontends whose
+package is not installed are skipped.
+
+Dependencies
+------------
+PyMuPDF; numpy, Pillow
+"""
+
+import os
+import sys
+import time
+
+import pymupdf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pageview import bridge
+
+
+def numpy_samples(pix):
+    import numpy as np
+
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.h, pix.w, pix.n)
+
+
+def numpy_first(a):
+    return tuple(a[0, 0])
+
+
+def pil_samples(pix):
+    from PIL import Image
+
+    return Image.frombytes("RGB", (pix.w, pix.h), pix.samples)
+
+
+def pil_first(img):
+    return img.getpixel((0, 0))
+
+
+# frontend: (read first pixel, [(way, make object, copies made by toolkit)])
+FRONTENDS = {
+    "wx": (
+        None,
+        [("old", lambda pix: pix.samples, 1), ("new", lambda pix: pix.samples_mv, 1)],
+    ),
+    "numpy": (numpy_first, [("old", numpy_samples, 0), ("new", bridge.numpy_view, 0)]),
+    "PIL": (pil_first, [("old", pil_samples, 1), ("new", bridge.pil_view, 0)]),
+}
+
+
+def count_copies(make, first, pix):
+    """Return 0 if the object made from pix sees pixmap changes, else 1."""
+    obj = make(pix)
+    if first is None:  # object is the buffer itself
+        old = bytes(obj[:3])
+        pix.set_pixel(0, 0, tuple(255 - b for b in old))
+        shared = bytes(obj[:3]) != old
+    else:
+        old = first(obj)
+        pix.set_pixel(0, 0, tuple(255 - int(b) for b in old[:3]))
+        shared = first(obj) != old
+    return 0 if shared else 1
+
+
+def main():
+    doc = pymupdf.open(sys.argv[1])
+    matrix = pymupdf.Matrix(1.2, 1.2)  # zoom of display.py
+    pages = range(min(doc.page_count, 20))  # limit memory use
+    pixmaps = [doc[i].get_pixmap(matrix=matrix, alpha=False) for i in pages]
+    mb = sum(len(pix.samples_mv) for pix in pixmaps) / len(pixmaps) / 2**20
+
+    print("%i pages, %.2f MB per page image" % (len(pixmaps), mb))
+    print("%-8s %-6s %8s %12s %12s" % ("frontend", "way", "copies", "MB/turn", "ms/frame"))
+    for name, (first, ways) in FRONTENDS.items():
+        for way, make, toolkit in ways:
+            try:
+                copies = count_copies(make, first, pixmaps[0]) + toolkit
+            except ImportError:
+                print("%-8s %-6s %8s" % (name, way, "skipped"))
+                continue
+            t0 = time.perf_counter()
+            for pix in pixmaps:
+                make(pix)
+            t1 = (time.perf_counter() - t0) / len(pixmaps)
+            print(
+                "%-8s %-6s %8i %12.2f %12.3f"
+                % (name, way, copies, copies * mb, t1 * 1000)
+            )
+
+
+if __name__ == "__main__":
+    main()
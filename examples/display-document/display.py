@@ -15,6 +15,7 @@ PyMuPDF, wxPython
 
 from __future__ import print_function
 
+import os
 import sys
 
 print("Python:", sys.version)
@@ -33,6 +34,11 @@ try:
 except:
     raise SystemExit(__file__ + " needs PyMuPDF(pymupdf).")
 
+# the 'pageview' helpers live in the parent folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pageview import PageCache, RectIndex, TileRenderer
+from pageview.wxtiles import page_bitmap
+
 try:
     from PageFormat import FindFit
 except ImportError:
@@ -126,9 +132,11 @@ class PDFdisplay(wx.Dialog):
         if self.doc.is_encrypted:  # quit if we cannot decrpt
             self.Destroy()
             return
-        self.dl_array = [0] * len(self.doc)
+        self.cache = PageCache(self.doc)  # display lists and page images
+        self.tiles = TileRenderer(self.cache)  # renders pages
         self.last_page = -1  # memorize last page displayed
         self.link_rects = []  # store link rectangles here
+        self.link_index = RectIndex([])  # spatial index of link_rects
         self.link_texts = []  # store link texts here
         self.current_idx = -1  # store entry of found rectangle
         self.current_lnks = []  # store entry of found rectangle
@@ -137,6 +145,7 @@ class PDFdisplay(wx.Dialog):
         # define zooming matrix for displaying PDF page images
         # we increase images by 20%, so take 1.2 as scale factors
         # ======================================================================
+        self.zoom = zoom
         self.matrix = pymupdf.Matrix(zoom, zoom)  # will use a constant zoom
 
         """
@@ -341,14 +350,12 @@ class PDFdisplay(wx.Dialog):
                     int(r.height * zoom_h),
                 )
                 self.link_rects.append(wx_r)
+        self.link_index = RectIndex(self.link_rects)
 
         return
 
     def cursor_in_link(self, pos):
-        for i, r in enumerate(self.link_rects):
-            if r.Contains(pos):
-                return i
-        return -1
+        return self.link_index.find(pos)
 
     def draw_links(self, bmp, pno):
         dc = wx.MemoryDC()
@@ -383,18 +390,16 @@ class PDFdisplay(wx.Dialog):
 
     def pdf_show(self, pg_nr):
         pno = int(pg_nr) - 1
-        if self.dl_array[pno] == 0:
-            self.dl_array[pno] = self.doc[pno].get_displaylist()
-        dl = self.dl_array[pno]
-        pix = dl.get_pixmap(matrix=self.matrix, alpha=False)
-        bmp = bmp_buffer(pix.w, pix.h, pix.samples)
+        dl = self.cache.get_displaylist(pno)
+        bmp = page_bitmap(self.tiles, pno, self.zoom)
         r = dl.rect
         paper = FindFit(r.x1, r.y1)
         self.paperform.Label = "Page format: " + paper
         if self.links.Value:
-            self.current_lnks = self.doc[pno].get_links()
+            with self.cache.lock:
+                self.current_lnks = self.doc[pno].get_links()
             self.pg_ir = dl.rect.irect
-        pix = None
+        self.cache.prefetch(pno)  # prepare neighbour pages in background
         return bmp
 
     def decrypt_doc(self):
@@ -1122,7 +1122,7 @@ class PDFdisplay(wx.Dialog):
         self.zoom = pymupdf.Matrix(zoom, zoom)
         self.shrink = ~self.zoom
         pix = page.get_pixmap(matrix=self.zoom, alpha=False)
-        bmp = wx.Bitmap.FromBuffer(pix.w, pix.h, pix.samples)
+        bmp = wx.Bitmap.FromBuffer(pix.w, pix.h, pix.samples_mv)
         paper = FindFit(page.rect.width, page.rect.height)
         self.paperform.Label = "Page format: " + paper
         self.page_images = get_images(page)
@@ -43,6 +43,9 @@ first page is displayed. The controls in the dialog allow the following:
 
 * The "Save" button allows to save the changes.
 
+Links are written by 'links.py', which also applies batches of link changes
+to many documents without a GUI.
+
 Dependencies
 ------------
 PyMuPDF, wxPython Phoenix version
@@ -56,6 +59,14 @@ import sys, os
 print("Python:", sys.version)
 print("wxPython:", wx.version())
 print(pymupdf.__doc__)
+
+# the 'pageview' helpers live in the parent folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pageview import PageCache, RectIndex, TileRenderer
+from pageview.wxtiles import page_bitmap
+
+from links import write_links
+
 try:
     from PageFormat import FindFit
 except ImportError:
@@ -142,6 +153,8 @@ class PDFdisplay(wx.Dialog):
         if self.doc.is_encrypted:  # quit if we cannot decrypt
             self.Destroy()
             return
+        # no prefetch: the document is also changed by this dialog
+        self.tiles = TileRenderer(PageCache(self.doc, prefetch=0))
         self.pdf_vsn_ok = self.doc.metadata["format"].split()[1] > "1.1"
         self.link_code = {
             "NONE": 0,
@@ -155,6 +168,7 @@ class PDFdisplay(wx.Dialog):
         self.last_pno = -1  # memorize last page displayed
         self.link_rects = []  # store link rectangles here
         self.link_bottom_rects = []  # store bottom rectangles here
+        self.make_link_index()  # spatial indexes of the above
         self.link_texts = []  # store link texts here
         self.current_idx = -1  # store entry of found rectangle
         self.page_links = []  # list of links of page
@@ -563,17 +577,7 @@ class PDFdisplay(wx.Dialog):
             evt.Skip()
             return
         pg = self.doc[getint(self.TextToPage.Value) - 1]  # read PDF page (again!)
-        for i in range(len(self.page_links)):
-            l = self.page_links[i]
-            if l.get("update", False):  # "update" must be True
-                if l["xref"] == 0:  # no xref => new link
-                    pg.insert_link(l)
-                elif l["kind"] == pymupdf.LINK_NONE:
-                    pg.delete_link(l)  # delete invalid link
-                else:
-                    pg.update_link(l)  # else update link
-            l["update"] = False  # reset update indicator
-            self.page_links[i] = l  # update page links list
+        write_links(pg, self.page_links)  # also resets the update indicators
         self.btn_Update.Disable()  # disable update button
         self.t_Update.Label = ""  # and its message
         self.btn_Save.Enable()
@@ -801,6 +805,7 @@ class PDFdisplay(wx.Dialog):
             )
             self.link_bottom_rects.append(br)
             self.link_texts.append("page " + self.toPage.Value)
+            self.make_link_index()
             self.adding_link = False
             del self.addrect
             self.current_idx = -1
@@ -944,8 +949,14 @@ class PDFdisplay(wx.Dialog):
             else:
                 txt = "unkown destination"
             self.link_texts.append(txt)
+        self.make_link_index()
         return
 
+    def make_link_index(self):
+        """Index link rectangles and their corners for mouse position queries."""
+        self.link_index = RectIndex(self.link_rects)
+        self.link_bottom_index = RectIndex(self.link_bottom_rects)
+
     def redraw_bitmap(self):
         """Refresh bitmap image."""
         w = self.bitmap.Size[0]
@@ -1036,25 +1047,18 @@ class PDFdisplay(wx.Dialog):
 
     def is_in_free_area(self, nr, ok=-1):
         """Determine if rect covers a free area inside the bitmap."""
-        for i, r in enumerate(self.link_rects):
-            if r.Intersects(nr) and i != ok:
-                return False
+        if [i for i in self.link_index.intersecting(nr) if i != ok]:
+            return False
         bmrect = wx.Rect(0, 0, dlg.bitmap.Size[0], dlg.bitmap.Size[1])
         return bmrect.Contains(nr)
 
     def get_linkrect_idx(self, pos):
         """Determine if cursor is inside one of the link hot spots."""
-        for i, r in enumerate(self.link_rects):
-            if r.Contains(pos):
-                return i
-        return -1
+        return self.link_index.find(pos)
 
     def get_bottomrect_idx(self, pos):
         """Determine if cursor is on bottom right corner of a hot spot."""
-        for i, r in enumerate(self.link_bottom_rects):
-            if r.Contains(pos):
-                return i
-        return -1
+        return self.link_bottom_index.find(pos)
 
     # ==============================================================================
     # Read / render a PDF page. Parameters are: pdf = document, page = page number
@@ -1067,6 +1071,7 @@ class PDFdisplay(wx.Dialog):
         self.link_rects = []
         self.link_bottom_rects = []
         self.link_texts = []
+        self.make_link_index()
         self.bitmap = self.pdf_show(pno)  # get page bitmap
         # following takes care of changed page sizes --------------------------
         bm = wx.Bitmap(self.bitmap.Size[0], self.bitmap.Size[1], self.bitmap.Depth)
@@ -1080,8 +1085,7 @@ class PDFdisplay(wx.Dialog):
 
     def pdf_show(self, pno):
         page = self.doc[getint(pno) - 1]  # load page & get Pixmap
-        pix = page.get_pixmap(matrix=self.zoom, alpha=False)
-        bmp = wx.Bitmap.FromBuffer(pix.w, pix.h, pix.samples)
+        bmp = page_bitmap(self.tiles, page.number, self.zoom.a)
         paper = FindFit(page.rect.width, page.rect.height)
         self.paperform.Label = "Page format: " + paper
         self.page_links = page.get_links()
@@ -0,0 +1,203 @@
+"""
+Apply batches of link changes to PDF documents without a GUI
+-------------------------------------------------------------------------------
+License: GNU GPL V3
+(c) 2023 Jorj X. McKie
+
+Usage
+-----
+python links.py changes.csv [-processes N]
+
+Description
+-----------
+This is the engine behind edit.py, which can also be used as a library.
+A link change is a dictionary like
+
+{"page": 3, "rect": Rect(...), "kind": "URI", "target": "https://..."}
+
+* page: 0-based number of the page carrying the link.
+* rect: the link's hot spot. An existing link with this hot spot (within
+  1 point) is changed, else a new link is inserted.
+* kind: one of "GOTO", "URI", "GOTOR", "LAUNCH", "NAMED" or "NONE". "NONE"
+  deletes the link.
+* target: 1-based page number for "GOTO", URI for "URI", file name for "GOTOR"
+  and "LAUNCH", name for "NAMED". A "GOTOR" target may end with "#page"
+  (1-based) - default is the first page of the file.
+
+'apply_changes()' applies all changes to one document in one pass: every page
+is loaded and its links are read once. Changes are transactional: if one of
+them fails, the document is not saved at all. Otherwise it is saved
+incrementally whenever possible, which rewrites only the changed objects.
+
+The CSV file has a header line and the columns
+file;page;x0;y0;x1;y1;kind;target
+with 1-based page numbers. Its documents are processed in parallel
+processes, each updated in place.
+
+Dependencies
+------------
+PyMuPDF
+"""
+
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pymupdf
+
+LINK_KINDS = {
+    "NONE": pymupdf.LINK_NONE,
+    "GOTO": pymupdf.LINK_GOTO,
+    "URI": pymupdf.LINK_URI,
+    "LAUNCH": pymupdf.LINK_LAUNCH,
+    "NAMED": pymupdf.LINK_NAMED,
+    "GOTOR": pymupdf.LINK_GOTOR,
+}
+
+
+def write_links(page, links):
+    """Write the links of a page having an "update" flag to the PDF.
+
+    New links have xref 0, links of kind LINK_NONE are deleted.
+    """
+    for l in links:
+        if l.get("update", False):  # "update" must be True
+            if l["xref"] == 0:  # no xref => new link
+                page.insert_link(l)
+            elif l["kind"] == pymupdf.LINK_NONE:
+                page.delete_link(l)  # delete invalid link
+            else:
+                page.update_link(l)  # else update link
+        l["update"] = False  # reset update indicator
+
+
+def find_link(links, rect, tolerance=1):
+    """Return the link having hot spot 'rect', or None."""
+    for l in links:
+        if max(abs(a - b) for a, b in zip(l["from"], rect)) <= tolerance:
+            return l
+    return None
+
+
+def make_link(lnk, change):
+    """Set kind and target of link dictionary 'lnk' from a change."""
+    kind = LINK_KINDS[change["kind"]]
+    target = change.get("target")
+    lnk["kind"] = kind
+    lnk["update"] = True
+    if kind == pymupdf.LINK_GOTO:
+        lnk["page"] = int(target) - 1
+        lnk["to"] = lnk.get("to") or pymupdf.Point(0, 0)
+    elif kind == pymupdf.LINK_URI:
+        lnk["uri"] = target
+    elif kind == pymupdf.LINK_GOTOR:
+        filename, _, page = target.rpartition("#")
+        if not (filename and page.isdigit()):
+            filename, page = target, "1"
+        lnk["file"] = filename
+        lnk["page"] = int(page) - 1
+        lnk["to"] = pymupdf.Point(0, 0)
+    elif kind == pymupdf.LINK_LAUNCH:
+        lnk["file"] = target
+    elif kind == pymupdf.LINK_NAMED:
+        lnk["name"] = target
+    return lnk
+
+
+def apply_changes(filename, changes, output=None):
+    """Apply a list of link changes to a PDF.
+
+    Args:
+        filename: the PDF.
+        changes: list of change dictionaries, see above.
+        output: output file name - None updates the input file.
+    Returns:
+        The number of changed links. Raises an exception if any change fails,
+        in which case nothing is saved.
+    """
+    doc = pymupdf.open(filename)
+    by_page = {}
+    for change in changes:
+        by_page.setdefault(change["page"], []).append(change)
+
+    tempname = None  # set if a full save must replace the input
+    try:
+        for pno in sorted(by_page):
+            page = doc[pno]
+            links = page.get_links()
+            for change in by_page[pno]:
+                rect = pymupdf.Rect(change["rect"])
+                lnk = find_link(links, rect)
+                if lnk is None:
+                    if change["kind"] == "NONE":
+                        raise ValueError("page %i: no link at %s" % (pno + 1, rect))
+                    lnk = {"xref": 0, "from": rect}
+                    links.append(lnk)
+                make_link(lnk, change)
+            write_links(page, links)
+
+        if output is None and doc.can_save_incrementally():
+            doc.saveIncr()
+        elif output is None:  # must replace the input by a full save
+            doc.save(filename + ".tmp", garbage=3, deflate=True)
+            tempname = filename + ".tmp"
+        else:
+            doc.save(output, garbage=3, deflate=True)
+    finally:
+        doc.close()
+    if tempname is not None:
+        os.replace(tempname, filename)
+    return len(changes)
+
+
+def read_changes(csvname):
+    """Return a dictionary file name -> list of changes from a CSV file."""
+    files = {}
+    with open(csvname, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f, delimiter=";")
+        next(reader)  # skip header line
+        for row in reader:
+            filename, page, x0, y0, x1, y1, kind, target = row
+            files.setdefault(filename, []).append(
+                {
+                    "page": int(page) - 1,
+                    "rect": pymupdf.Rect(float(x0), float(y0), float(x1), float(y1)),
+                    "kind": kind.upper(),
+                    "target": target,
+                }
+            )
+    return files
+
+
+def apply_file(filename, changes):
+    """Worker: apply changes to a file and return a message."""
+    t0 = time.perf_counter()
+    try:
+        count = apply_changes(filename, changes)
+    except Exception as e:
+        return "%s: failed, nothing changed: %s" % (filename, e)
+    return "%s: %i links changed in %g sec." % (
+        filename,
+        count,
+        round(time.perf_counter() - t0, 3),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply link changes to PDFs.")
+    parser.add_argument("changes", help="CSV file of link changes")
+    parser.add_argument("-processes", type=int, help="number of processes")
+    args = parser.parse_args()
+
+    files = read_changes(args.changes)
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.processes) as executor:
+        for msg in executor.map(apply_file, list(files), list(files.values())):
+            print(msg)
+    print("%i files in %g sec." % (len(files), round(time.perf_counter() - t0, 3)))
+
+
+if __name__ == "__main__":
+    main()
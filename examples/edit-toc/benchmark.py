@@ -0,0 +1,105 @@
+"""
+Time ToC import, checking and export for very large tables of contents
+-------------------------------------------------------------------------------
+License: GNU GPL V3
+(c) 2015 Jorj X. McKie
+
+Usage
+-----
+python benchmark.py [entries] [pages]
+
+Description
+-----------
+Makes a PDF with 'pages' empty pages (default 1000) and a CSV file with a
+ToC of 'entries' items (default 100000), both in a temporary folder. Then
+times every step of the 'toc' engine:
+
+* read the CSV
+* check the ToC - once row by row like edit.py did before, once with
+  'check_toc()'
+* apply it with 'set_toc()' and an incremental save
+* export it again with 'export_toc()' and write a CSV
+
+Dependencies
+------------
+PyMuPDF, numpy
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pymupdf
+
+from toc import apply_toc, check_toc, export_toc, read_csv, write_csv
+
+
+def make_toc(entries, pages):
+    """Return a valid random ToC with levels 1 to 4."""
+    toc = []
+    lvl = 1
+    for i in range(entries):
+        lvl = random.randint(1, min(lvl + 1, 4)) if i else 1
+        toc.append([lvl, "Entry %i" % i, i * pages // entries + 1, 100.0])
+    return toc
+
+
+def check_rows(toc, page_count, height):
+    """Check the ToC one row after the other, like edit.py did."""
+    for i, (lvl, title, pno, top) in enumerate(toc):
+        if i == 0 and int(lvl) != 1:
+            return i
+        if int(lvl) < 1 or not (0 < int(pno) <= page_count):
+            return i
+        if i > 0 and int(lvl) - int(toc[i - 1][0]) > 1:
+            return i
+        if not title or not (0 < float(top) <= height):
+            return i
+    return -1
+
+
+def timed(name, f, *args):
+    t0 = time.perf_counter()
+    result = f(*args)
+    print("%-24s %8.3f sec" % (name, time.perf_counter() - t0))
+    return result
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    folder = tempfile.mkdtemp()
+    pdfname = os.path.join(folder, "toc.pdf")
+    csvname = os.path.join(folder, "toc.csv")
+
+    doc = pymupdf.open()
+    for i in range(pages):
+        doc.new_page()
+    doc.save(pdfname)
+    doc.close()
+    write_csv(make_toc(entries, pages), csvname)
+    print("%i entries, %i pages" % (entries, pages))
+
+    toc = timed("read CSV", read_csv, csvname)
+    timed("check row by row", check_rows, toc, pages, 842)
+    errors = timed("check_toc", check_toc, toc, pages, 842)
+    assert not errors, errors[:5]
+    timed("apply, incremental save", apply_toc, pdfname, toc)
+
+    t0 = time.perf_counter()
+    doc = pymupdf.open(pdfname)
+    toc2 = export_toc(doc)
+    write_csv(toc2, csvname)
+    doc.close()
+    print("%-24s %8.3f sec" % ("export to CSV", time.perf_counter() - t0))
+    assert len(toc2) == entries
+
+    os.remove(pdfname)
+    os.remove(csvname)
+    os.rmdir(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -64,6 +64,12 @@ import wx
 import wx.grid as gridlib
 import wx.lib.gridmovers as gridmovers
 
+# the 'pageview' helpers live in the parent folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pageview import PageCache, TileRenderer
+from pageview.wxtiles import page_bitmap
+from toc import check_toc, format_errors
+
 try:
     from icons import ico_pdf  # PDF icon in upper left screen corner
 
@@ -107,6 +113,7 @@ khaki = wx.Colour(240, 230, 140)  # our background color
 class ScratchPad:
     def __init__(self):
         self.doc = None  # pymupdf.Document
+        self.tiles = None  # TileRenderer of the document
         self.meta = {}  # PDF meta information
         self.seiten = 0  # max pages
         self.inhalt = []  # table of contents storage
@@ -133,12 +140,10 @@ class ScratchPad:
 # ==============================================================================
 def pdf_show(dlg, seite):
     pno = getint(seite) - 1
-    pix = spad.doc.get_page_pixmap(pno)
-    spad.height = pix.h
-    a = pix.samples  # samples without alpha bytes
-    bmp = wx.Bitmap.FromBuffer(pix.w, pix.h, a)
-    pix = None
-    a = None
+    if spad.tiles is None:  # no prefetch: we also change the document
+        spad.tiles = TileRenderer(PageCache(spad.doc, prefetch=0))
+    bmp = page_bitmap(spad.tiles, pno, 1)
+    spad.height = bmp.Size[1]
     return bmp
 
 
@@ -806,42 +811,18 @@ class PDFDialog(wx.Dialog):
     # ==============================================================================
     def DataOK(self, evt):
         self.auto_save()
-        clean = True
-        self.msg.Label = "Data OK!"
         d = self.tocgrid.GetTable()
-        for i in list(range(self.tocgrid.Table.GetNumberRows())):
-            if i == 0 and int(d.GetValue(0, 0)) != 1:
-                clean = False
-                self.msg.Label = "row 1 must have level 1"
-                break
-            if int(d.GetValue(i, 0)) < 1:
-                clean = False
-                self.msg.Label = "row %s: level < 1" % (str(i + 1),)
-                break
-            if not (0 < int(d.GetValue(i, 2)) <= spad.seiten):
-                clean = False
-                self.msg.Label = "row %s: page# out of range" % (str(i + 1),)
-                break
-            if i > 0 and (int(d.GetValue(i, 0)) - int(d.GetValue(i - 1, 0))) > 1:
-                clean = False
-                self.msg.Label = "row %s: level stepping > 1" % (str(i + 1),)
-                break
-            if not d.GetValue(i, 1):
-                clean = False
-                self.msg.Label = "row %s: missing title" % (str(i + 1),)
-                break
-            h = spad.height
-            if int(d.GetValue(i, 3)) < 1:
+        h = spad.height
+        for i in range(self.tocgrid.Table.GetNumberRows()):
+            if int(d.GetValue(i, 3)) < 1:  # default height
                 d.SetValue(i, 3, str(h - 36))
                 self.tocgrid.Table.data[i][3] = h - 36
-            if not (0 < int(d.GetValue(i, 3)) <= h):
-                clean = False
-                self.msg.Label = "row %s: height not in range" % (str(i + 1),)
-                break
-
-        if not clean:
+        errors = check_toc(self.tocgrid.Table.data, spad.seiten, h)
+        if errors:
+            self.msg.Label = format_errors(errors[:1])
             self.szr40OK.Disable()
         else:
+            self.msg.Label = "Data OK!"
             self.szr40OK.Enable()
 
         self.tocgrid.Refresh()
@@ -0,0 +1,242 @@
+"""
+Check, import, export and apply tables of contents without a GUI
+-------------------------------------------------------------------------------
+License: GNU GPL V3
+(c) 2015 Jorj X. McKie
+
+Usage
+-----
+python toc.py check input.pdf toc.csv
+python toc.py import input.pdf toc.csv [-o output.pdf]
+python toc.py export input.pdf toc.csv
+
+Description
+-----------
+This is the engine behind edit.py, which can also be used as a library for
+tables of contents (ToC) with many thousands of entries.
+
+A ToC is a list of items [lvl, title, page] or [lvl, title, page, height],
+like the ones of 'Document.get_toc()'. The CSV files have the same columns,
+separated by ";" (option -d), and no header line - as written by
+examples/export-toc/export.py.
+
+'check_toc()' checks all items in one vectorised numpy pass, instead of
+looking at the items one by one. The rules are those of edit.py:
+
+* the first item has level 1
+* levels are positive and increase by at most 1 from one item to the next
+* page numbers are in the document's page range
+* titles are not empty
+* heights, if given and positive, do not exceed the page height. A missing
+  or non-positive height means "36 points below the top of the page".
+
+'apply_toc()' replaces the ToC of a PDF by 'Document.set_toc()' after it has
+been checked. Nothing is saved if the ToC has errors. The PDF is saved
+incrementally whenever possible.
+
+Dependencies
+------------
+PyMuPDF, numpy
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+import pymupdf
+
+# the 'bulkio' helpers live in the parent folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bulkio import walk_outline
+
+MESSAGES = (
+    None,
+    "row 1 must have level 1",
+    "level < 1",
+    "page# out of range",
+    "level stepping > 1",
+    "missing title",
+    "height not in range",
+)
+
+
+def read_csv(filename, delimiter=";"):
+    """Return the ToC items of a CSV file."""
+    toc = []
+    with open(filename, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f, delimiter=delimiter):
+            if len(row) > 4:
+                raise ValueError("cannot handle more than 4 entries:\n %s" % (row,))
+            item = [int(row[0]), row[1], int(row[2])]
+            if len(row) == 4 and row[3].strip():
+                item.append(float(row[3]))
+            toc.append(item)
+    return toc
+
+
+def export_toc(doc):
+    """Return the ToC items of a document, with the height of the target.
+
+    Like 'Document.get_toc(simple=False)', but without the additional item
+    information (colors, fonts, xrefs), which takes most of its time.
+    """
+    toc = []
+    for lvl, ol in walk_outline(doc):
+        page = -1
+        if not ol.is_external and ol.uri:
+            page = ol.page if ol.page >= 0 else doc.resolve_link(ol.uri)[0]
+            page += 1
+        dest = ol.destination(doc)
+        height = 0
+        if dest.kind == pymupdf.LINK_GOTO:
+            if dest.flags & pymupdf.LINK_FLAG_T_VALID:
+                height = dest.lt.y
+        toc.append([lvl, ol.title or " ", page, height])
+    return toc
+
+
+def write_csv(toc, filename, delimiter=";"):
+    """Write ToC items to a CSV file. Items may have a height or a dictionary."""
+    with open(filename, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=delimiter)
+        for item in toc:
+            height = 0
+            if len(item) > 3:
+                height = item[3]
+                if isinstance(height, dict):  # from get_toc(simple=False)
+                    if height.get("kind") == pymupdf.LINK_GOTO:
+                        height = height["to"].y
+                    else:
+                        height = 0
+            writer.writerow((item[0], item[1].strip(), item[2], height))
+
+
+def check_toc(toc, page_count, page_height=None):
+    """Check ToC items in one pass.
+
+    Args:
+        toc: list of items [lvl, title, page(, height)]. Numbers may also be
+            given as strings, like in the grid of edit.py.
+        page_count: number of pages of the document.
+        page_height: a number, or a sequence with the height of every page.
+            None skips the height check.
+    Returns:
+        A list of (row, message) for every bad item, in row order, with
+        0-based row numbers. Empty if the ToC is OK.
+    """
+    n = len(toc)
+    if n == 0:
+        return []
+    lvl = np.array([item[0] for item in toc], dtype=np.int64)
+    pno = np.array([item[2] for item in toc], dtype=np.int64)
+    titles = np.array([bool(str(item[1]).strip()) for item in toc])
+
+    # one error code per row, the first failing rule wins
+    code = np.zeros(n, dtype=np.int8)
+    if page_height is not None:
+        height = np.array(
+            [item[3] if len(item) > 3 and item[3] != "" else 0 for item in toc],
+            dtype=np.float64,
+        )
+        if np.ndim(page_height) == 0:
+            limit = float(page_height)
+        else:
+            pages = np.asarray(page_height, dtype=np.float64)
+            limit = pages[np.clip(pno, 1, page_count) - 1]
+        code[(height > 0) & (height > limit)] = 6
+    code[~titles] = 5
+    step = np.zeros(n, dtype=bool)
+    step[1:] = np.diff(lvl) > 1
+    code[step] = 4
+    code[(pno < 1) | (pno > page_count)] = 3
+    code[lvl < 1] = 2
+    if lvl[0] != 1:
+        code[0] = 1
+
+    rows = np.flatnonzero(code)
+    return [(int(i), MESSAGES[code[i]]) for i in rows]
+
+
+def format_errors(errors):
+    """Return the error list as text with 1-based rows, like edit.py shows."""
+    return "\n".join(
+        m if m.startswith("row") else "row %i: %s" % (i + 1, m) for i, m in errors
+    )
+
+
+def clean_item(item):
+    """Return a ToC item with proper types, dropping a non-positive height."""
+    lvl, title, page = int(item[0]), str(item[1]).strip(), int(item[2])
+    if len(item) > 3 and item[3] != "" and float(item[3]) > 0:
+        return [lvl, title, page, float(item[3])]
+    return [lvl, title, page]
+
+
+def apply_toc(filename, toc, output=None):
+    """Check the ToC and make it the ToC of a PDF.
+
+    Args:
+        filename: the PDF.
+        toc: list of ToC items.
+        output: output file name - None updates the input file.
+    Returns:
+        The list of errors. If it is not empty, nothing has been saved.
+    """
+    doc = pymupdf.open(filename)
+    tempname = None  # set if a full save must replace the input
+    try:
+        heights = [doc.page_cropbox(i).height for i in range(doc.page_count)]
+        errors = check_toc(toc, doc.page_count, heights)
+        if errors:
+            return errors
+        doc.set_toc([clean_item(item) for item in toc])
+        if output is None and doc.can_save_incrementally():
+            doc.saveIncr()
+        elif output is None:  # must replace the input by a full save
+            doc.save(filename + ".tmp", garbage=3, deflate=True)
+            tempname = filename + ".tmp"
+        else:
+            doc.save(output, garbage=3, deflate=True)
+    finally:
+        doc.close()
+    if tempname is not None:
+        os.replace(tempname, filename)
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check, import or export ToCs.")
+    parser.add_argument("action", choices=("check", "import", "export"))
+    parser.add_argument("pdf", help="PDF filename")
+    parser.add_argument("csv", help="CSV filename")
+    parser.add_argument("-d", help="CSV delimiter [;]", default=";")
+    parser.add_argument("-o", help="output PDF (default: update input)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    if args.action == "export":
+        doc = pymupdf.open(args.pdf)
+        toc = export_toc(doc)
+        write_csv(toc, args.csv, args.d)
+        errors = []
+    else:
+        toc = read_csv(args.csv, args.d)
+        if args.action == "check":
+            doc = pymupdf.open(args.pdf)
+            heights = [doc.page_cropbox(i).height for i in range(doc.page_count)]
+            errors = check_toc(toc, doc.page_count, heights)
+        else:
+            errors = apply_toc(args.pdf, toc, args.o)
+    if errors:
+        print(format_errors(errors))
+    print(
+        "%s: %i entries, %i errors, %g sec."
+        % (args.action, len(toc), len(errors), round(time.perf_counter() - t0, 3))
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Export the tables of contents of all documents in a folder tree to one file
+-------------------------------------------------------------------------------
+License: GNU GPL V3
+(c) 2018 Jorj X. McKie
+
+Usage
+-----
+python bulk.py folder toc.csv [-manifest toc.csv.json] [-processes N] [-d ";"]
+
+Description
+-----------
+The bulk version of export.py, e.g. to feed a search index. Writes the ToC
+items of every PDF below 'folder' to one file with the columns:
+
+* doc_id: the path of the PDF relative to 'folder'
+* level, title, page: like in 'Document.get_toc()' (page is -1 if the
+  item points nowhere in the document)
+* kind: "goto", "named" (named destination), "uri", "gotor" (other file),
+  "launch" or "none"
+* target: for destinations in the document the point "x,y" on the page
+  (origin top-left) - else the URI or file of the destination
+
+The ToC is read by walking the outline tree with 'bulkio.walk_outline()'.
+This gives the same items as 'get_toc(simple=False)', without the
+additional information about colors, fonts and xrefs, and with one
+'resolve_link()' per item instead of loading its target page. Documents are
+processed by worker processes (default: one per CPU).
+
+A manifest file (default: output name + ".json") records modification time
+and size of every document. When run again, the items of unchanged
+documents are copied from the previous output, and only new or changed
+documents are opened. Items of deleted documents are dropped. Documents
+which cannot be read (e.g. damaged or encrypted) are not recorded, so they
+are tried again on the next run.
+
+Files with extension ".parquet" are written and read with pyarrow, all
+others as CSV. Only a limited number of rows is held in memory.
+
+Dependencies
+------------
+PyMuPDF, pyarrow (for Parquet files only)
+"""
+
+import argparse
+import functools
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pymupdf
+
+# the 'bulkio' helpers live in the parent folder
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bulkio import parallel_map, read_rows, walk_outline, write_rows
+
+COLUMNS = ("doc_id", "level", "title", "page", "kind", "target")
+TYPES = {"level": "int32", "page": "int32"}  # of Parquet columns
+BATCH = 1000  # documents handed to the process pool at a time
+
+
+def scan(folder):
+    """Return {path: [mtime_ns, size]} for all PDFs below a folder."""
+    files = {}
+    dirs = [folder]
+    while dirs:
+        with os.scandir(dirs.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.path)
+                elif entry.name.lower().endswith(".pdf"):
+                    st = entry.stat()
+                    path = os.path.relpath(entry.path, folder)
+                    files[path] = [st.st_mtime_ns, st.st_size]
+    return files
+
+
+def toc_items(doc):
+    """Return the ToC of a document as (level, title, page, kind, target)."""
+    items = []
+    for lvl, ol in walk_outline(doc):
+        uri = ol.uri or ""
+        page = -1
+        if not uri:
+            kind, target = "none", ""
+        elif ol.is_external:
+            kind, target = "uri", uri
+            if uri.startswith("file:"):
+                kind = "gotor" if "#" in uri else "launch"
+        else:
+            kind = "named" if uri.startswith("#nameddest=") else "goto"
+            target = uri
+            pno, x, y = doc.resolve_link(uri)
+            if pno >= 0:
+                page = pno + 1
+                target = "%g,%g" % (x, y)
+        items.append((lvl, ol.title or " ", page, kind, target))
+    return items
+
+
+def read_toc(folder, path):
+    """Return (path, ToC items, error message) of one document."""
+    try:
+        with pymupdf.open(os.path.join(folder, path)) as doc:
+            if doc.needs_pass:
+                return path, [], "encrypted"
+            return path, toc_items(doc), ""
+    except Exception as e:
+        return path, [], str(e) or type(e).__name__
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk export ToCs.")
+    parser.add_argument("folder", help="folder with PDFs")
+    parser.add_argument("output", help="CSV or Parquet filename")
+    parser.add_argument("-manifest", help="manifest filename")
+    parser.add_argument("-processes", type=int, help="number of processes")
+    parser.add_argument("-d", help="CSV delimiter [;]", default=";")
+    args = parser.parse_args()
+    manifest_name = args.manifest or args.output + ".json"
+
+    t0 = time.perf_counter()
+    old_manifest = {}
+    if os.path.exists(manifest_name) and os.path.exists(args.output):
+        with open(manifest_name) as f:
+            old_manifest = json.load(f)
+    files = scan(args.folder)
+    unchanged = {
+        path
+        for path, stat in files.items()
+        if path in old_manifest and old_manifest[path][:2] == stat
+    }
+    changed = sorted(set(files) - unchanged)
+    manifest = {path: old_manifest[path] for path in unchanged}
+    errors = 0
+
+    def old_rows():
+        if not unchanged:
+            return
+        for row in read_rows(args.output, args.d):
+            if row["doc_id"] in unchanged:
+                yield row
+
+    def new_rows():
+        nonlocal errors
+        read = functools.partial(read_toc, args.folder)
+        results = parallel_map(executor, processes, read, changed, BATCH)
+        for path, items, error in results:
+            if error:  # not in the manifest: try again next time
+                errors += 1
+                continue
+            manifest[path] = files[path] + [len(items)]
+            for item in items:
+                yield dict(zip(COLUMNS, (path,) + item))
+
+    processes = args.processes or os.cpu_count() or 1
+    root, ext = os.path.splitext(args.output)
+    tempname = root + ".tmp" + ext  # the extension selects the format
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        rows = itertools.chain(old_rows(), new_rows())
+        count = write_rows(tempname, rows, COLUMNS, args.d, TYPES)
+    os.replace(tempname, args.output)
+    with open(manifest_name + ".tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(manifest_name + ".tmp", manifest_name)
+
+    t1 = time.perf_counter() - t0
+    print(
+        "%i documents: %i unchanged, %i read (%i errors), %i ToC items written"
+        % (len(files), len(unchanged), len(changed), errors, count)
+    )
+    print("%g sec, %g documents/sec read" % (round(t1, 2), round(len(changed) / t1)))
+
+
+if __name__ == "__main__":
+    main()
@@ -763,7 +763,7 @@ class PDFdisplay(wx.Dialog):
         # get Pixmap of a page
         p = self.doc[pg_nr - 1]
         pix = p.get_pixmap(alpha=0)
-        bitmap = bmp_from_buffer(pix.width, pix.height, pix.samples)
+        bitmap = bmp_from_buffer(pix.width, pix.height, pix.samples_mv)
         self.paperform.Label = "Format: " + FindFit(pix.w, pix.h)
         return bitmap
 
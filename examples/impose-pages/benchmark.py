@@ -0,0 +1,62 @@
+"""
+Compare impose.py with the combine-pages and posterize-document scripts
+--------------------------------------------------------------------------------
+License: GNU GPL V3
+(c) 2026 Jorj X. McKie
+
+Usage
+-----
+python benchmark.py input.pdf
+
+Description
+-----------
+Runs each script as a separate process in a temporary folder and prints
+wall time and output size of:
+
+* combine.py versus impose.py with layout "4up"
+* posterize.py versus impose.py with layout "poster4"
+
+A script failing with the installed PyMuPDF version is reported as such.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+examples = os.path.dirname(here)
+
+RUNS = (
+    ("combine.py", [os.path.join(examples, "combine-pages", "combine.py")]),
+    ("impose.py 4up", [os.path.join(here, "impose.py"), "-layout", "4up"]),
+    ("posterize.py", [os.path.join(examples, "posterize-document", "posterize.py")]),
+    ("impose.py poster4", [os.path.join(here, "impose.py"), "-layout", "poster4"]),
+)
+
+
+def run(script, infile, folder):
+    """Run a script in 'folder' and return (seconds, size of output.pdf)."""
+    cmd = [sys.executable] + script[:1] + [infile] + script[1:]
+    t0 = time.perf_counter()
+    subprocess.run(cmd, cwd=folder, check=True)
+    t1 = time.perf_counter()
+    return t1 - t0, os.path.getsize(os.path.join(folder, "output.pdf"))
+
+
+def main():
+    infile = os.path.abspath(sys.argv[1])
+    print("%-20s %10s %12s" % ("script", "seconds", "bytes"))
+    for name, script in RUNS:
+        with tempfile.TemporaryDirectory() as folder:
+            try:
+                seconds, size = run(script, infile, folder)
+            except subprocess.CalledProcessError:
+                print("%-20s %23s" % (name, "failed"))
+                continue
+        print("%-20s %10.3f %12i" % (name, seconds, size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Impose the pages of a PDF: N-up, booklet or poster
+--------------------------------------------------------------------------------
+License: GNU GPL V3
+(c) 2026 Jorj X. McKie
+
+Usage
+-----
+python impose.py input.pdf [-layout LAYOUT] [-output output.pdf]
+
+LAYOUT is the name of a predefined layout (see LAYOUTS below), a JSON string
+or the name of a JSON file. A layout is a plain dictionary, for example:
+
+{"kind": "nup", "paper": "a4", "cols": 2, "rows": 2}
+    Combine every 4 input pages on one A4 portrait page (like combine.py).
+
+{"kind": "booklet", "paper": "a4-l"}
+    Two pages per side, ordered such that the folded printout is a booklet.
+
+{"kind": "poster", "cols": 2, "rows": 2}
+    Split every input page into 4 pages of 1/4 size (like posterize.py).
+
+Description
+-----------
+A layout is first turned into a "plan": a list of output pages, each given as
+(width, height, placements). A placement is (pno, target, clip): show the
+'clip' part (None = all) of input page 'pno' in rectangle 'target'.
+
+The plan is then executed by one call of 'Page.show_pdf_page' per placement.
+Every input page is converted to a Form XObject once only: all placements of
+the same input page reuse it - across tiles and across output pages. So an
+input page's content is never embedded twice.
+
+Dependencies
+------------
+PyMuPDF 1.18.0 or later
+"""
+
+import argparse
+import json
+import os
+
+import pymupdf
+
+# predefined layouts
+LAYOUTS = {
+    "2up": {"kind": "nup", "paper": "a4-l", "cols": 2, "rows": 1},
+    "4up": {"kind": "nup", "paper": "a4", "cols": 2, "rows": 2},
+    "booklet": {"kind": "booklet", "paper": "a4-l"},
+    "poster4": {"kind": "poster", "cols": 2, "rows": 2},
+}
+
+
+def grid_rects(rect, cols, rows):
+    """Split a rectangle into cols x rows cells, row by row."""
+    w = rect.width / cols
+    h = rect.height / rows
+    return [
+        pymupdf.Rect(
+            rect.x0 + c * w,
+            rect.y0 + r * h,
+            rect.x0 + (c + 1) * w,
+            rect.y0 + (r + 1) * h,
+        )
+        for r in range(rows)
+        for c in range(cols)
+    ]
+
+
+def nup_plan(src, paper="a4", cols=2, rows=2):
+    """Put cols x rows consecutive input pages on each output page."""
+    width, height = pymupdf.paper_size(paper)
+    cells = grid_rects(pymupdf.Rect(0, 0, width, height), cols, rows)
+    n = len(cells)
+    return [
+        (
+            width,
+            height,
+            [(pno, cells[pno - i], None) for pno in range(i, min(i + n, len(src)))],
+        )
+        for i in range(0, len(src), n)
+    ]
+
+
+def booklet_plan(src, paper="a4-l"):
+    """Put 2 input pages on each output page in booklet order."""
+    width, height = pymupdf.paper_size(paper)
+    left, right = grid_rects(pymupdf.Rect(0, 0, width, height), 2, 1)
+    count = (len(src) + 3) // 4 * 4  # pad to a multiple of 4 pages
+    plan = []
+    for i in range(0, count // 2, 2):
+        for pno1, pno2 in ((count - 1 - i, i), (i + 1, count - 2 - i)):
+            placements = [
+                (pno, rect, None)
+                for pno, rect in ((pno1, left), (pno2, right))
+                if pno < len(src)  # padding pages stay empty
+            ]
+            plan.append((width, height, placements))
+    return plan
+
+
+def poster_plan(src, cols=2, rows=2):
+    """Split each input page into cols x rows output pages."""
+    plan = []
+    for pno in range(len(src)):
+        for clip in grid_rects(src[pno].rect, cols, rows):
+            target = pymupdf.Rect(0, 0, clip.width, clip.height)
+            plan.append((clip.width, clip.height, [(pno, target, clip)]))
+    return plan
+
+
+PLANNERS = {"nup": nup_plan, "booklet": booklet_plan, "poster": poster_plan}
+
+
+def make_plan(src, layout):
+    """Return the plan for a layout dictionary."""
+    parms = dict(layout)
+    kind = parms.pop("kind")
+    if kind not in PLANNERS:
+        raise ValueError("unknown layout kind '%s'" % kind)
+    return PLANNERS[kind](src, **parms)
+
+
+def impose(src, plan):
+    """Execute a plan and return the new PDF.
+
+    'show_pdf_page' remembers the Form XObject made for an input page and
+    reuses it for all further placements of that page.
+    """
+    doc = pymupdf.open()
+    for width, height, placements in plan:
+        page = doc.new_page(-1, width=width, height=height)
+        for pno, target, clip in placements:
+            page.show_pdf_page(target, src, pno, clip=clip)
+    return doc
+
+
+def load_layout(text):
+    """Return a layout given by name, JSON string or JSON file name."""
+    if text in LAYOUTS:
+        return LAYOUTS[text]
+    if os.path.exists(text):
+        with open(text) as f:
+            return json.load(f)
+    return json.loads(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Impose the pages of a PDF.")
+    parser.add_argument("input", help="PDF filename")
+    parser.add_argument(
+        "-layout",
+        default="4up",
+        help="one of %s, a JSON string or a JSON file" % ", ".join(LAYOUTS),
+    )
+    parser.add_argument("-output", default="output.pdf", help="output filename")
+    args = parser.parse_args()
+
+    src = pymupdf.open(args.input)
+    doc = impose(src, make_plan(src, load_layout(args.layout)))
+    doc.save(args.output, garbage=4, deflate=True)
+
+
+if __name__ == "__main__":
+    main()
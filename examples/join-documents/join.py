@@ -18,6 +18,8 @@ Description
 
 (4) Specify PDF metadata of resulting PDF.
 
+The actual joining is done by 'joiner.py', which also works without GUI.
+
 Dependencies
 ------------
 wxPython v3.0.x, PyMuPDF v1.9.2
@@ -44,6 +46,8 @@ except:
     raise SystemExit
 print(pymupdf.__doc__)
 
+from joiner import join_pdfs
+
 try:
     from icons import ico_pdf
 
@@ -494,8 +498,6 @@ def make_pdf(dlg):
     # create time zone value in PDF format
     cdate = pymupdf.get_pdf_now()
     ausgabe = dlg.btn_aus.GetPath()
-    pdf_out = pymupdf.open()  # empty new PDF document
-    aus_nr = 0  # current page number in output
     pdf_dict = {
         "creator": "PDF Joiner",
         "producer": "PyMuPDF",
@@ -506,71 +508,10 @@ def make_pdf(dlg):
         "subject": dlg.aussub.Value,
         "keywords": dlg.keywords.Value,
     }
-    pdf_out.set_metadata(pdf_dict)  # put in meta data
-    total_toc = []  # initialize TOC
-    # ==============================================================================
-    # process one input file
-    # ==============================================================================
-    for zeile in dlg.szr02.Table.data:
-        dateiname = zeile[0]
-        doc = pymupdf.open(dateiname)
-        max_seiten = len(doc)
-        # ==============================================================================
-        # user input minus 1, PDF pages count from zero
-        # also correct any inconsistent input
-        # ==============================================================================
-        von = int(zeile[2]) - 1  # first PDF page number
-        bis = int(zeile[3]) - 1  # last PDF page number
-
-        von = min(max(0, von), max_seiten - 1)  # "from" must be in range
-        bis = min(max(0, bis), max_seiten - 1)  # "to" must be in range
-        rot = int(zeile[4])  # get rotation angle
-        # now copy the page range
-        pdf_out.insert_pdf(doc, from_page=von, to_page=bis, rotate=rot)
-        if dlg.noToC.Value:  # no ToC wanted - get next file
-            continue
-
-        incr = 1  # standard increment for page range
-        if bis < von:
-            incr = -1  # increment for reversed sequence
-        # list of page numbers in range
-        pno_range = list(range(von, bis + incr, incr))
-        # standard bokkmark title = "infile [pp from-to of max.pages]"
-        bm_main_title = "%s [pp. %s-%s of %s]" % (
-            os.path.basename(dateiname[:-4]),
-            von + 1,
-            bis + 1,
-            max_seiten,
-        )
-        # insert standard bookmark ahead of any page range
-        total_toc.append([1, bm_main_title, aus_nr + 1])
-        toc = doc.get_toc(simple=False)  # get file's TOC
-        last_lvl = 1  # immunize against hierarchy gaps
-        for t in toc:
-            lnk_type = t[3]["kind"]  # if "goto", page must be in range
-            if (t[2] - 1) not in pno_range and lnk_type == pymupdf.LINK_GOTO:
-                continue
-            if lnk_type == pymupdf.LINK_GOTO:
-                pno = pno_range.index(t[2] - 1) + aus_nr + 1
-            # repair hierarchy gaps by filler bookmarks
-            while t[0] > last_lvl + 1:
-                total_toc.append([last_lvl + 1, "<>", pno, t[3]])
-                last_lvl += 1
-            last_lvl = t[0]
-            t[2] = pno
-            total_toc.append(t)
-
-        aus_nr += len(pno_range)  # increase output counter
-        doc.close()
-        doc = None
-
-    # ==============================================================================
-    # all input files processed
-    # ==============================================================================
-    if total_toc:
-        pdf_out.set_toc(total_toc)
-    pdf_out.save(ausgabe)
-    pdf_out.close()
+    items = [
+        (zeile[0], zeile[2], zeile[3], zeile[4]) for zeile in dlg.szr02.Table.data
+    ]
+    join_pdfs(items, ausgabe, metadata=pdf_dict, toc=not dlg.noToC.Value)
     return ausgabe
 
 
@@ -0,0 +1,199 @@
+"""
+Join PDF files without a GUI
+-------------------------------------------------------------------------------
+License: GNU GPL V3
+(c) 2015 Jorj X. McKie
+
+Usage
+-----
+python joiner.py [-o output.pdf] [-noToC] [-incremental N] file.pdf[:from-to[:rotate]] ...
+
+Pages 'from' and 'to' are 1-based, 'to' may be smaller than 'from' for a
+reversed page sequence. Default is all pages, not rotated.
+
+Description
+------------
+This is the engine behind join.py, which can also be used as a library via
+'join_pdfs()'.
+
+(1) The TOC of every input is merged as it is inserted. Page numbers are
+    translated by a dictionary, i.e. with constant effort per TOC item.
+
+(2) While one input is inserted, the next one is read into memory by a
+    background thread. Only file I/O is done there - all PyMuPDF calls stay
+    in the main thread.
+
+(3) With '-incremental N', the output file is updated every N inputs by an
+    incremental save. Use this for very many inputs to have them written out
+    as you go. The final file can always be compacted later by a save with
+    garbage collection.
+
+Dependencies
+------------
+PyMuPDF v1.18.0
+"""
+
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pymupdf
+
+# file name, optionally followed by ":from-to" (may be empty) and ":rotate"
+RE_ITEM = re.compile(r"(.+?)(?::(?:(\d+)-(\d+))?(?::(-?\d+))?)?", re.DOTALL)
+
+
+def read_file(filename):
+    with open(filename, "rb") as f:
+        return f.read()
+
+
+def merge_toc(total_toc, doc, filename, von, bis, aus_nr):
+    """Append the TOC items of 'doc' for pages 'von' to 'bis' to 'total_toc'.
+
+    'aus_nr' is the number of output pages before this page range.
+    """
+    incr = 1 if bis >= von else -1
+    # input page number -> output page number (1-based)
+    pno_map = {
+        spno: aus_nr + i + 1 for i, spno in enumerate(range(von, bis + incr, incr))
+    }
+    # standard bookmark title = "infile [pp from-to of max.pages]"
+    bm_main_title = "%s [pp. %s-%s of %s]" % (
+        os.path.basename(filename[:-4]),
+        von + 1,
+        bis + 1,
+        doc.page_count,
+    )
+    # insert standard bookmark ahead of any page range
+    total_toc.append([1, bm_main_title, aus_nr + 1])
+    last_lvl = 1  # immunize against hierarchy gaps
+    for t in doc.get_toc(simple=False):
+        pno = pno_map.get(t[2] - 1)
+        if pno is None:
+            if t[3]["kind"] == pymupdf.LINK_GOTO:  # page must be in range
+                continue
+            pno = aus_nr + 1
+        # repair hierarchy gaps by filler bookmarks
+        while t[0] > last_lvl + 1:
+            total_toc.append([last_lvl + 1, "<>", pno, t[3]])
+            last_lvl += 1
+        last_lvl = t[0]
+        t[2] = pno
+        total_toc.append(t)
+    return len(pno_map)
+
+
+def join_pdfs(items, output, metadata=None, toc=True, incremental=0):
+    """Join page ranges of PDF files into file 'output'.
+
+    Args:
+        items: list of (filename, from, to, rotate). Page numbers are 1-based,
+            'rotate' is -1 for unchanged pages.
+        output: output filename.
+        metadata: metadata dictionary of the output.
+        toc: (bool) merge the input TOCs.
+        incremental: (int) if > 0, save incrementally every so many inputs.
+    Returns:
+        The number of output pages.
+    """
+    if not items:
+        raise ValueError("no input files")
+    pdf_out = pymupdf.open()  # empty new PDF document
+    if metadata:
+        pdf_out.set_metadata(metadata)
+    if incremental > 0:  # start with a file we can update incrementally
+        pdf_out.new_page()  # a PDF must have pages: remove it again below
+        pdf_out.save(output)
+        pdf_out.close()
+        pdf_out = pymupdf.open(output)
+        pdf_out.delete_page(0)
+
+    aus_nr = 0  # current page number in output
+    total_toc = []
+    with ThreadPoolExecutor(max_workers=1) as reader:
+        future = reader.submit(read_file, items[0][0])
+        for i, (dateiname, von, bis, rot) in enumerate(items):
+            doc = pymupdf.open("pdf", future.result())
+            if i + 1 < len(items):  # prefetch the next input
+                future = reader.submit(read_file, items[i + 1][0])
+            max_seiten = doc.page_count
+            # user input minus 1, PDF pages count from zero
+            # also correct any inconsistent input
+            von = min(max(0, int(von) - 1), max_seiten - 1)
+            bis = min(max(0, int(bis) - 1), max_seiten - 1)
+            pdf_out.insert_pdf(doc, from_page=von, to_page=bis, rotate=int(rot))
+            if toc:
+                merge_toc(total_toc, doc, dateiname, von, bis, aus_nr)
+            aus_nr += abs(bis - von) + 1
+            doc.close()
+            if incremental > 0 and (i + 1) % incremental == 0:
+                pdf_out.save(output, incremental=True, encryption=pymupdf.PDF_ENCRYPT_KEEP)
+
+    if total_toc:
+        pdf_out.set_toc(total_toc)
+    if incremental > 0:
+        pdf_out.save(output, incremental=True, encryption=pymupdf.PDF_ENCRYPT_KEEP)
+    else:
+        pdf_out.save(output)
+    pdf_out.close()
+    return aus_nr
+
+
+def parse_item(text):
+    """Convert 'file.pdf[:from-to[:rotate]]' to (filename, from, to, rotate).
+
+    The file name may contain ":" itself, like in "C:\\a.pdf:1-3". Only a
+    page range and a rotation at the end of the text are split off.
+    """
+    filename, von, bis, rot = RE_ITEM.fullmatch(text).groups()
+    if von is None:
+        doc = pymupdf.open(filename)
+        von, bis = 1, doc.page_count
+        doc.close()
+    return filename, int(von), int(bis), int(rot or -1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Join PDF files.")
+    parser.add_argument("input", nargs="+", help="file.pdf[:from-to[:rotate]]")
+    parser.add_argument("-o", "--output", default="output.pdf", help="output file")
+    parser.add_argument(
+        "-noToC", action="store_true", help="suppress table of contents"
+    )
+    parser.add_argument(
+        "-incremental",
+        type=int,
+        default=0,
+        help="save incrementally every N input files",
+    )
+    args = parser.parse_args()
+
+    cdate = pymupdf.get_pdf_now()
+    metadata = {
+        "creator": "PDF Joiner",
+        "producer": "PyMuPDF",
+        "creationDate": cdate,
+        "modDate": cdate,
+        "title": "Joined PDF files",
+    }
+    t0 = time.perf_counter()
+    items = [parse_item(text) for text in args.input]
+    pages = join_pdfs(
+        items,
+        args.output,
+        metadata=metadata,
+        toc=not args.noToC,
+        incremental=args.incremental,
+    )
+    t1 = time.perf_counter()
+    print(
+        "Joined %i files, %i pages to '%s' in %g sec."
+        % (len(items), pages, args.output, round(t1 - t0, 3))
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Time optimize.py and check the images it rewrites
+-------------------------------------------------------------------------------
+License: GNU GPL V3
+(c) 2022 Jorj X. McKie
+
+Usage
+-----
+python benchmark.py [pages]
+
+Description
+-----------
+Makes a PDF with 'pages' pages (default 20) in a temporary folder. Every
+page shows two images of its own:
+
+* a photo-like RGB image of 1200 x 1200 pixels in a rectangle of 200 x 200
+  points, which must be downsampled to 150 DPI and stored as JPEG
+* an uncompressed image with 4 colors of 400 x 400 pixels at 72 DPI,
+  which must be stored with lossless compression
+
+Then 'optimize()' is run and timed. Every image of the output is decoded
+again: JPEG images must have the expected width and height, and lossless
+images exactly the pixels of the original.
+
+Dependencies
+------------
+PyMuPDF
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pymupdf
+
+from optimize import optimize
+
+
+def make_pdf(filename, pages):
+    """Make a PDF with a photo-like and a 4-color image per page."""
+    doc = pymupdf.open()
+    for pno in range(pages):
+        page = doc.new_page(width=650, height=650)
+        photo = bytes(random.getrandbits(8) for _ in range(64 * 64 * 3))
+        pix = pymupdf.Pixmap(pymupdf.csRGB, 64, 64, photo, False)
+        pix = pymupdf.Pixmap(pix, 1200, 1200, None)  # smooth noise
+        page.insert_image(pymupdf.Rect(20, 20, 220, 220), pixmap=pix)
+
+        colors = [bytes((pno % 256, 0, 0)), b"\xff\xff\xff", b"\x00\x80\xff", b"\0\0\0"]
+        samples = b"".join(
+            colors[(x // 50 + y // 50) % 4] for y in range(400) for x in range(400)
+        )
+        pix = pymupdf.Pixmap(pymupdf.csRGB, 400, 400, samples, False)
+        xref = page.insert_image(pymupdf.Rect(230, 230, 630, 630), pixmap=pix)
+        doc.update_stream(xref, samples, compress=False)  # uncompressed
+        doc.xref_set_key(xref, "Filter", "null")
+        doc.xref_set_key(xref, "DecodeParms", "null")
+    doc.save(filename)
+
+
+def check(original, optimized):
+    """Compare the images of every page of two PDFs."""
+    old = pymupdf.open(original)
+    new = pymupdf.open(optimized)
+    for pno in range(old.page_count):
+        for item1, item2 in zip(old[pno].get_images(), new[pno].get_images()):
+            pix1 = pymupdf.Pixmap(old, item1[0])
+            pix2 = pymupdf.Pixmap(new, item2[0])
+            if item2[8] == "DCTDecode":
+                assert (pix2.w, pix2.h) == (417, 417), (pno, pix2.w, pix2.h)
+            else:
+                assert item2[8] == "FlateDecode", (pno, item2[8])
+                assert pix2.samples == pix1.samples, "page %i: pixels differ" % pno
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    folder = tempfile.mkdtemp()
+    filename = os.path.join(folder, "images.pdf")
+    output = os.path.join(folder, "images-optimized.pdf")
+    make_pdf(filename, pages)
+
+    t0 = time.perf_counter()
+    before, after, images, changed = optimize(filename, output)
+    t1 = time.perf_counter() - t0
+    check(filename, output)
+    print("%i of %i images rewritten in %g sec" % (changed, images, round(t1, 2)))
+    print("file size %i -> %i bytes" % (before["file"], after["file"]))
+
+    os.remove(filename)
+    os.remove(output)
+    os.rmdir(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,202 @@
 """
-Optimize a PDF document with FileOptimizer.
+Optimize a PDF document with PyMuPDF only
 -------------------------------------------------------------------------------
 License: GNU GPL V3
 (c) 2022 Jorj X. McKie
 
 Usage
 -----
-python optimize.py input.pdf
+python optimize.py input.pdf [-output output.pdf] [-dpi 150] [-quality 75]
+                   [-processes N]
 
-Notes
------
-Since "/Producer" and "/Creator" get affected by this, the document metadata is
-first saved to be restored after the optimization is completed. This means
-non-compressed object definitions are also accepted as created by FileOptimizer.
+Description
+-----------
+Reduces the size of a PDF in three steps:
+
+* Images: the effective resolution of every image is computed from the
+  rectangles where it is shown on its pages. Images above the target
+  resolution (-dpi) are downsampled. Photo-like images (more than 256
+  colors) are stored as JPEG with the given quality. Images with few colors
+  are stored with lossless compression. Bilevel images (1 bit per pixel,
+  image masks) and images using features we cannot reproduce (/Decode
+  arrays, color key masks) are left untouched, as are images whose new
+  version would not be smaller. Rewritten images use DeviceGray or
+  DeviceRGB, so ICC-based colors are approximated. Decoding and encoding
+  images is done in a process pool. Script benchmark.py checks the
+  rewritten images.
+* Fonts: embedded fonts are reduced to the glyphs actually used.
+* The file is saved with garbage collection and compression.
+
+The output file defaults to the input file name with suffix "-optimized".
+Metadata are kept. A table shows the sizes of images, fonts and other
+content before and after.
 
 Dependencies
 ------------
-FileOptimizer
+PyMuPDF
 """
 
-from __future__ import print_function
+import argparse
+import os
+import re
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
 import pymupdf
-import sys, os, subprocess, tempfile, time
-
-assert len(sys.argv) == 2, "need filename parameter"
-fn = sys.argv[1]
-assert fn.lower().endswith(".pdf"), "must be a PDF file"
-
-fullname = os.path.abspath(fn)  # get the full path & name
-t0 = time.perf_counter()  # save current time
-doc = pymupdf.open(fullname)  # open PDF to save metadata
-meta = doc.metadata
-doc.close()
-
-t1 = time.perf_counter()  # save current time again
-subprocess.call(["fileoptimizer64", fullname])  # now invoke super optimizer
-t2 = time.perf_counter()  # save current time again
-
-cdir = os.path.split(fullname)[0]  # split dir from filename
-fnout = tempfile.mkstemp(suffix=".pdf", dir=cdir)  # create temp pdf name
-doc = pymupdf.open(fullname)  # open now optimized PDF
-doc.set_metadata(meta)  # restore old metadata
-doc.save(fnout[1], garbage=4)  # save temp PDF with it, a little sub opt
-doc.close()  # close it
-
-os.remove(fn)  # remove super optimized file
-os.close(fnout[0])  # close temp file
-os.rename(fnout[1], fn)  # and rename it to original filename
-t3 = time.perf_counter()  # save current time again
-
-# put out runtime statistics
-print("Timings:")
-print(str(round(t1 - t0, 4)).rjust(10), "save old metata")
-print(str(round(t2 - t1, 4)).rjust(10), "execute FileOptimizer")
-print(str(round(t3 - t2, 4)).rjust(10), "restore old metadata")
+
+RE_FONTFILE = re.compile(r"/FontFile[23]?\s*(\d+)\s+0\s+R")
+
+worker_doc = None  # the document of a worker process
+
+
+def category_sizes(filename):
+    """Return the bytes of images, fonts and everything else in a PDF."""
+    doc = pymupdf.open(filename)
+    sizes = {"images": 0, "fonts": 0}
+    kinds = {}
+    for xref in range(1, doc.xref_length()):
+        source = doc.xref_object(xref, compressed=True)
+        if "/Subtype/Image" in source.replace(" ", ""):
+            kinds[xref] = "images"
+        for ff in RE_FONTFILE.findall(source):
+            kinds[int(ff)] = "fonts"
+    for xref, kind in kinds.items():
+        sizes[kind] += len(doc.xref_stream_raw(xref) or b"")
+    doc.close()
+    sizes["file"] = os.path.getsize(filename)
+    sizes["other"] = sizes["file"] - sizes["images"] - sizes["fonts"]
+    return sizes
+
+
+def image_jobs(doc, dpi):
+    """Return a list of (xref, scale) for the images which we may rewrite.
+
+    scale is the factor to reach the target resolution at the largest
+    placement of the image, or 1.
+    """
+    images = {}  # xref -> [width, height, largest shown width / height]
+    skipped = set()
+    for page in doc:
+        for item in page.get_images(full=True):
+            xref, smask, width, height, bpc = item[:5]
+            if xref in skipped:
+                continue
+            source = doc.xref_object(xref, compressed=True).replace(" ", "")
+            if bpc == 1 or "/ImageMasktrue" in source or "/Decode[" in source:
+                skipped.add(xref)  # bilevel or special: leave as is
+                continue
+            if "/Mask" in source.replace("/SMask", ""):
+                skipped.add(xref)  # color key masking needs the original
+                continue
+            entry = images.setdefault(xref, [width, height, 0, 0])
+            for rect in page.get_image_rects(xref):
+                entry[2] = max(entry[2], rect.width)
+                entry[3] = max(entry[3], rect.height)
+
+    jobs = []
+    for xref, (width, height, shown_w, shown_h) in images.items():
+        scale = 1
+        if shown_w and shown_h:
+            eff_dpi = min(width / shown_w, height / shown_h) * 72
+            if eff_dpi > dpi:
+                scale = dpi / eff_dpi
+        jobs.append((xref, scale))
+    return jobs
+
+
+def open_worker(filename):
+    """Process pool initializer: open the document once per process."""
+    global worker_doc
+    worker_doc = pymupdf.open(filename)
+
+
+def rewrite_image(job, quality):
+    """Decode, downsample and encode one image.
+
+    Returns (xref, new stream, dictionary entries) or None if the image
+    should be left unchanged. The stream is encoded already.
+    """
+    xref, scale = job
+    doc = worker_doc
+    old_size = len(doc.xref_stream_raw(xref) or b"")
+    pix = pymupdf.Pixmap(doc, xref)  # without its /SMask
+    if pix.alpha:
+        pix = pymupdf.Pixmap(pix, 0)
+    if pix.colorspace is None or pix.colorspace.n not in (1, 3):
+        pix = pymupdf.Pixmap(pymupdf.csRGB, pix)
+    if scale < 1:
+        width = max(1, round(pix.w * scale))
+        height = max(1, round(pix.h * scale))
+        pix = pymupdf.Pixmap(pix, width, height, None)
+
+    colorspace = "/DeviceGray" if pix.n == 1 else "/DeviceRGB"
+    if pix.color_count() > 256:  # photo-like
+        stream = pix.tobytes("jpg", jpg_quality=quality)
+        keys = {"Filter": "/DCTDecode"}
+    else:  # few colors: lossless
+        stream = zlib.compress(pix.samples, 9)
+        keys = {"Filter": "/FlateDecode"}
+    if len(stream) >= old_size and scale == 1:
+        return None
+    keys.update(
+        {
+            "Width": str(pix.w),
+            "Height": str(pix.h),
+            "BitsPerComponent": "8",
+            "ColorSpace": colorspace,
+            "DecodeParms": "null",
+        }
+    )
+    return xref, stream, keys
+
+
+def optimize(filename, output, dpi=150, quality=75, processes=None):
+    """Optimize a PDF and return the category sizes before and after."""
+    before = category_sizes(filename)
+    doc = pymupdf.open(filename)
+
+    jobs = image_jobs(doc, dpi)
+    changed = 0
+    with ProcessPoolExecutor(
+        max_workers=processes, initializer=open_worker, initargs=(filename,)
+    ) as executor:
+        qualities = [quality] * len(jobs)
+        for result in executor.map(rewrite_image, jobs, qualities, chunksize=4):
+            if result is None:
+                continue
+            xref, stream, keys = result
+            doc.update_stream(xref, stream, compress=False)
+            for key, value in keys.items():
+                doc.xref_set_key(xref, key, value)
+            changed += 1
+
+    doc.subset_fonts()
+    doc.save(output, garbage=3, deflate=True, use_objstms=1)
+    doc.close()
+    return before, category_sizes(output), len(jobs), changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimize a PDF.")
+    parser.add_argument("input", help="PDF filename")
+    parser.add_argument("-output", help="output filename")
+    parser.add_argument("-dpi", type=int, default=150, help="target image DPI")
+    parser.add_argument("-quality", type=int, default=75, help="JPEG quality")
+    parser.add_argument("-processes", type=int, help="number of processes")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.input)[0] + "-optimized.pdf"
+    t0 = time.perf_counter()
+    before, after, images, changed = optimize(
+        args.input, output, args.dpi, args.quality, args.processes
+    )
+    print("%i of %i images rewritten, fonts subset" % (changed, images))
+    print("%-14s %12s %12s" % ("category", "before", "after"))
+    for key in ("images", "fonts", "other", "file"):
+        print("%-14s %12i %12i" % (key, before[key], after[key]))
+    print("%g sec" % round(time.perf_counter() - t0, 2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+"""
+Helpers for document viewers, independent of any GUI toolkit
+--------------------------------------------------------------------------------
+License: GNU GPL V3+
+(c) 2018-2019 Jorj X. McKie
+
+* PageCache: memory-bounded cache of display lists and pixmaps, with
+  background prefetch of neighbour pages.
+* TileRenderer: progressive, tile-based rendering of pages.
+* RectIndex: constant-time hit-testing of link rectangles.
+* bridge: zero-copy views of pixmap memory for numpy, PIL and wxPython.
+
+Module 'wxtiles' contains the adapter for wxPython and is not imported here.
+"""
+
+from .pagecache import PageCache
+from .tiles import TileRenderer
+from .linkindex import RectIndex
@@ -0,0 +1,89 @@
+"""
+Hand Pixmap memory to GUI and image frontends without copying it
+--------------------------------------------------------------------------------
+License: GNU GPL V3+
+(c) 2018-2019 Jorj X. McKie
+
+Description
+-----------
+'Pixmap.samples' is a new 'bytes' object, i.e. a copy of the whole raster.
+'Pixmap.samples_mv' instead is a memoryview of the pixmap's own memory. The
+functions here build frontend objects on top of that memoryview:
+
+* numpy_view(pix): numpy array sharing the pixmap memory - no copy.
+* pil_view(pix): PIL image sharing the pixmap memory - no copy for
+  gray, RGBA and CMYK pixmaps (CMYK without alpha only). PIL itself stores RGB with 4 bytes per pixel,
+  so RGB pixmaps are copied once, by PIL.
+* wx_bitmap(pix): wx.Bitmap filled directly from the pixmap memory. A
+  wx.Bitmap always owns its memory, so this is exactly one copy.
+
+Lifetime: a view is valid only as long as its pixmap exists - the pixmap
+memory is freed with the pixmap, even if views still point to it. Keep a
+reference to the pixmap for as long as the view is used, or use
+'PixmapView', which holds the pixmap and releases its own memoryview on exit.
+
+Dependencies
+------------
+PyMuPDF; numpy, Pillow or wxPython for the respective frontend
+"""
+
+
+class PixmapView:
+    """Context manager providing the memoryview of a pixmap.
+
+    with PixmapView(pix) as mv:
+        ...  # use mv - and the pixmap - here
+    """
+
+    def __init__(self, pix):
+        self.pix = pix
+        self.mv = None
+
+    def __enter__(self):
+        self.mv = memoryview(self.pix.samples_mv)  # our own export
+        return self.mv
+
+    def __exit__(self, *args):
+        self.mv.release()  # fails if there still exist exports of the view
+        self.mv = None
+        self.pix = None
+
+
+def numpy_view(pix):
+    """Return a numpy array of shape (height, width, n) on the pixmap memory."""
+    import numpy as np
+
+    return np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(
+        pix.h, pix.w, pix.n
+    )
+
+
+PIL_MODES = {1: "L", 2: "LA", 3: "RGB", 4: "RGBA"}
+
+
+def pil_view(pix):
+    """Return a PIL image on the pixmap memory.
+
+    PIL has no mode for CMYK with alpha: remove the alpha channel first,
+    e.g. by 'pymupdf.Pixmap(pix, 0)', and keep that pixmap.
+    """
+    from PIL import Image
+
+    if pix.colorspace and pix.colorspace.n == 4:
+        if pix.alpha:
+            raise ValueError("PIL has no mode for CMYK with alpha")
+        mode = "CMYK"
+    else:
+        mode = PIL_MODES[pix.n]
+    return Image.frombuffer(
+        mode, (pix.w, pix.h), pix.samples_mv, "raw", mode, pix.stride, 1
+    )
+
+
+def wx_bitmap(pix):
+    """Return a wx.Bitmap made from the pixmap memory."""
+    import wx
+
+    if pix.alpha:
+        return wx.Bitmap.FromBufferRGBA(pix.w, pix.h, pix.samples_mv)
+    return wx.Bitmap.FromBuffer(pix.w, pix.h, pix.samples_mv)
@@ -0,0 +1,67 @@
+"""
+Spatial index for hit-testing link rectangles
+--------------------------------------------------------------------------------
+License: GNU GPL V3+
+(c) 2018-2019 Jorj X. McKie
+
+Description
+-----------
+Viewers check on every mouse move, whether the cursor is inside a link's hot
+spot. Scanning all rectangles makes this slow for pages with thousands of
+links. 'RectIndex' sorts the rectangles into the cells of a uniform grid
+once. A query then only looks at the few rectangles registered in the cell
+of the cursor - independent of the number of links on the page.
+
+Rectangles are given like wx.Rect, i.e. as sequences (x, y, width, height),
+and a point (px, py) is inside if x <= px < x + width and y <= py < y + height.
+
+Dependencies
+------------
+None
+"""
+
+
+class RectIndex:
+    """Grid index over a list of rectangles (x, y, width, height).
+
+    Query results are positions in this list, the smallest first - just like
+    a scan of the list would find them.
+    """
+
+    def __init__(self, rects, cell=64):
+        self.cell = cell
+        self.rects = [tuple(int(v) for v in r[:4]) for r in rects]
+        self.grid = {}  # (col, row) -> list of rectangle positions
+        for i, r in enumerate(self.rects):
+            for key in self._cells(r):
+                self.grid.setdefault(key, []).append(i)
+
+    def _cells(self, r):
+        """Yield the grid cells covered by rectangle r."""
+        x, y, w, h = r
+        if w <= 0 or h <= 0:
+            return
+        c = self.cell
+        for row in range(y // c, (y + h - 1) // c + 1):
+            for col in range(x // c, (x + w - 1) // c + 1):
+                yield col, row
+
+    def find(self, pos):
+        """Return the position of the first rectangle containing point 'pos'."""
+        px, py = pos[0], pos[1]
+        for i in self.grid.get((px // self.cell, py // self.cell), ()):
+            x, y, w, h = self.rects[i]
+            if x <= px < x + w and y <= py < y + h:
+                return i
+        return -1
+
+    def intersecting(self, rect):
+        """Return the sorted positions of rectangles intersecting 'rect'."""
+        x0, y0, w0, h0 = tuple(rect[:4])
+        found = set()
+        for key in self._cells((x0, y0, w0, h0)):
+            for i in self.grid.get(key, ()):
+                x, y, w, h = self.rects[i]
+                if x < x0 + w0 and x0 < x + w and y < y0 + h0 and y0 < y + h:
+                    found.add(i)
+        return sorted(found)
@@ -0,0 +1,157 @@
+"""
+Bounded page cache with background prefetch for document viewers
+--------------------------------------------------------------------------------
+License: GNU GPL V3+
+(c) 2018-2019 Jorj X. McKie
+
+Description
+-----------
+Class 'PageCache' keeps display lists and rendered pixmaps of recently shown
+pages. Both are evicted least-recently-used first as soon as their (estimated)
+memory size exceeds a limit. So paging through thousands of pages no longer
+lets memory grow without bound.
+
+After every page shown, a background thread creates the display lists of the
+neighbouring pages (unless 'prefetch' is 0, e.g. for editors changing the
+document). Flipping to the next or previous page then no longer has
+to wait for the page being interpreted.
+
+PyMuPDF is not thread-safe. Therefore every access to the document - by the
+prefetch thread as well as by the viewer - must hold 'PageCache.lock'. The
+prefetch thread only runs while the viewer is idle, i.e. while the user is
+looking at the current page.
+
+This module does not need a GUI: see '../display-document/benchmark.py'.
+
+Dependencies
+------------
+PyMuPDF
+"""
+
+import queue
+import threading
+from collections import OrderedDict
+
+import pymupdf
+
+
+def displaylist_size(page):
+    """Estimate the memory size of a page's display list.
+
+    We take the size of the page's content stream plus the size of its
+    images after decompression.
+    """
+    size = 0
+    if page.parent.is_pdf:
+        size += len(page.read_contents())
+        for img in page.get_images():
+            size += img[2] * img[3] * 4  # width x height x max. components
+    return max(size, 4096)
+
+
+class PageCache:
+    """LRU cache of display lists and pixmaps of a document's pages.
+
+    Args:
+        doc: the document.
+        max_bytes: memory limit for display lists and pixmaps together.
+        prefetch: prefetch this many pages before and after a shown page.
+    """
+
+    def __init__(self, doc, max_bytes=256 << 20, prefetch=1):
+        self.doc = doc
+        self.max_bytes = max_bytes
+        self.prefetch_count = prefetch
+        self.lock = threading.RLock()  # serializes all access to 'doc'
+        self.items = OrderedDict()  # key -> (object, size)
+        self.size = 0  # total estimated size of cached objects
+        self.queue = queue.Queue(maxsize=2 * prefetch + 1)  # +1: stop signal
+        self.thread = None  # no prefetch: no thread
+        if prefetch > 0:
+            self.thread = threading.Thread(target=self._prefetcher, daemon=True)
+            self.thread.start()
+
+    def _get(self, key):
+        """Return a cached object and mark it as most recently used."""
+        item = self.items.get(key)
+        if item is None:
+            return None
+        self.items.move_to_end(key)
+        return item[0]
+
+    def _put(self, key, obj, size):
+        """Store an object, then evict old ones until we are within limits."""
+        self.items[key] = (obj, size)
+        self.size += size
+        while self.size > self.max_bytes and len(self.items) > 1:
+            _, (_, old_size) = self.items.popitem(last=False)
+            self.size -= old_size
+
+    def get_displaylist(self, pno):
+        """Return the display list of page number 'pno'."""
+        with self.lock:
+            dl = self._get(("dl", pno))
+            if dl is None:
+                page = self.doc[pno]
+                dl = page.get_displaylist()
+                self._put(("dl", pno), dl, displaylist_size(page))
+            return dl
+
+    def get_pixmap(self, pno, matrix=pymupdf.Identity, alpha=False, clip=None):
+        """Return the pixmap of page number 'pno' for a matrix and clip."""
+        key = ("pix", pno, tuple(matrix), alpha, tuple(clip) if clip else None)
+        with self.lock:
+            pix = self._get(key)
+            if pix is None:
+                dl = self.get_displaylist(pno)
+                pix = dl.get_pixmap(matrix=matrix, alpha=alpha, clip=clip)
+                self._put(key, pix, len(pix.samples_mv))
+            return pix
+
+    def prefetch(self, pno):
+        """Have the display lists of the pages around 'pno' made in background.
+
+        Requests for pages around a previously shown page which are still
+        waiting are dropped: they are no longer needed.
+        """
+        if self.thread is None:
+            return
+        self._drain()
+        with self.lock:
+            page_count = self.doc.page_count
+        for i in range(1, self.prefetch_count + 1):
+            for n in (pno + i, pno - i):
+                if 0 <= n < page_count:
+                    self.queue.put_nowait(n)
+
+    def _drain(self):
+        """Remove all waiting requests from the queue."""
+        try:
+            while True:
+                self.queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _prefetcher(self):
+        while True:
+            pno = self.queue.get()
+            if pno is None:  # stop signal
+                return
+            try:
+                self.get_displaylist(pno)
+            except Exception:  # e.g. a broken page: the viewer will see it
+                continue
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+            self.size = 0
+
+    def close(self):
+        """Stop the prefetch thread and empty the cache."""
+        if self.thread is not None:
+            self._drain()
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+        self.clear()
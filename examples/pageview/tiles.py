@@ -0,0 +1,96 @@
+"""
+Progressive tile-based page rendering
+--------------------------------------------------------------------------------
+License: GNU GPL V3+
+(c) 2018-2019 Jorj X. McKie
+
+Description
+-----------
+Rendering a full page at high zoom takes long and needs a huge pixmap. Class
+'TileRenderer' instead splits the zoomed page into square tiles and renders
+each via 'DisplayList.get_pixmap(clip=...)'.
+
+* Only tiles intersecting the visible area are rendered, those nearest to
+  the center of the visible area first.
+
+* Rendering is progressive: a first pass at a fraction of the zoom quickly
+  shows a coarse image, which subsequent passes refine up to the target zoom.
+
+* Display lists and tiles are kept in a 'PageCache', so they are evicted by
+  memory size and shared with other users of that cache.
+
+Nothing here needs a GUI. Frontends receive (IRect, Pixmap) pairs, where the
+IRect tells where to draw the pixmap in the pixel coordinates of the target
+zoom. Pixmaps of coarse passes are smaller than their IRect and must be
+scaled when drawn. See 'wxtiles.py' for the wxPython adapter.
+
+Dependencies
+------------
+PyMuPDF
+"""
+
+import pymupdf
+
+from .pagecache import PageCache
+
+
+class TileRenderer:
+    """Render pages of a document in tiles.
+
+    Args:
+        cache: a PageCache or a document (then a PageCache is made).
+        tile_size: tile width and height in pixels.
+        passes: zoom fractions of the progressive passes, ending with 1.
+    """
+
+    def __init__(self, cache, tile_size=256, passes=(0.25, 1)):
+        if not isinstance(cache, PageCache):
+            cache = PageCache(cache)
+        self.cache = cache
+        self.tile_size = tile_size
+        self.passes = passes
+
+    def page_irect(self, pno, zoom):
+        """Return the pixel rectangle of a page at this zoom."""
+        dl = self.cache.get_displaylist(pno)
+        return (dl.rect * pymupdf.Matrix(zoom, zoom)).irect
+
+    def tile_irects(self, pno, zoom, viewport=None, tile_size=None):
+        """Return the tile rectangles intersecting 'viewport'.
+
+        'viewport' is a pixel rectangle at this zoom (default: the whole page).
+        Tiles are sorted by distance to the center of the viewport.
+        """
+        page_ir = self.page_irect(pno, zoom)
+        viewport = page_ir if viewport is None else pymupdf.IRect(viewport) & page_ir
+        if viewport.is_empty:
+            return []
+        t = tile_size or self.tile_size
+        center = (viewport.tl + viewport.br) / 2
+        tiles = []
+        for row in range(viewport.y0 // t, (viewport.y1 - 1) // t + 1):
+            for col in range(viewport.x0 // t, (viewport.x1 - 1) // t + 1):
+                tile = pymupdf.IRect(col * t, row * t, (col + 1) * t, (row + 1) * t)
+                tile &= page_ir
+                if not tile.is_empty:
+                    tiles.append(tile)
+        tiles.sort(key=lambda r: abs((r.tl + r.br) / 2 - center))
+        return tiles
+
+    def render_tile(self, pno, zoom, tile, fraction=1):
+        """Return the pixmap of a tile, rendered at 'fraction' of the zoom."""
+        clip = pymupdf.Rect(tile) * pymupdf.Matrix(1 / zoom, 1 / zoom)
+        z = zoom * fraction
+        return self.cache.get_pixmap(pno, matrix=pymupdf.Matrix(z, z), clip=clip)
+
+    def render(self, pno, zoom, viewport=None):
+        """Yield (pass, tile, pixmap) for all passes and visible tiles.
+
+        Coarse passes use tiles 1 / fraction times larger, so they need few
+        and small pixmaps. The last pass yields the tiles at the target zoom.
+        """
+        for i, fraction in enumerate(self.passes):
+            size = int(self.tile_size / fraction)
+            tiles = self.tile_irects(pno, zoom, viewport, tile_size=size)
+            for tile in tiles:
+                yield i, tile, self.render_tile(pno, zoom, tile, fraction)
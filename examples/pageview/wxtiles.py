@@ -0,0 +1,56 @@
+"""
+wxPython adapter for TileRenderer
+--------------------------------------------------------------------------------
+License: GNU GPL V3+
+(c) 2018-2019 Jorj X. McKie
+
+Dependencies
+------------
+PyMuPDF, wxPython Phoenix version
+"""
+
+import pymupdf
+import wx
+
+from .bridge import wx_bitmap
+
+
+def page_bitmap(renderer, pno, zoom, viewport=None, show=None):
+    """Return a wx.Bitmap of a page or of the visible part of it.
+
+    Args:
+        renderer: a TileRenderer.
+        pno: 0-based page number.
+        zoom: (float) zoom factor.
+        viewport: visible pixel rectangle of the page at this zoom, e.g. the
+            view rectangle of a wx.ScrolledWindow. Default is the whole page,
+            which is rendered in one piece, without tiles.
+        show: function called with the bitmap after each coarse pass, to
+            display the intermediate result. Only used with a viewport.
+    Returns:
+        The bitmap of the whole page, or of the viewport (clipped to the
+        page), to be drawn at the top-left of the viewport.
+    """
+    if viewport is None:
+        matrix = pymupdf.Matrix(zoom, zoom)
+        return wx_bitmap(renderer.cache.get_pixmap(pno, matrix=matrix))
+
+    viewport = pymupdf.IRect(viewport) & renderer.page_irect(pno, zoom)
+    bmp = wx.Bitmap(max(viewport.width, 1), max(viewport.height, 1), 24)
+    dc = wx.MemoryDC(bmp)
+    dc.SetBackground(wx.WHITE_BRUSH)
+    dc.Clear()
+    last_pass = 0
+    for p, tile, pix in renderer.render(pno, zoom, viewport):
+        if p != last_pass and show is not None:
+            dc.SelectObject(wx.NullBitmap)  # bitmap must be free for display
+            show(bmp)
+            dc.SelectObject(bmp)
+        last_pass = p
+        tile_bmp = wx_bitmap(pix)  # one copy only, directly from the pixmap
+        if pix.w != tile.width or pix.h != tile.height:  # coarse pass: scale up
+            img = tile_bmp.ConvertToImage().Scale(tile.width, tile.height)
+            tile_bmp = wx.Bitmap(img)
+        dc.DrawBitmap(tile_bmp, tile.x0 - viewport.x0, tile.y0 - viewport.y0)
+    dc.SelectObject(wx.NullBitmap)
+    return bmp
@@ -0,0 +1,99 @@
+"""
+Time and check the two methods of flatten.py
+-------------------------------------------------------------------------------
+License: GNU GPL V3
+(c) 2023 Jorj X. McKie
+
+Usage
+-----
+python flatten-benchmark.py [pages]
+
+Description
+-----------
+Makes a form PDF with 'pages' pages (default 500) in a temporary folder.
+Every page has a text field with the value "PAGE<number>" and a line of
+text, and all pages share one indirect Resources dictionary, as many PDF
+producers write it.
+
+The form is flattened with both methods of flatten.py, "bake" and
+"objects". For each method, the time is printed, and every page must show
+its own field value, and no other one, in its text.
+
+Dependencies
+------------
+PyMuPDF
+"""
+
+import importlib
+import os
+import sys
+import tempfile
+import time
+
+import pymupdf
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+flatten = importlib.import_module("flatten")
+
+
+def make_pdf(filename, pages):
+    """Make a form with one text field per page and shared Resources."""
+    doc = pymupdf.open()
+    for pno in range(pages):
+        page = doc.new_page()
+        page.insert_text((50, 50), "Page %i" % pno, fontname="helv")
+        widget = pymupdf.Widget()
+        widget.field_type = pymupdf.PDF_WIDGET_TYPE_TEXT
+        widget.field_name = "field%i" % pno
+        widget.field_value = "PAGE%i" % pno
+        widget.rect = pymupdf.Rect(50, 100, 250, 130)
+        page.add_widget(widget)
+    resources = doc.get_new_xref()
+    kind, value = doc.xref_get_key(doc.page_xref(0), "Resources")
+    if kind == "xref":
+        value = doc.xref_object(int(value.split()[0]), compressed=True)
+    doc.update_object(resources, value)
+    for pno in range(pages):
+        doc.xref_set_key(doc.page_xref(pno), "Resources", "%i 0 R" % resources)
+    doc.save(filename)
+
+
+def check(doc):
+    """Check that every page shows exactly its own field value."""
+    assert not doc.is_form_pdf
+    for page in doc:
+        words = page.get_text().split()
+        assert "Page" in words, "page %i lost its text" % page.number
+        values = [w for w in words if w.startswith("PAGE")]
+        assert values == ["PAGE%i" % page.number], (page.number, values)
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    folder = tempfile.mkdtemp()
+    filename = os.path.join(folder, "form.pdf")
+    make_pdf(filename, pages)
+
+    for method in ("bake", "objects"):
+        doc = pymupdf.open(filename)
+        t0 = time.perf_counter()
+        if method == "bake":
+            doc.bake(annots=False, widgets=True)
+        else:
+            flatten.flatten(doc)
+        outname = os.path.join(folder, method + ".pdf")
+        doc.save(outname, garbage=1, deflate=True)
+        t1 = time.perf_counter() - t0
+        doc.close()
+        doc = pymupdf.open(outname)
+        check(doc)
+        doc.close()
+        print("%-8s %8.3f sec, %g pages/sec" % (method, t1, round(pages / t1, 1)))
+
+    for name in ("form.pdf", "bake.pdf", "objects.pdf"):
+        os.remove(os.path.join(folder, name))
+    os.rmdir(folder)
+
+
+if __name__ == "__main__":
+    main()
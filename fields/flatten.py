@@ -0,0 +1,288 @@
+"""
+Flatten the form fields of all PDFs in a folder tree
+-------------------------------------------------------------------------------
+License: GNU GPL V3
+(c) 2023 Jorj X. McKie
+
+Usage
+-----
+python flatten.py folder output-folder [-processes N] [-method auto]
+
+Description
+-----------
+Filled forms, e.g. made by mail-merge.py, are usually flattened for
+archival: the fields should look the same, but no longer be editable.
+
+Every PDF below 'folder' is written to the same relative path below
+'output-folder'. For each page, the appearance streams of all its widgets
+are appended to the page content in one step. Hidden widgets are dropped,
+other annotations are kept. Then the widgets are removed from the pages,
+and the AcroForm from the catalog. There are two methods:
+
+* bake: 'Document.bake()', which loads every page. Loading a page of a form
+  PDF takes time proportional to the number of fields in the document, so
+  this is fast for small forms, but takes quadratic time for large ones.
+* objects: works on the PDF objects, without loading the pages. One new
+  Form XObject per page draws the appearance streams of its widgets at the
+  widget rectangles. Only if a widget has no appearance stream, its page is
+  loaded to make one. This takes the same time per page for any form size.
+  Pages which share a Resources dictionary get their own copy of it.
+
+Method "auto" (the default) uses "bake" for documents with less than
+BAKE_FIELDS fields, and "objects" for larger ones.
+
+PDFs without form fields are copied. Files are processed by worker
+processes (default: one per CPU). Pages per second and the total size
+change are reported.
+
+Dependencies
+------------
+PyMuPDF, the 'bulkio' helpers of folder ../examples in this repository
+"""
+
+import argparse
+import functools
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pymupdf
+
+# the 'bulkio' helpers live in the examples folder
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "examples"))
+from bulkio import find_pdfs, parallel_map
+
+BATCH = 1000  # files handed to the process pool at a time
+BAKE_FIELDS = 10000  # method "auto": fewer fields are faster with bake
+HIDDEN = pymupdf.PDF_ANNOT_IS_HIDDEN | pymupdf.PDF_ANNOT_IS_NO_VIEW
+
+
+def numbers(value):
+    """Return the numbers of a PDF array like '[ 0 0 612 792 ]'."""
+    return [float(v) for v in value.strip("[] ").split()]
+
+
+def references(doc, value):
+    """Return the xrefs in a PDF value, which may be a reference to an array."""
+    items = value.strip("[] ").split()
+    xrefs = [int(items[i]) for i in range(0, len(items) - 2, 3) if items[i + 2] == "R"]
+    if len(xrefs) == 1 and value[0] != "[" and not doc.xref_is_stream(xrefs[0]):
+        return references(doc, doc.xref_object(xrefs[0], compressed=True))
+    return xrefs
+
+
+def array(xrefs):
+    """Return a PDF array of references to xrefs."""
+    return "[%s]" % " ".join("%i 0 R" % xref for xref in xrefs)
+
+
+def inherited(doc, xref, key):
+    """Return the (type, value) of a page key, looking into the parents."""
+    while xref:
+        kind, value = doc.xref_get_key(xref, key)
+        if kind != "null":
+            return kind, value
+        kind, parent = doc.xref_get_key(xref, "Parent")
+        xref = int(parent.split()[0]) if kind == "xref" else 0
+    return "null", "null"
+
+
+def own_dict(doc, xref, key):
+    """Make the dictionary 'key' of object 'xref' a direct object of it.
+
+    'key' is a path like "Resources/XObject". Indirect dictionaries, and
+    Resources inherited from a parent, may be shared by many pages: they are
+    copied, so adding a key changes this page only. A missing dictionary is
+    created empty.
+    """
+    kind, value = doc.xref_get_key(xref, key)
+    if kind == "dict":
+        return
+    if kind == "null" and key == "Resources":
+        kind, value = inherited(doc, xref, key)
+    if kind == "xref":
+        value = doc.xref_object(int(value.split()[0]), compressed=True)
+    elif kind != "dict":
+        value = "<<>>"
+    doc.xref_set_key(xref, key, value)
+
+
+def appearance(doc, xref):
+    """Return the xref of the normal appearance stream of a widget, or 0."""
+    kind, value = doc.xref_get_key(xref, "AP/N")
+    if kind == "dict":  # checkbox or radio button: one stream per state
+        state = doc.xref_get_key(xref, "AS")[1].lstrip("/")
+        kind, value = doc.xref_get_key(xref, "AP/N/" + state)
+    if kind != "xref":
+        return 0
+    return int(value.split()[0])
+
+
+def placement(doc, xref, ap_xref):
+    """Return the matrix which draws an appearance stream in the widget
+    rectangle, as prescribed by the PDF specification, and the rectangle.
+    Returns None if one of them is empty.
+    """
+    rect = pymupdf.Rect(numbers(doc.xref_get_key(xref, "Rect")[1]))
+    bbox = pymupdf.Rect(numbers(doc.xref_get_key(ap_xref, "BBox")[1]))
+    kind, value = doc.xref_get_key(ap_xref, "Matrix")
+    if kind == "array":
+        bbox = bbox.transform(pymupdf.Matrix(numbers(value)))
+    rect.normalize()
+    if bbox.is_empty or rect.is_empty:
+        return None
+    sx = rect.width / bbox.width
+    sy = rect.height / bbox.height
+    e = rect.x0 - bbox.x0 * sx
+    f = rect.y0 - bbox.y0 * sy
+    return pymupdf.Matrix(sx, 0, 0, sy, e, f), rect
+
+
+def flatten_page(doc, pno, xref, begin, end):
+    """Flatten the widgets of page 'pno' with 'xref'. Returns their number.
+
+    The appearances of all widgets are drawn by one new Form XObject
+    "FlatWidgets" of the page. Stream 'begin' saves the graphics state before
+    the old page content, stream 'end' restores it and draws the new form.
+    """
+    kind, value = doc.xref_get_key(xref, "Annots")
+    if kind == "null":
+        return 0
+    annots = references(doc, value)
+    widgets = [x for x in annots if doc.xref_get_key(x, "Subtype")[1] == "/Widget"]
+    if not widgets:
+        return 0
+    appearances = {x: appearance(doc, x) for x in widgets}
+    if not all(appearances.values()):  # make missing appearance streams
+        page = doc[pno]
+        for x in widgets:
+            if not appearances[x]:
+                page.load_widget(x).update()
+                appearances[x] = appearance(doc, x)
+        page = None
+
+    bbox = pymupdf.EMPTY_RECT()
+    content = []
+    resources = []
+    for x in widgets:
+        kind, flags = doc.xref_get_key(x, "F")
+        if kind == "int" and int(flags) & HIDDEN:
+            continue
+        ap_xref = appearances[x]
+        placed = placement(doc, x, ap_xref) if ap_xref else None
+        if placed is None:
+            continue
+        matrix, rect = placed
+        bbox |= rect
+        content.append("q %g %g %g %g %g %g cm /W%i Do Q" % (tuple(matrix) + (x,)))
+        resources.append("/W%i %i 0 R" % (x, ap_xref))
+
+    form = doc.get_new_xref()
+    doc.update_object(
+        form,
+        "<</Type/XObject/Subtype/Form/BBox[%g %g %g %g]/Resources<</XObject<<%s>>>>>>"
+        % (tuple(bbox if content else (0, 0, 0, 0)) + (" ".join(resources),)),
+    )
+    doc.update_stream(form, "\n".join(content).encode())
+
+    own_dict(doc, xref, "Resources")
+    own_dict(doc, xref, "Resources/XObject")
+    doc.xref_set_key(xref, "Resources/XObject/FlatWidgets", "%i 0 R" % form)
+
+    kind, value = doc.xref_get_key(xref, "Contents")
+    old = references(doc, value) if kind != "null" else []
+    doc.xref_set_key(xref, "Contents", array([begin] + old + [end]))
+    annots = [x for x in annots if x not in appearances]
+    doc.xref_set_key(xref, "Annots", array(annots) if annots else "null")
+    return len(widgets)
+
+
+def flatten(doc):
+    """Flatten all form fields of a document. Returns the number of widgets."""
+    # looking up a page is slower once the document has been changed
+    xrefs = [doc.page_xref(pno) for pno in range(doc.page_count)]
+    begin, end = doc.get_new_xref(), doc.get_new_xref()
+    for stream, data in ((begin, b"q\n"), (end, b"\nQ /FlatWidgets Do\n")):
+        doc.update_object(stream, "<<>>")
+        doc.update_stream(stream, data)
+    count = 0
+    for pno, xref in enumerate(xrefs):
+        count += flatten_page(doc, pno, xref, begin, end)
+    doc.xref_set_key(doc.pdf_catalog(), "AcroForm", "null")
+    return count
+
+
+def flatten_file(folder, output, method, path):
+    """Flatten one PDF. Returns (path, pages, input size, output size, status),
+    where status is "flattened", "copied" or an error message.
+    """
+    filename = os.path.join(folder, path)
+    outname = os.path.join(output, path)
+    size = os.path.getsize(filename)
+    try:
+        os.makedirs(os.path.dirname(outname), exist_ok=True)
+        doc = pymupdf.open(filename)
+        if doc.needs_pass:
+            return path, 0, size, 0, "encrypted"
+        pages = doc.page_count
+        if not doc.is_form_pdf:
+            doc.close()
+            shutil.copyfile(filename, outname)
+            return path, pages, size, size, "copied"
+        if method == "auto":
+            method = "bake" if doc.is_form_pdf < BAKE_FIELDS else "objects"
+        if method == "bake":
+            doc.bake(annots=False, widgets=True)
+        else:
+            flatten(doc)
+        doc.save(outname, garbage=1, deflate=True)
+        doc.close()
+        return path, pages, size, os.path.getsize(outname), "flattened"
+    except Exception as e:
+        return path, 0, size, 0, str(e) or type(e).__name__
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flatten form PDFs.")
+    parser.add_argument("folder", help="folder with PDFs")
+    parser.add_argument("output", help="folder for the flattened PDFs")
+    parser.add_argument("-processes", type=int, help="number of processes")
+    parser.add_argument(
+        "-method", choices=("auto", "bake", "objects"), default="auto", help="method"
+    )
+    args = parser.parse_args()
+
+    processes = args.processes or os.cpu_count() or 1
+    function = functools.partial(flatten_file, args.folder, args.output, args.method)
+    counts = {}
+    pages = size_in = size_out = 0
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        pdfs = find_pdfs(args.folder)
+        results = parallel_map(executor, processes, function, pdfs, BATCH)
+        for path, n, size1, size2, status in results:
+            counts[status] = counts.get(status, 0) + 1
+            if status == "flattened":
+                pages += n
+                size_in += size1
+                size_out += size2
+    t1 = time.perf_counter() - t0
+
+    for status, n in sorted(counts.items(), key=lambda item: -item[1]):
+        print("%8i %s" % (n, status))
+    print(
+        "%i pages flattened in %g sec, %g pages/sec"
+        % (pages, round(t1, 2), round(pages / t1, 1))
+    )
+    if size_in:
+        print(
+            "size of flattened PDFs: %i -> %i bytes (%+.1f%%)"
+            % (size_in, size_out, (size_out - size_in) * 100 / size_in)
+        )
+
+
+if __name__ == "__main__":
+    main()
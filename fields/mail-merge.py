@@ -0,0 +1,373 @@
+"""
+Fill a PDF form template with many records (mail merge)
+-------------------------------------------------------------------------------
+License: GNU GPL V3
+(c) 2023 Jorj X. McKie
+
+Usage
+-----
+python mail-merge.py template.pdf records.csv -output folder [-name pattern]
+python mail-merge.py template.pdf records.csv -combined output.pdf
+                     [-processes N] [-d ";"]
+
+Description
+-----------
+Every row of the CSV file is a record: its columns are field names, and the
+values are filled into the fields of that name.
+
+* Text, combobox and listbox fields get the value as text.
+* Checkboxes are checked by "1", "yes", "true", "on", "x" or their "on"
+  state name, and unchecked otherwise.
+* Of radio buttons with the same name, the one whose "on" state name
+  equals the value is switched on.
+
+The template is read once. Each record is filled into an in-memory copy of
+it, and only the fields whose value differs from the template get a new
+appearance stream. Columns which are no field name are ignored, fields
+without a column keep the value of the template.
+
+With -output, one PDF per record is written to the folder. Option -name
+is a Python format string for the file names, using the columns of the
+record and "index" (the record number, starting with 1). Default is
+"record-{index:06d}.pdf".
+
+With -combined, all records are written to one PDF. To keep the fields of
+the records apart, their names get the suffix " [index]".
+
+Records are filled in batches, which with more than one process are handled
+by worker processes. For -combined, each batch is a temporary PDF, and
+these are joined in record order at the end. Pages and fields are copied
+by 'append_form()', which - unlike 'insert_pdf()' - takes linear time for
+any number of records.
+
+The number of records per second is reported.
+
+Dependencies
+------------
+PyMuPDF, the 'bulkio' helpers of folder ../examples in this repository
+"""
+
+import argparse
+import csv
+import functools
+import itertools
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pymupdf
+
+# the 'bulkio' helpers live in the examples folder
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "examples"))
+from bulkio import parallel_map
+
+mupdf = pymupdf.mupdf
+
+BATCH = 200  # records per task of a worker process
+TRUE_VALUES = ("1", "yes", "true", "on", "x")
+
+template = None  # the FormTemplate of a worker process
+
+
+def on_state(widget):
+    """Return the name of the "on" state of a checkbox or radio button."""
+    states = widget.button_states() or {}
+    for state in (states.get("normal") or []) + (states.get("down") or []):
+        if state != "Off":
+            return state
+    return "Yes"
+
+
+class FormTemplate:
+    """A form PDF to be filled with records.
+
+    The PDF is held as bytes. For every field name, we store the page number,
+    xref, type, template value and "on" state of its widgets, so filling a
+    record does not need to look at the widgets of the template.
+    """
+
+    def __init__(self, filename):
+        with open(filename, "rb") as f:
+            self.buffer = f.read()
+        doc = pymupdf.open("pdf", self.buffer)
+        if not doc.is_form_pdf:
+            raise ValueError("'%s' has no form fields" % filename)
+        self.fields = {}  # field name -> [(pno, xref, type, value, on state)]
+        self.titles = {}  # xref of an object with /T -> its field name part
+        for page in doc:
+            for widget in page.widgets():
+                field_type = widget.field_type
+                value = widget.field_value
+                on = ""
+                if field_type in (
+                    pymupdf.PDF_WIDGET_TYPE_CHECKBOX,
+                    pymupdf.PDF_WIDGET_TYPE_RADIOBUTTON,
+                ):
+                    on = on_state(widget)
+                    value = on if value not in ("Off", False, "") else "Off"
+                self.fields.setdefault(widget.field_name, []).append(
+                    (page.number, widget.xref, field_type, value, on)
+                )
+                xref = widget.xref
+                while xref:  # the object giving the (last) name part
+                    kind, title = doc.xref_get_key(xref, "T")
+                    if kind == "string":
+                        self.titles[xref] = title
+                        break
+                    kind, parent = doc.xref_get_key(xref, "Parent")
+                    xref = int(parent.split()[0]) if kind == "xref" else 0
+        doc.close()
+
+    @staticmethod
+    def convert(field_type, value, on):
+        """Return the value to set for a record value, as a string."""
+        if field_type == pymupdf.PDF_WIDGET_TYPE_CHECKBOX:
+            value = str(value).strip()
+            return on if value.lower() in TRUE_VALUES or value == on else "Off"
+        if field_type == pymupdf.PDF_WIDGET_TYPE_RADIOBUTTON:
+            return on if str(value).strip() == on else "Off"
+        return str(value)
+
+    def fill(self, record):
+        """Return a new document filled with a record, and the number of
+        widgets which were changed.
+        """
+        doc = pymupdf.open("pdf", self.buffer)
+        pages = {}
+        changed = 0
+        for name, value in record.items():
+            if value is None or name not in self.fields:
+                continue
+            for pno, xref, field_type, old, on in self.fields[name]:
+                new = self.convert(field_type, value, on)
+                if new == old:
+                    continue
+                if pno not in pages:
+                    pages[pno] = doc[pno]
+                widget = pages[pno].load_widget(xref)
+                if on:
+                    widget.field_value = new == on
+                else:
+                    widget.field_value = new
+                widget.update()
+                changed += 1
+        return doc, changed
+
+    def rename(self, doc, index):
+        """Append " [index]" to the names of all fields of a filled document."""
+        for xref, title in self.titles.items():
+            title = pymupdf.get_pdf_str("%s [%i]" % (title, index))
+            doc.xref_set_key(xref, "T", title)
+
+
+def load_template(filename):
+    """Process pool initializer: read the template once per process."""
+    global template
+    template = FormTemplate(filename)
+
+
+def batches(records):
+    """Yield lists of (index, record) with up to BATCH records."""
+    numbered = enumerate(records, 1)
+    while True:
+        batch = list(itertools.islice(numbered, BATCH))
+        if not batch:
+            return
+        yield batch
+
+
+def append_form(doc, src):
+    """Append the pages and form fields of PDF 'src' to PDF 'doc'.
+
+    Loading a page of a form PDF takes time proportional to the number of
+    fields in the document. 'insert_pdf()' loads every inserted page and
+    compares all field names, so building a PDF of thousands of form copies
+    with it takes quadratic time. Here, the page objects are copied without
+    loading them, and become one new node of the page tree. Field names
+    are not checked: they must be unique already. 'src' is not changed.
+
+    For 1000 records of a form with 2 fields, this takes 1.4 sec, and
+    'insert_pdf()' with widgets 12 sec - growing with the square of the
+    number of records.
+    """
+    pdf = mupdf.pdf_document_from_fz_document(doc)
+    src_pdf = mupdf.pdf_document_from_fz_document(src)
+    graft_map = mupdf.pdf_new_graft_map(pdf)
+    root = mupdf.pdf_dict_gets(mupdf.pdf_trailer(pdf), "Root")
+    pages = mupdf.pdf_dict_gets(root, "Pages")
+
+    node = mupdf.pdf_add_new_dict(pdf, 4)
+    kids = mupdf.pdf_dict_put_array(node, mupdf.pdf_new_name("Kids"), src.page_count)
+    for pno in range(src.page_count):
+        src_page = mupdf.pdf_lookup_page_obj(src_pdf, pno)
+        src_annots = mupdf.pdf_dict_gets(src_page, "Annots")
+        owners = []  # the /P of the annotations, else the page is copied
+        for i in range(mupdf.pdf_array_len(src_annots)):
+            annot = mupdf.pdf_array_get(src_annots, i)
+            owners.append((annot, mupdf.pdf_dict_gets(annot, "P")))
+            mupdf.pdf_dict_dels(annot, "P")
+        page = mupdf.pdf_copy_dict(src_page)
+        mupdf.pdf_dict_dels(page, "Parent")  # else all pages are copied
+        for key in ("Resources", "MediaBox", "CropBox", "Rotate"):
+            value = mupdf.pdf_dict_get_inheritable(src_page, mupdf.pdf_new_name(key))
+            if value.m_internal:
+                mupdf.pdf_dict_puts(page, key, value)
+        page = mupdf.pdf_add_object(pdf, mupdf.pdf_graft_mapped_object(graft_map, page))
+        for annot, owner in owners:  # leave 'src' unchanged
+            if owner.m_internal:
+                mupdf.pdf_dict_puts(annot, "P", owner)
+        mupdf.pdf_dict_puts(page, "Parent", node)
+        annots = mupdf.pdf_dict_gets(page, "Annots")
+        for i in range(mupdf.pdf_array_len(annots)):
+            mupdf.pdf_dict_puts(mupdf.pdf_array_get(annots, i), "P", page)
+        mupdf.pdf_array_push(kids, page)
+    mupdf.pdf_dict_puts(node, "Type", mupdf.pdf_new_name("Pages"))
+    mupdf.pdf_dict_puts(node, "Count", mupdf.pdf_new_int(src.page_count))
+    mupdf.pdf_dict_puts(node, "Parent", pages)
+    mupdf.pdf_array_push(mupdf.pdf_dict_gets(pages, "Kids"), node)
+    count = mupdf.pdf_dict_get_int(pages, mupdf.pdf_new_name("Count"))
+    mupdf.pdf_dict_puts(pages, "Count", mupdf.pdf_new_int(count + src.page_count))
+
+    src_acro = mupdf.pdf_dict_getp(mupdf.pdf_trailer(src_pdf), "Root/AcroForm")
+    if not mupdf.pdf_is_dict(src_acro):
+        return
+    acro = mupdf.pdf_dict_gets(root, "AcroForm")
+    if not mupdf.pdf_is_dict(acro):  # copy the AcroForm, without the fields
+        acro = mupdf.pdf_copy_dict(src_acro)
+        mupdf.pdf_dict_dels(acro, "Fields")
+        mupdf.pdf_dict_dels(acro, "CO")
+        acro = mupdf.pdf_add_object(pdf, mupdf.pdf_graft_mapped_object(graft_map, acro))
+        mupdf.pdf_dict_puts(root, "AcroForm", acro)
+    for key in ("Fields", "CO"):  # top level fields, calculation order
+        items = mupdf.pdf_dict_gets(src_acro, key)
+        if not mupdf.pdf_array_len(items):
+            continue
+        array = mupdf.pdf_dict_gets(acro, key)
+        if not mupdf.pdf_is_array(array):
+            array = mupdf.pdf_dict_put_array(acro, mupdf.pdf_new_name(key), 8)
+        for i in range(mupdf.pdf_array_len(items)):
+            item = mupdf.pdf_array_get(items, i)
+            mupdf.pdf_array_push(array, mupdf.pdf_graft_mapped_object(graft_map, item))
+
+
+def fill_batch(name, combined, task):
+    """Fill a task (batch of (index, record), output).
+
+    Writes one file per record to folder 'output', or, if 'combined', all
+    records to the file 'output'. Returns (records, changed widgets).
+    """
+    batch, output = task
+    changed = 0
+    outdoc = pymupdf.open() if combined else None
+    for index, record in batch:
+        doc, n = template.fill(record)
+        changed += n
+        if combined:
+            template.rename(doc, index)
+            append_form(outdoc, doc)
+            doc.close()
+            continue
+        filename = os.path.join(output, name.format_map({**record, "index": index}))
+        doc.save(filename, garbage=1, deflate=True)
+        doc.close()
+    if combined:
+        outdoc.save(output, garbage=1, deflate=True)
+        outdoc.close()
+    return len(batch), changed
+
+
+def mail_merge(filename, records, output, combined=False, name=None, processes=1):
+    """Fill the form template 'filename' with an iterable of records.
+
+    Args:
+        records: iterable of dictionaries mapping field names to values.
+        output: folder for one PDF per record, or the PDF for 'combined'.
+        name: format string of the file names, see the module docstring.
+        processes: number of worker processes.
+    Returns:
+        (number of records, number of changed widgets)
+    """
+    name = name or "record-{index:06d}.pdf"
+    folder = tempfile.mkdtemp() if combined else None
+    chunks = []  # the temporary PDFs of 'combined', in record order
+
+    def tasks():
+        """Yield (batch, output file or folder) while reading the records."""
+        for number, batch in enumerate(batches(records)):
+            if combined:
+                chunks.append(os.path.join(folder, "batch-%06i.pdf" % number))
+                yield batch, chunks[-1]
+            else:
+                yield batch, output
+
+    function = functools.partial(fill_batch, name, combined)
+    count = changed = 0
+    if processes <= 1:
+        load_template(filename)
+        results = map(function, tasks())
+        for n, c in results:
+            count += n
+            changed += c
+    else:
+        with ProcessPoolExecutor(
+            max_workers=processes, initializer=load_template, initargs=(filename,)
+        ) as executor:
+            # only a few batches per process are read and submitted at a time
+            window = processes * 4
+            results = parallel_map(executor, processes, function, tasks(), window)
+            for n, c in results:
+                count += n
+                changed += c
+
+    if combined:
+        if chunks:
+            outdoc = pymupdf.open()
+            for chunk in chunks:
+                doc = pymupdf.open(chunk)
+                append_form(outdoc, doc)
+                doc.close()
+            outdoc.save(output, garbage=1, deflate=True)
+            outdoc.close()
+        for chunk in chunks:
+            os.remove(chunk)
+        os.rmdir(folder)
+    return count, changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill a form with many records.")
+    parser.add_argument("template", help="PDF form template")
+    parser.add_argument("records", help="CSV file with a header of field names")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("-output", help="folder for one PDF per record")
+    group.add_argument("-combined", help="one PDF for all records")
+    parser.add_argument("-name", help="file name pattern for -output")
+    parser.add_argument("-processes", type=int, default=1, help="number of processes")
+    parser.add_argument("-d", help="CSV delimiter [;]", default=";")
+    args = parser.parse_args()
+
+    if args.output and not os.path.isdir(args.output):
+        os.makedirs(args.output)
+    t0 = time.perf_counter()
+    with open(args.records, newline="", encoding="utf-8") as f:
+        records = csv.DictReader(f, delimiter=args.d)
+        count, changed = mail_merge(
+            args.template,
+            records,
+            args.combined or args.output,
+            combined=bool(args.combined),
+            name=args.name,
+            processes=args.processes,
+        )
+    t1 = time.perf_counter() - t0
+    print(
+        "%i records, %i fields changed, %g sec, %g records/sec"
+        % (count, changed, round(t1, 2), round(count / t1, 1))
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -55,10 +55,21 @@ Changes
 - The fontname to replace ("old" fontname) is now a list to account for
   potentially different name variants in the various entangled PDF objects
   like /FontName, /BaseName, etc.
+
+* Version 2026-10-19:
+- Fonts are now inventoried once per document: each font xref is resolved
+  and inspected only once, no matter on how many pages it is used. Results
+  are cached by xref.
+- The argument may also be a folder. All PDFs in it are then processed in
+  parallel worker processes, each one creating its own JSON file.
+- The time used per file is reported.
 """
 import pymupdf
 import sys
+import os
 import json
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 
 def norm_name(name):
@@ -129,33 +140,62 @@ def make_msg(font):
     return msg
 
 
-infilename = sys.argv[1]
-font_list = set()
-doc = pymupdf.open(infilename)
-for i in range(len(doc)):
-    for f in doc.get_page_fonts(i, full=True):
-        msg = ""
-        subset, fontname = get_fontnames(doc, f)
-
-        if f[1] == "n/a":
-            msg = "Not embedded!"
-        else:
-            extr = doc.extract_font(f[0])
-            font = pymupdf.Font(fontbuffer=extr[-1])
-            msg = make_msg(font)
-
-        if subset:
-            msg += ", subset font"
-        font_list.add((fontname, msg))
-
-font_list = list(font_list)
-font_list.sort(key=lambda x: x[0])
-outname = infilename + "-fontnames.json"
-out = open(outname, "w")
-outlist = []
-for fontname, msg in font_list:
-    msg1 = "keep"
-    outlist.append({"oldfont": fontname, "newfont": msg1, "info": msg})
-
-json.dump(outlist, out, indent=2)
-out.close()
+def font_inventory(doc):
+    """Return the list of JSON entries for all fonts used in a document.
+
+    Fonts are shared between pages via their /Resources. We therefore
+    inspect every font xref only once and cache its names and info message.
+    """
+    cache = {}  # font xref -> (fontnames, info message)
+    font_list = set()
+    for i in range(len(doc)):
+        for f in doc.get_page_fonts(i, full=True):
+            xref = f[0]
+            if xref not in cache:
+                subset, fontname = get_fontnames(doc, f)
+                if f[1] == "n/a":
+                    msg = "Not embedded!"
+                else:
+                    extr = doc.extract_font(xref)
+                    font = pymupdf.Font(fontbuffer=extr[-1])
+                    msg = make_msg(font)
+                if subset:
+                    msg += ", subset font"
+                cache[xref] = (fontname, msg)
+            font_list.add(cache[xref])
+
+    font_list = sorted(font_list, key=lambda x: x[0])
+    return [
+        {"oldfont": fontname, "newfont": "keep", "info": msg}
+        for fontname, msg in font_list
+    ]
+
+
+def make_json(infilename):
+    """Create the JSON file for one PDF and return (filename, count, seconds)."""
+    t0 = time.perf_counter()
+    doc = pymupdf.open(infilename)
+    outlist = font_inventory(doc)
+    doc.close()
+    outname = infilename + "-fontnames.json"
+    with open(outname, "w") as out:
+        json.dump(outlist, out, indent=2)
+    return infilename, len(outlist), time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    infilename = sys.argv[1]
+    if not os.path.isdir(infilename):
+        filenames = [infilename]
+    else:
+        filenames = sorted(
+            os.path.join(infilename, f)
+            for f in os.listdir(infilename)
+            if f.lower().endswith(".pdf")
+        )
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor() as executor:
+        for filename, count, seconds in executor.map(make_json, filenames):
+            print("%s: %i fonts, %g sec" % (filename, count, round(seconds, 3)))
+    print("Total: %i files, %g sec" % (len(filenames), round(time.perf_counter() - t0, 3)))
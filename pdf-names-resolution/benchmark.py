@@ -0,0 +1,115 @@
+"""
+Time the resolution of named destinations for growing name trees
+-------------------------------------------------------------------------------
+License: GNU GPL V3
+(c) 2023 Jorj X. McKie
+
+Usage
+-----
+python benchmark.py [count ...]
+
+Description
+-----------
+Makes PDFs with 'count' named destinations (default: 50000, 100000 and
+200000) in a two-level name tree of 1000 names per leaf. Every second
+destination is an indirect object, the others are given inline, as most
+PDF producers do it.
+
+Prints the time of 'resolve_names()' without the disk cache, and the time
+of a second call which reads the cache. Then the time and the number of
+objects read for looking up a single name with a new 'NameTree'.
+
+Dependencies
+------------
+PyMuPDF
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pymupdf
+
+from find_names import NameTree, resolve_names
+
+LEAF_SIZE = 1000
+
+
+def make_pdf(filename, count, pages=100):
+    """Make a PDF with 'count' named destinations."""
+    doc = pymupdf.open()
+    for i in range(pages):
+        doc.new_page()
+    page_xrefs = [doc.page_xref(i) for i in range(pages)]
+
+    leaves = []
+    for start in range(0, count, LEAF_SIZE):
+        names = []
+        for i in range(start, min(start + LEAF_SIZE, count)):
+            dest = "[%i 0 R /XYZ 72 %i 0]" % (page_xrefs[i % pages], 700 - i % 500)
+            if i % 2:  # indirect destination dictionary
+                xref = doc.get_new_xref()
+                doc.update_object(xref, "<</D %s>>" % dest)
+                dest = "%i 0 R" % xref
+            names.append("(name.%07i) %s" % (i, dest))
+        last = min(start + LEAF_SIZE, count) - 1
+        xref = doc.get_new_xref()
+        doc.update_object(
+            xref,
+            "<</Limits [(name.%07i) (name.%07i)] /Names [%s]>>"
+            % (start, last, " ".join(names)),
+        )
+        leaves.append(xref)
+
+    root = doc.get_new_xref()
+    doc.update_object(root, "<</Kids [%s]>>" % " ".join("%i 0 R" % x for x in leaves))
+    names = doc.get_new_xref()
+    doc.update_object(names, "<</Dests %i 0 R>>" % root)
+    doc.xref_set_key(doc.pdf_catalog(), "Names", "%i 0 R" % names)
+    doc.save(filename, garbage=1, use_objstms=1)
+    doc.close()
+
+
+def main():
+    counts = [int(c) for c in sys.argv[1:]] or [50000, 100000, 200000]
+    folder = tempfile.mkdtemp()
+    cache_dir = os.path.join(folder, "cache")
+    print(
+        "%10s %12s %12s %12s %12s %12s"
+        % ("names", "sec", "usec/name", "cached sec", "lookup ms", "reads")
+    )
+    for count in counts:
+        filename = os.path.join(folder, "names-%i.pdf" % count)
+        make_pdf(filename, count)
+        doc = pymupdf.open(filename)
+        t0 = time.perf_counter()
+        dest_names = resolve_names(doc, cache_dir=cache_dir)
+        t1 = time.perf_counter()
+        resolve_names(doc, cache_dir=cache_dir)
+        t2 = time.perf_counter()
+        assert len(dest_names) == count
+
+        name = "name.%07i" % (count // 3)
+        t3 = time.perf_counter()
+        tree = NameTree(doc)
+        assert tree.lookup(name) == dest_names[name]
+        t4 = time.perf_counter()
+        print(
+            "%10i %12.3f %12.2f %12.3f %12.1f %12i"
+            % (
+                count,
+                t1 - t0,
+                (t1 - t0) / count * 1e6,
+                t2 - t1,
+                (t4 - t3) * 1000,
+                tree.reads,
+            )
+        )
+        doc.close()
+    shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
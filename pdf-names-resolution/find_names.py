@@ -1,81 +1,463 @@
-def resolve_names(doc):
+import hashlib
+import json
+import os
+import re
+import tempfile
+from collections import namedtuple
+
+# a folder for cached name resolutions, see resolve_names()
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "pymupdf-names")
+
+# an indirect object reference "xref 0 R"
+Ref = namedtuple("Ref", "xref")
+
+TOKEN = re.compile(
+    rb"""[\s\x00]*(?:
+    (<<|>>|\[|\])                       # 1: delimiters
+    |/([^\s\x00/\[\]()<>{}%]*)          # 2: name
+    |([+-]?(?:\d+\.?\d*|\.\d+))         # 3: number
+    |(R)(?![^\s\x00/\[\]()<>{}%])         # 4: reference
+    |\(((?:[^()\\]|\\.)*)\)             # 5: string without nested "()"
+    |<([0-9A-Fa-f\s]*)>                 # 6: hex string
+    |(true|false|null)                  # 7: keywords
+    |(\()                               # 8: other string
+    |%[^\r\n]*                          # comment
+    )""",
+    re.VERBOSE | re.DOTALL,
+)
+
+ESCAPES = {
+    ord("n"): b"\n",
+    ord("r"): b"\r",
+    ord("t"): b"\t",
+    ord("b"): b"\b",
+    ord("f"): b"\f",
+    ord("("): b"(",
+    ord(")"): b")",
+    ord("\\"): b"\\",
+}
+
+KEYWORDS = {b"true": True, b"false": False, b"null": None}
+
+
+def read_literal(s, pos):
+    """Return the bytes of the literal string starting after '(' at 'pos'.
+
+    Also returns the position after the closing ')'.
+    """
+    out = bytearray()
+    depth = 1
+    n = len(s)
+    while pos < n:
+        c = s[pos]
+        if c == 0x5C:  # backslash
+            pos += 1
+            c = s[pos]
+            if c in ESCAPES:
+                out += ESCAPES[c]
+            elif 0x30 <= c <= 0x37:  # octal, up to 3 digits
+                end = pos + 1
+                while end < min(pos + 3, n) and 0x30 <= s[end] <= 0x37:
+                    end += 1
+                out.append(int(s[pos:end], 8) & 0xFF)
+                pos = end - 1
+            elif c == 0x0D:  # line continuation
+                if pos + 1 < n and s[pos + 1] == 0x0A:
+                    pos += 1
+            elif c != 0x0A:
+                out.append(c)
+        elif c == 0x28:  # balanced "(" inside the string
+            depth += 1
+            out.append(c)
+        elif c == 0x29:
+            depth -= 1
+            if depth == 0:
+                return bytes(out), pos + 1
+            out.append(c)
+        else:
+            out.append(c)
+        pos += 1
+    raise ValueError("unterminated string")
+
+
+def decode_text(b):
+    """Decode a PDF text string."""
+    if b.startswith(b"\xfe\xff"):
+        return b[2:].decode("utf-16-be", errors="replace")
+    if b.startswith(b"\xef\xbb\xbf"):
+        return b[3:].decode("utf-8", errors="replace")
+    return b.decode("latin-1")
+
+
+def parse_object(s, raw=False):
+    """Parse the source of a PDF object to Python objects.
+
+    Arrays become lists, dictionaries become dicts with the keys without
+    "/", names remain strings starting with "/", strings are decoded to str
+    (with 'raw', they are the bytes as stored) and "xref 0 R" becomes a Ref.
+    Returns the first object of the source.
+
+    This is a single pass over the source with one regular expression, so
+    its time is linear in the size of the object.
+    """
+    if isinstance(s, str):
+        s = s.encode("latin-1", errors="replace")
+    stack = [[]]
+    top = stack[0]
+    match = TOKEN.match
+    pos = 0
+    n = len(s)
+    while pos < n:
+        m = match(s, pos)
+        if m is None:
+            if s[pos:].strip():
+                raise ValueError("bad token at %i: %r" % (pos, s[pos : pos + 20]))
+            break
+        pos = m.end()
+        kind = m.lastindex
+        if kind == 3:
+            number = m.group(3)
+            top.append(float(number) if b"." in number else int(number))
+        elif kind == 2:
+            top.append("/" + m.group(2).decode("latin-1"))
+        elif kind == 5:
+            value = m.group(5)
+            if b"\\" in value:
+                value = read_literal(value + b")", 0)[0]
+            top.append(value if raw else decode_text(value))
+        elif kind == 1:
+            delim = m.group(1)
+            if delim in (b"[", b"<<"):
+                top = []
+                stack.append(top)
+            else:
+                items = stack.pop()
+                if delim == b">>":
+                    items = {
+                        items[i][1:]: items[i + 1] for i in range(0, len(items) - 1, 2)
+                    }
+                top = stack[-1]
+                top.append(items)
+        elif kind == 4:  # replace "xref gen" by a Ref
+            del top[-1]
+            top[-1] = Ref(top[-1])
+        elif kind == 6:
+            h = re.sub(rb"\s", b"", m.group(6))
+            if len(h) % 2:
+                h += b"0"
+            value = bytes.fromhex(h.decode())
+            top.append(value if raw else decode_text(value))
+        elif kind == 7:
+            top.append(KEYWORDS[m.group(7)])
+        elif kind == 8:
+            value, pos = read_literal(s, pos)
+            top.append(value if raw else decode_text(value))
+    return stack[0][0] if stack[0] else None
+
+
+def fingerprint(doc):
+    """Return a key for the file of the document, or None.
+
+    The key is made of the path, modification time and size of the file.
+    Documents without a file, or changed in memory, have no key: their
+    names cannot be cached.
+    """
+    if not doc.name or doc.is_dirty or not os.path.isfile(doc.name):
+        return None
+    stat = os.stat(doc.name)
+    key = "%s\n%i\n%i" % (os.path.abspath(doc.name), stat.st_mtime_ns, stat.st_size)
+    return hashlib.sha1(key.encode("utf-8", errors="replace")).hexdigest()
+
+
+def resolve_names(doc, cache_dir=None):
     """Determine target pages of destination names.
 
     Returns a dictionary whose keys are destination names and whose values
-    are dictionaries with key "page" (0-based number), "to" (target point on
-    the page as a  tuple of floats (x, y)) and "zoom" (float zoom factor
-    or None).
+    are dictionaries with key "page" (0-based number, -1 if unknown), "to"
+    (target point on the page as a tuple of floats (x, y)) and "zoom"
+    (float zoom factor).
+
+    The name tree is walked without recursion, every node is read once, and
+    destinations given as indirect objects are read in xref order after the
+    walk. If 'cache_dir' is given (CACHE_DIR is a suggestion), the result is
+    cached there as a JSON file, keyed by path, modification time and size
+    of the document's file. Documents changed in memory are not cached.
 
     Args:
         doc: (pymupdf.Document) a PDF document.
+        cache_dir: (str) cache folder or None.
 
     Returns:
         A dictionary of the form
         dest_names["dest-name"] = {"page": 314, "to": (72, 211), "zoom": 0}.
     """
+    cache_file = None
+    key = fingerprint(doc) if cache_dir is not None else None
+    if key is not None:
+        cache_file = os.path.join(cache_dir, key + ".json")
+        if os.path.exists(cache_file):
+            with open(cache_file, encoding="utf-8") as f:
+                dest_names = json.load(f)
+            for d in dest_names.values():
+                if d["to"] is not None:
+                    d["to"] = tuple(d["to"])
+            return dest_names
+
+    values = {}  # name -> destination or Ref
+    catalog = parse_object(doc.xref_object(doc.pdf_catalog(), compressed=True))
+    old_dests = catalog.get("Dests")  # PDF 1.1 style
+    if isinstance(old_dests, Ref):
+        old_dests = parse_object(doc.xref_object(old_dests.xref, compressed=True))
+    if isinstance(old_dests, dict):
+        values.update(old_dests)
+
+    names = catalog.get("Names")
+    if isinstance(names, Ref):
+        names = parse_object(doc.xref_object(names.xref, compressed=True))
+    root = names.get("Dests") if isinstance(names, dict) else None
+    if isinstance(root, Ref):
+        for node in walk_name_tree(doc, root.xref):
+            pairs = node.get("Names", [])
+            for i in range(0, len(pairs) - 1, 2):
+                values[pairs[i]] = pairs[i + 1]
+
+    # read the indirect destinations, each once and in xref order
+    objects = {}
+    for level in range(2):  # a Ref may point to a dictionary with a Ref
+        refs = sorted({v.xref for v in values.values() if isinstance(v, Ref)})
+        for xref in refs:
+            if xref not in objects:
+                objects[xref] = parse_object(doc.xref_object(xref, compressed=True))
+        for name, v in values.items():
+            if isinstance(v, Ref):
+                v = objects[v.xref]
+            if isinstance(v, dict):
+                v = v.get("D")
+            values[name] = v
 
-    def get_names(xref, destinations):
-        def split_destinations(names):
-            rc = []
-            names = names.replace(" 0 R", ",")
-            names = names.split(",")
-            for name in names[:-1]:
-                idx = name.find(")")
-                dest = name[1:idx]
-                xref = int(name[idx + 1 :])
-                rc.append((dest, xref))
-            return rc
-
-        kids = doc.xref_get_key(xref, "Kids")
-        if kids[0] == "array":
-            kids = list(map(int, kids[1][1:-1].replace("0 R", "").split()))
-            for kid_xref in kids:
-                destinations = get_names(kid_xref, destinations)
-
-        names = doc.xref_get_key(xref, "Names")
-        names = names[1][1:-1].strip()
-        if names is not None:
-            destinations.extend(split_destinations(names))
-        return destinations
-
-    def make_dest_dict(xref_to_page, dest):
-        dest = dest[1:-1]
-        pxref = int(dest.split()[0])
-        idx = dest.find("0 R")
-        dest_dict = {"page": xref_to_page[pxref], "to": None, "zoom": 0}
-        dest_arr = dest[idx + 3 :].split()
-        if dest_arr[0] == "/XYZ":
-            dest_dict["to"] = (float(dest_arr[1]), float(dest_arr[2]))
-            try:
-                dest_dict["zoom"] = float(dest_arr[-1])
-            except ValueError:
-                pass
-        return dest_dict
-
-    obj_type, dests_xref = doc.xref_get_key(doc.pdf_catalog(), "Names/Dests")
-
-    if obj_type == "xref":
-        dests_xref = int(dests_xref.split()[0])
+    page_xrefs = {doc.page_xref(i): i for i in range(doc.page_count)}
+    dest_names = {
+        name: make_dest_dict(page_xrefs, array)
+        for name, array in values.items()
+        if isinstance(array, list) and array
+    }
+
+    if cache_file is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_file + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(dest_names, f)
+        os.replace(cache_file + ".tmp", cache_file)
+    return dest_names
+
+
+def walk_name_tree(doc, xref):
+    """Generate the parsed nodes of a name tree in tree order.
+
+    Every node is read once, even if it occurs as a kid more than once.
+    """
+    seen = set()
+    stack = [xref]
+    while stack:
+        xref = stack.pop()
+        if xref in seen:
+            continue
+        seen.add(xref)
+        node = parse_object(doc.xref_object(xref, compressed=True))
+        if not isinstance(node, dict):
+            continue
+        kids = node.get("Kids")
+        if isinstance(kids, list):
+            stack.extend(k.xref for k in reversed(kids) if isinstance(k, Ref))
+        if isinstance(node.get("Names"), Ref):
+            ref = node["Names"]
+            node["Names"] = parse_object(doc.xref_object(ref.xref, compressed=True))
+        yield node
+
+
+def make_dest_dict(page_xrefs, dest):
+    """Convert a parsed destination array to a dictionary."""
+    target = dest[0]
+    if isinstance(target, Ref):
+        page = page_xrefs.get(target.xref, -1)
+    elif isinstance(target, int):
+        page = target  # naked page number
     else:
-        return {}
+        page = -1
+    dest_dict = {"page": page, "to": None, "zoom": 0}
+    if len(dest) > 1 and dest[1] == "/XYZ":
+        x, y, zoom = (list(dest[2:5]) + [None] * 3)[:3]
+        dest_dict["to"] = (float(x or 0), float(y or 0))
+        dest_dict["zoom"] = float(zoom or 0)
+    return dest_dict
 
-    destinations = []
-    destinations = get_names(dests_xref, destinations)
 
-    xref_to_page = {doc.page_xref(i): i for i in range(doc.page_count)}
+def name_keys(name):
+    """Return the possible bytes of a name as stored in the PDF.
 
-    dest_names = {}
-    for name, xref in destinations:
-        item = doc.xref_get_key(xref, "D")
-        if item[0] == "array":
-            dest_dict = make_dest_dict(xref_to_page, item[1])
-            dest_names[name] = dest_dict
-        else:
-            item = doc.xref_object(xref, compressed=True)
-            if item[0] == "[" and item[-1] == "]":
-                dest_dict = make_dest_dict(xref_to_page, item)
-                dest_names[name] = dest_dict
+    Name trees are sorted by these bytes, not by Unicode. A text string
+    may be stored as PDFDocEncoding, UTF-16BE or UTF-8 with byte order
+    mark - and producers also write UTF-8 without one.
+    """
+    if isinstance(name, bytes):
+        return [name]
+    keys = []
+    try:
+        keys.append(name.encode("latin-1"))
+    except UnicodeEncodeError:
+        pass
+    for key in (
+        name.encode("utf-8"),
+        b"\xfe\xff" + name.encode("utf-16-be"),
+        b"\xef\xbb\xbf" + name.encode("utf-8"),
+    ):
+        if key not in keys:
+            keys.append(key)
+    return keys
+
+
+class NameTree:
+    """Look up single destination names without reading all names.
+
+    A lookup binary-searches the kids of every tree node by their "Limits"
+    arrays, and then the sorted "Names" array of the leaf. Only the nodes on
+    the path are read, which are O(log n) objects for n names. Names are
+    compared by their bytes as stored, like the tree is sorted. Every object
+    read is memorised, so later lookups get cheaper. Nodes without "Limits"
+    (not allowed, but existing) are searched one after the other.
+
+    The number of the target page is found by walking up the page tree from
+    the page object, without looking at the other pages.
+
+    Example:
+        tree = NameTree(doc)
+        tree.lookup("chapter.1")
+        {'page': 6, 'to': (72.0, 720.0), 'zoom': 0.0}
+    """
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.objects = {}  # xref -> parsed object, strings as bytes
+        self.reads = 0  # number of objects read from the PDF
+        catalog = self.load(doc.pdf_catalog())
+        pages = catalog.get("Pages")
+        self.pages_root = pages.xref if isinstance(pages, Ref) else 0
+        self.old_dests = self.deref(catalog.get("Dests"))  # PDF 1.1 style
+        names = self.deref(catalog.get("Names"))
+        self.root = names.get("Dests") if isinstance(names, dict) else None
+
+    def load(self, xref):
+        """Return the parsed object 'xref', reading it only once."""
+        obj = self.objects.get(xref)
+        if obj is None:
+            obj = parse_object(self.doc.xref_object(xref, compressed=True), raw=True)
+            self.objects[xref] = obj
+            self.reads += 1
+        return obj
+
+    def deref(self, obj):
+        """Follow references until we have a direct object."""
+        while isinstance(obj, Ref):
+            obj = self.load(obj.xref)
+        return obj
+
+    def find(self, node, key):
+        """Return the value stored for key in the subtree of node, or None."""
+        node = self.deref(node)
+        if not isinstance(node, dict):
+            return None
+        kids = self.deref(node.get("Kids"))
+        if isinstance(kids, list):
+            lo, hi = 0, len(kids) - 1
+            while lo <= hi:
+                mid = (lo + hi) // 2
+                kid = self.deref(kids[mid])
+                limits = None
+                if isinstance(kid, dict):
+                    limits = self.deref(kid.get("Limits"))
+                if not isinstance(limits, list) or len(limits) != 2:
+                    break  # no limits: search all kids
+                if key < limits[0]:
+                    hi = mid - 1
+                elif key > limits[1]:
+                    lo = mid + 1
+                else:
+                    return self.find(kid, key)
             else:
-                pass
+                return None
+            for kid in kids:
+                value = self.find(kid, key)
+                if value is not None:
+                    return value
+            return None
 
-    return dest_names
+        names = self.deref(node.get("Names"))
+        if not isinstance(names, list):
+            return None
+        lo, hi = 0, len(names) // 2 - 1
+        while lo <= hi:
+            mid = (lo + hi) // 2
+            k = names[2 * mid]
+            if key < k:
+                hi = mid - 1
+            elif key > k:
+                lo = mid + 1
+            else:
+                return names[2 * mid + 1]
+        return None
+
+    def page_number(self, xref):
+        """Return the 0-based number of the page object 'xref', or -1.
+
+        Walks up the page tree along /Parent. On every level, the pages of
+        the kids before the current node are counted.
+        """
+        doc = self.doc
+        if doc.xref_get_key(xref, "Type")[1] != "/Page":
+            return -1
+        pno = 0
+        seen = set()
+        while xref != self.pages_root:
+            kind, parent = doc.xref_get_key(xref, "Parent")
+            if kind != "xref" or xref in seen:  # not in the page tree
+                return -1
+            seen.add(xref)
+            parent = int(parent.split()[0])
+            kids = self.deref(self.load(parent).get("Kids"))
+            if not isinstance(kids, list):
+                return -1
+            for kid in kids:
+                if not isinstance(kid, Ref):
+                    continue
+                if kid.xref == xref:
+                    break
+                kind, count = doc.xref_get_key(kid.xref, "Count")
+                pno += int(count) if kind == "int" else 1
+            else:
+                return -1
+            xref = parent
+        return pno
+
+    def lookup(self, name):
+        """Return the destination dictionary of a name, or None.
+
+        'name' is a str, like the keys of resolve_names(), or the bytes as
+        stored in the PDF. The dictionary is the same as the one of
+        resolve_names().
+        """
+        value = None
+        if isinstance(self.old_dests, dict) and isinstance(name, str):
+            value = self.old_dests.get(name)
+        if value is None and self.root is not None:
+            for key in name_keys(name):
+                value = self.find(self.root, key)
+                if value is not None:
+                    break
+        value = self.deref(value)
+        if isinstance(value, dict):
+            value = self.deref(value.get("D"))
+        if not isinstance(value, list) or not value:
+            return None
+        page_xrefs = {}
+        if isinstance(value[0], Ref):
+            page_xrefs[value[0].xref] = self.page_number(value[0].xref)
+        return make_dest_dict(page_xrefs, value)
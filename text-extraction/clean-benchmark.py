@@ -0,0 +1,200 @@
+"""
+Benchmark the save options of 'fitzcli.py clean'
+-------------------------------------------------------------------------------
+License: GNU AFFERO GPL 3.0
+(c) 2020-2021 Harald Lieder
+
+Usage
+-----
+python clean-benchmark.py [files or folders ...] [-configs a,b,...]
+                          [-output report] [-repeat N]
+
+Description
+-----------
+Runs 'fitzcli.py clean' with a matrix of option combinations over a corpus
+of PDFs. Without file arguments, the corpus consists of all PDFs under the
+'examples' folder of this repository.
+
+Every run is a separate process, so that its peak memory (RSS) can be
+measured. For each file and configuration we record wall time, peak RSS,
+output size and whether the run succeeded. Configuration "incremental"
+changes the metadata of a copy of the file and saves it incrementally.
+Configuration "startup" only imports PyMuPDF: its time and memory are
+contained in every other run.
+
+The results are written to 'report.json' and 'report.csv' (option -output
+sets the name), and a summary per configuration is printed. With -repeat,
+the fastest of N runs is recorded.
+
+Peak RSS is measured with os.wait4, which is not available on Windows.
+
+Dependencies
+------------
+PyMuPDF
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FITZCLI = os.path.join(HERE, "fitzcli.py")
+
+STARTUP = "import pymupdf"
+INCREMENTAL = """
+import sys, pymupdf
+doc = pymupdf.open(sys.argv[1])
+meta = doc.metadata
+meta["keywords"] = "benchmark"
+doc.set_metadata(meta)
+doc.saveIncr()
+"""
+
+# name: options of 'fitzcli.py clean'
+CONFIGS = {
+    "plain": [],
+    "compress": ["-compress"],
+    "garbage1": ["-garbage", "1"],
+    "garbage3": ["-garbage", "3"],
+    "garbage4": ["-garbage", "4"],
+    "garbage1-compress": ["-garbage", "1", "-compress"],
+    "garbage3-compress": ["-garbage", "3", "-compress"],
+    "garbage4-compress": ["-garbage", "4", "-compress"],
+    "dedup-compress": ["-dedup", "-compress"],
+    "sanitize": ["-sanitize"],
+    "sanitize-garbage3-compress": ["-sanitize", "-garbage", "3", "-compress"],
+    "linear": ["-linear"],
+    "incremental": None,
+    "startup": None,
+}
+
+
+def run(cmd):
+    """Run a command, return (ok, seconds, peak RSS in MB, error text)."""
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, close_fds=True
+    )
+    if hasattr(os, "wait4"):
+        stderr = proc.stderr.read()
+        _, status, usage = os.wait4(proc.pid, 0)
+        seconds = time.perf_counter() - t0
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        rss = usage.ru_maxrss / 1024  # KB on Linux
+        if sys.platform == "darwin":  # bytes on macOS
+            rss /= 1024
+    else:
+        _, stderr = proc.communicate()
+        seconds = time.perf_counter() - t0
+        rss = 0
+    error = ""
+    if proc.returncode:
+        lines = stderr.decode(errors="replace").strip().splitlines()
+        error = lines[-1] if lines else "exit code %i" % proc.returncode
+    return proc.returncode == 0, seconds, rss, error
+
+
+def bench(filename, config, folder):
+    """Run one configuration on one file and return a result record."""
+    output = os.path.join(folder, "out.pdf")
+    if config == "startup":
+        cmd = [sys.executable, "-c", STARTUP]
+    elif config == "incremental":
+        shutil.copyfile(filename, output)
+        cmd = [sys.executable, "-c", INCREMENTAL, output]
+    else:
+        cmd = [sys.executable, FITZCLI, "clean", filename, output] + CONFIGS[config]
+    ok, seconds, rss, error = run(cmd)
+    size = os.path.getsize(output) if ok and os.path.exists(output) else 0
+    if os.path.exists(output):
+        os.remove(output)
+    return {
+        "file": filename,
+        "config": config,
+        "ok": ok,
+        "seconds": round(seconds, 4),
+        "peak_rss_mb": round(rss, 1),
+        "input_bytes": os.path.getsize(filename),
+        "output_bytes": size,
+        "error": error,
+    }
+
+
+def find_files(paths):
+    """Return the PDFs given as files or contained in folders."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += glob.glob(os.path.join(path, "**", "*.pdf"), recursive=True)
+        else:
+            files.append(path)
+    return sorted(files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark 'fitzcli.py clean'.")
+    parser.add_argument("paths", nargs="*", help="PDF files or folders")
+    parser.add_argument(
+        "-configs", help="comma separated configurations, default: all"
+    )
+    parser.add_argument("-output", default="report", help="report file name")
+    parser.add_argument("-repeat", type=int, default=1, help="runs per item")
+    args = parser.parse_args()
+
+    paths = args.paths or [os.path.join(os.path.dirname(HERE), "examples")]
+    files = find_files(paths)
+    configs = args.configs.split(",") if args.configs else list(CONFIGS)
+    for config in configs:
+        if config not in CONFIGS:
+            sys.exit("unknown configuration '%s'" % config)
+
+    folder = tempfile.mkdtemp()
+    results = []
+    t0 = time.perf_counter()
+    for filename in files:
+        for config in configs:
+            runs = [bench(filename, config, folder) for _ in range(args.repeat)]
+            results.append(min(runs, key=lambda r: r["seconds"]))
+    shutil.rmtree(folder)
+
+    with open(args.output + ".json", "w") as f:
+        json.dump(results, f, indent=1)
+    with open(args.output + ".csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]) if results else [])
+        writer.writeheader()
+        writer.writerows(results)
+
+    print(
+        "%-28s %6s %10s %10s %12s"
+        % ("configuration", "failed", "seconds", "max MB", "size ratio")
+    )
+    for config in configs:
+        rows = [r for r in results if r["config"] == config]
+        good = [r for r in rows if r["ok"]]
+        size_in = sum(r["input_bytes"] for r in good)
+        size_out = sum(r["output_bytes"] for r in good)
+        print(
+            "%-28s %6i %10.2f %10.1f %12.3f"
+            % (
+                config,
+                len(rows) - len(good),
+                sum(r["seconds"] for r in good),
+                max((r["peak_rss_mb"] for r in good), default=0),
+                size_out / size_in if size_in else 0,
+            )
+        )
+    print(
+        "%i files, %i runs, %g sec"
+        % (len(files), len(results) * args.repeat, round(time.perf_counter() - t0, 1))
+    )
+
+
+if __name__ == "__main__":
+    main()
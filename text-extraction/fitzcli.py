@@ -6,10 +6,17 @@
 # maintained and developed by Artifex Software, Inc. https://artifex.com.
 # -----------------------------------------------------------------------------
 import argparse
+import hashlib
+import heapq
+import json
 import os
+import re
 import sys
+import tempfile
+import threading
 import time
 import bisect
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import pymupdf
 from typing import List
 from pymupdf.pymupdf import (
@@ -21,40 +28,44 @@ from pymupdf.pymupdf import (
 mycenter = lambda x: (" %s " % x).center(75, "-")
 
 
-def recoverpix(doc, item):
-    """Return image for a given XREF."""
+def recoverpix(doc, item, separate_alpha=False):
+    """Return image for a given XREF.
+
+    Images without /SMask are returned as the dictionary of 'extract_image()'.
+    Otherwise a pixmap with an alpha channel made from the /SMask is returned.
+    With 'separate_alpha', the image dictionary is returned instead, with the
+    /SMask pixmap as additional item "mask": then the image is not decoded.
+    """
     x = item[0]  # xref of PDF image
     s = item[1]  # xref of its /SMask
     if s == 0:  # no smask: use direct image output
         return doc.extract_image(x)
+    if separate_alpha:
+        image = doc.extract_image(x)
+        image["mask"] = pymupdf.Pixmap(doc, s)
+        return image
 
-    def getimage(pix):
-        if pix.colorspace.n != 4:
-            return pix
-        tpix = pymupdf.Pixmap(pymupdf.csRGB, pix)
-        return tpix
-
-    # we need to reconstruct the alpha channel with the smask
-    pix1 = pymupdf.Pixmap(doc, x)
-    pix2 = pymupdf.Pixmap(doc, s)  # create pixmap of the /SMask entry
+    pix = pymupdf.Pixmap(doc, x)
+    if pix.colorspace and pix.colorspace.n == 4:
+        # convert CMYK before adding alpha: the copy has one channel less
+        pix = pymupdf.Pixmap(pymupdf.csRGB, pix)
+    mask = pymupdf.Pixmap(doc, s)  # create pixmap of the /SMask entry
 
     """Sanity check:
-    - both pixmaps must have the same rectangle
     - both pixmaps must have alpha=0
-    - pix2 must consist of 1 byte per pixel
+    - the mask must consist of 1 byte per pixel
+    A mask of different size is scaled to the image.
     """
-    if not (pix1.irect == pix2.irect and pix1.alpha == pix2.alpha == 0 and pix2.n == 1):
+    if pix.alpha or mask.alpha or mask.n != 1:
         print("Warning: unsupported /SMask %i for %i:" % (s, x))
-        print(pix2)
-        pix2 = None
-        return getimage(pix1)  # return the pixmap as is
+        print(mask)
+        return pix  # return the pixmap as is
+    if mask.irect != pix.irect:
+        mask = pymupdf.Pixmap(mask, pix.width, pix.height, None)
 
-    pix = pymupdf.Pixmap(pix1)  # copy of pix1, with an alpha channel added
-    pix.set_alpha(pix2.samples)  # treat pix2.samples as the alpha values
-    pix1 = pix2 = None  # free temp pixmaps
-
-    # we may need to adjust something for CMYK pixmaps here:
-    return getimage(pix)
+    # one new pixmap with the mask as alpha channel, without copying the
+    # samples to Python and back
+    return pymupdf.Pixmap(pix, mask)
 
 
 def open_file(filename, password, show=False, pdf=True):
@@ -218,28 +229,460 @@ def show(args):
     doc.close()
 
 
+# patterns for a quick look into the source of PDF objects
+RE_TYPE = re.compile(r"/Type\s*/(\w+)")
+RE_SUBTYPE = re.compile(r"/Subtype\s*/(\w+)")
+RE_FILTER = re.compile(r"/Filter\s*(/\w+|\[[^\]]*\])")
+RE_REF = re.compile(r"(\d+)\s+\d+\s+R")
+RE_CONTENTS = re.compile(r"/Contents\s*(\[[^\]]*\]|\d+\s+\d+\s+R)")
+RE_ANNOTS = re.compile(r"/Annots\s*(\[[^\]]*\])")
+RE_FONTREFS = re.compile(r"/(?:FontFile[23]?|ToUnicode)\s*(\d+)\s+\d+\s+R")
+RE_IMAGE = re.compile(r"/(Width|Height|BitsPerComponent)\s*(\d+)")
+COLORSPACE_N = {"DeviceGray": 1, "CalGray": 1, "DeviceCMYK": 4, "Indexed": 1}
+STAT_KEYS = ("objects", "streams", "bytes", "stream_bytes", "decoded_bytes")
+
+# object types reported by 'stats', derived from /Type and /Subtype
+OBJECT_TYPES = {
+    "Image": "image",
+    "Form": "xobject",
+    "Font": "font",
+    "FontDescriptor": "font",
+    "Annot": "annotation",
+    "Page": "page",
+    "Pages": "page",
+    "ObjStm": "structure",
+    "XRef": "structure",
+    "Catalog": "structure",
+    "EmbeddedFile": "embedded file",
+    "Metadata": "metadata",
+}
+
+
+def image_raster_size(source):
+    """Estimate the decoded size of an image from its dictionary."""
+    values = dict(RE_IMAGE.findall(source))
+    if "/ImageMask true" in source:
+        n, bpc = 1, 1
+    else:
+        n = 3
+        for name, count in COLORSPACE_N.items():
+            if "/ColorSpace/" + name in source.replace(" ", ""):
+                n = count
+        bpc = int(values.get("BitsPerComponent", 8))
+    width = int(values.get("Width", 0))
+    height = int(values.get("Height", 0))
+    return (width * n * bpc + 7) // 8 * height
+
+
+def pdf_stats(doc, top=10):
+    """Return a dictionary with statistics of the objects of a PDF.
+
+    All objects are read once. Object bytes are the length of the object
+    source plus the length of its (compressed) stream. Decoded sizes are
+    measured for streams other than images, for images they are computed
+    from width, height and colorspace. Stream contents are hashed to find
+    duplicates.
+    """
+    t0 = time.perf_counter()
+    xref_count = doc.xref_length()
+    records = {}  # xref -> [type, object bytes, raw, decoded, filter, stream]
+    content_xrefs = set()  # page contents
+    annot_xrefs = []
+    font_xrefs = set()  # font files and ToUnicode streams
+    hashes = {}  # stream hash -> list of xrefs
+
+    for xref in range(1, xref_count):
+        try:
+            source = doc.xref_object(xref, compressed=True)
+        except Exception:  # broken object
+            continue
+        m = RE_SUBTYPE.search(source)
+        kind = OBJECT_TYPES.get(m.group(1)) if m else None
+        if kind is None:
+            m = RE_TYPE.search(source)
+            kind = OBJECT_TYPES.get(m.group(1), "other") if m else "other"
+        if kind == "page" and "/Type/Pages" not in source.replace(" ", ""):
+            m = RE_CONTENTS.search(source)
+            if m:
+                content_xrefs.update(int(x) for x in RE_REF.findall(m.group(1)))
+            m = RE_ANNOTS.search(source)
+            if m:
+                annot_xrefs.extend(int(x) for x in RE_REF.findall(m.group(1)))
+        elif kind == "font":
+            font_xrefs.update(int(x) for x in RE_FONTREFS.findall(source))
+
+        record = [kind, len(source), 0, 0, "", doc.xref_is_stream(xref)]
+        if record[5]:
+            raw = doc.xref_stream_raw(xref) or b""
+            record[2] = len(raw)
+            hashes.setdefault(hashlib.sha1(raw).digest(), []).append(xref)
+            m = RE_FILTER.search(source)
+            record[4] = " ".join(m.group(1).replace("/", " ").split()) if m else ""
+            if kind == "image":
+                record[3] = image_raster_size(source)
+            elif kind != "embedded file" and record[4]:
+                try:
+                    record[3] = len(doc.xref_stream(xref))
+                except Exception:
+                    record[3] = record[2]
+            else:
+                record[3] = record[2]
+            raw = None
+        records[xref] = record
+
+    # streams are classified by the objects referring to them
+    ap_xrefs = set()
+    for xref in annot_xrefs:
+        ap = doc.xref_get_key(xref, "AP/N")
+        ap_xrefs.update(int(x) for x in RE_REF.findall(ap[1]))
+    for xrefs, kind in (
+        (content_xrefs, "content"),
+        (font_xrefs, "font"),
+        (ap_xrefs, "annotation"),
+    ):
+        for xref in xrefs:
+            if xref in records and records[xref][5]:
+                records[xref][0] = kind
+
+    types = {}
+    for kind, nbytes, raw, decoded, _, is_stream in records.values():
+        t = types.setdefault(kind, dict.fromkeys(STAT_KEYS, 0))
+        t["objects"] += 1
+        t["streams"] += 1 if is_stream else 0
+        t["bytes"] += nbytes + raw
+        t["stream_bytes"] += raw
+        t["decoded_bytes"] += decoded
+    for t in types.values():
+        ratio = t["decoded_bytes"] / max(t["stream_bytes"], 1)
+        t["compression_ratio"] = round(ratio, 2)
+
+    streams = [(r[2], x) for x, r in records.items() if r[2]]
+    largest = [
+        {
+            "xref": x,
+            "type": records[x][0],
+            "stream_bytes": raw,
+            "decoded_bytes": records[x][3],
+            "filter": records[x][4],
+        }
+        for raw, x in heapq.nlargest(top, streams)
+    ]
+    groups = sorted(
+        (xrefs for xrefs in hashes.values() if len(xrefs) > 1),
+        key=lambda xrefs: -records[xrefs[0]][2] * (len(xrefs) - 1),
+    )
+    wasted = sum(records[g[0]][2] * (len(g) - 1) for g in groups)
+    return {
+        "file": doc.name,
+        "file_bytes": os.path.getsize(doc.name) if os.path.exists(doc.name) else 0,
+        "pages": doc.page_count,
+        "objects": xref_count - 1,
+        "types": dict(sorted(types.items(), key=lambda t: -t[1]["bytes"])),
+        "largest_streams": largest,
+        "duplicate_streams": {
+            "groups": len(groups),
+            "streams": sum(len(g) for g in groups),
+            "wasted_bytes": wasted,
+            "largest": [
+                {"xrefs": g, "type": records[g[0]][0], "stream_bytes": records[g[0]][2]}
+                for g in groups[:top]
+            ],
+        },
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def stats(args):
+    """Print statistics of the objects of a PDF as JSON."""
+    doc = open_file(args.input, args.password, pdf=True)
+    text = json.dumps(pdf_stats(doc, top=args.top), indent=2)
+    doc.close()
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+def poster_tiles(rect, x, y, overlap=0):
+    """Yield (cell, clip) for the 'x' by 'y' tiles of a page rectangle.
+
+    'cell' is the tile without overlap, 'clip' the area it shows: the cell
+    extended by 'overlap' points to each side, but not beyond the page.
+    """
+    w = rect.width / x
+    h = rect.height / y
+    for i in range(y):
+        for j in range(x):
+            x0 = rect.x0 + j * w
+            y0 = rect.y0 + i * h
+            cell = pymupdf.Rect(x0, y0, x0 + w, y0 + h)
+            clip = pymupdf.Rect(cell.x0, cell.y0, cell.x1, cell.y1)
+            clip += (-overlap, -overlap, overlap, overlap)
+            yield cell, clip & rect
+
+
+def poster_marks(rect, cell, clip):
+    """Return content drawing dashed lines where the tile should be cut.
+
+    Lines are drawn at the cell borders which adjoin another tile, in the
+    coordinates of the output page showing 'clip'.
+    """
+    height = clip.height
+    lines = []
+    if cell.x0 > rect.x0:
+        lines.append((cell.x0 - clip.x0, 0, cell.x0 - clip.x0, height))
+    if cell.x1 < rect.x1:
+        lines.append((cell.x1 - clip.x0, 0, cell.x1 - clip.x0, height))
+    if cell.y0 > rect.y0:
+        y = height - cell.y0 + clip.y0
+        lines.append((0, y, clip.width, y))
+    if cell.y1 < rect.y1:
+        y = height - cell.y1 + clip.y0
+        lines.append((0, y, clip.width, y))
+    if not lines:
+        return ""
+    paths = " ".join("%g %g m %g %g l" % line for line in lines)
+    return "q 0.5 w [4 4] 0 d 0 0 0 RG %s S Q\n" % paths
+
+
+def poster_page(doc, pno, x, y, overlap=0, marks=False):
+    """Return a new PDF with the poster tiles of page number 'pno' (0-based).
+
+    The first tile is made by 'show_pdf_page()', which converts the source
+    page to a Form XObject. Every tile then shows this XObject directly: a
+    small content stream shifts and clips it, and all tiles share one
+    resources object. So there is no extra XObject per tile, and the source
+    page is only loaded once.
+    """
+    outdoc = pymupdf.open()
+    page = doc[pno]
+    rect = page.rect
+    itm = ~page.transformation_matrix
+    resources = 0
+    for cell, clip in poster_tiles(rect, x, y, overlap):
+        opage = outdoc.new_page(width=clip.width, height=clip.height)
+        if not resources:
+            xref = opage.show_pdf_page(opage.rect, doc, pno, clip=clip)
+            resources = outdoc.get_new_xref()
+            outdoc.update_object(resources, "<</XObject<</P %i 0 R>>>>" % xref)
+
+        # same matrix as 'show_pdf_page()' computes for this clip
+        src = clip * itm
+        f = min(clip.width / src.width, clip.height / src.height)
+        center = (src.tl + src.br) / 2
+        m = (
+            pymupdf.Matrix(1, 0, 0, 1, -center.x, -center.y)
+            * pymupdf.Matrix(f, f)
+            * pymupdf.Matrix(1, 0, 0, 1, clip.width / 2, clip.height / 2)
+        )
+        content = "q %g %g %g %g %g %g cm " % tuple(m)
+        content += "%g %g %g %g re W n /P Do Q\n" % (
+            src.x0,
+            src.y0,
+            src.width,
+            src.height,
+        )
+        if marks:
+            content += poster_marks(rect, cell, clip)
+
+        cont_xref = outdoc.get_new_xref()
+        outdoc.update_object(cont_xref, "<<>>")
+        outdoc.update_stream(cont_xref, content.encode())
+        page_xref = opage.xref
+        outdoc.xref_set_key(page_xref, "Contents", "%i 0 R" % cont_xref)
+        outdoc.xref_set_key(page_xref, "Resources", "%i 0 R" % resources)
+    return outdoc
+
+
+def poster_doc(doc, pnos, x, y, overlap=0, marks=False):
+    """Return a new PDF with the poster tiles of the pages 'pnos' (1-based).
+
+    Adding pages to a PDF gets slower with its page count, so the tiles of
+    each page are made in a small PDF of their own, which is then appended.
+    """
+    outdoc = pymupdf.open()
+    for pno in pnos:
+        tiles = poster_page(doc, pno - 1, x, y, overlap, marks)
+        outdoc.insert_pdf(tiles, links=False, annots=False)
+        tiles.close()
+    return outdoc
+
+
+def poster_worker(filename, password, pnos, x, y, overlap, marks, outname):
+    """Process pool worker: save the poster tiles of some pages to a file."""
+    doc = open_file(filename, password, pdf=True)
+    outdoc = poster_doc(doc, pnos, x, y, overlap, marks)
+    outdoc.save(outname, garbage=1, deflate=True)
+    outdoc.close()
+    doc.close()
+    return outname
+
+
 def poster(args):
+    """Split pages into 'x' by 'y' tiles, each on a page of its own.
+
+    With more than one process, chunks of consecutive pages are made by
+    worker processes, saved to temporary files and merged in page order.
+    """
+    t0 = time.perf_counter()
     doc = open_file(args.input, args.password, pdf=True)
     pages = get_list(args.pages, doc.page_count + 1)
-    outdoc = pymupdf.open()
-    outdoc.set_metadata(doc.metadata)
-    for pno in pages:
-        n = pno - 1
-        page = doc[n]
-        rect = page.rect
-        w = rect.width / args.x
-        h = rect.height / args.y
-        rects = []
-        for i in range(args.y):
-            for j in range(args.x):
-                r = pymupdf.Rect(j * w, i * h, (j + 1) * w, (i + 1) * h)
-                opage = outdoc.new_page(width=w, height=h)
-                opage.show_pdf_page(opage.rect, doc, n, clip=r)
+    if not pages:
+        sys.exit("no pages selected")
+    processes = min(args.processes or os.cpu_count() or 1, len(pages))
+    if processes <= 1:
+        outdoc = poster_doc(doc, pages, args.x, args.y, args.overlap, args.marks)
+    else:
+        size = -(-len(pages) // processes)
+        chunks = [pages[i : i + size] for i in range(0, len(pages), size)]
+        folder = tempfile.mkdtemp()
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [
+                executor.submit(
+                    poster_worker,
+                    args.input,
+                    args.password,
+                    chunk,
+                    args.x,
+                    args.y,
+                    args.overlap,
+                    args.marks,
+                    os.path.join(folder, "chunk-%i.pdf" % i),
+                )
+                for i, chunk in enumerate(chunks)
+            ]
+            outdoc = pymupdf.open()
+            for future in futures:
+                chunkname = future.result()
+                chunk = pymupdf.open(chunkname)
+                outdoc.insert_pdf(chunk, links=False, annots=False)
+                chunk.close()
+                os.remove(chunkname)
+        os.rmdir(folder)
 
+    outdoc.set_metadata(doc.metadata)
     outdoc.ez_save(args.output)
-    doc.close()
+    tiles = outdoc.page_count
     outdoc.close()
-    return
+    doc.close()
+    t1 = time.perf_counter() - t0
+    print(
+        "%i pages split into %i tiles, %g sec, %g tiles/sec"
+        % (len(pages), tiles, round(t1, 2), round(tiles / t1, 1))
+    )
+
+
+# objects which must stay unique: page tree, annotations, fields, outlines
+RE_NO_DEDUP = re.compile(
+    r"/(Parent|P|Kids|Next|Prev|First|Last|Annots|Dest)(?![\w#])"
+    r"|/Type\s*/(Page|Pages|Catalog|Annot|Sig|Outlines|OCG|OCMD)(?![\w#])"
+    r"|/Type\s*/(StructTreeRoot|StructElem|MCR|OBJR)(?![\w#])"
+    r"|/Subtype\s*/(Widget|Link)(?![\w#])"
+)
+RE_REF_SUB = re.compile(r"(?<![\w.])(\d+)\s+0\s+R(?![\w#])")
+
+
+def dedup_objects(doc):
+    """Point all references to duplicate objects to one of them.
+
+    Stream objects are compared by a hash of their raw stream and of their
+    dictionary, so only one stream is held in memory at a time - the
+    sources of all objects (without streams) are held, however. Objects
+    without a stream (like colorspace arrays) are compared by their source.
+    This is repeated with the references of the duplicates replaced, until
+    no more duplicates are found: so identical images with identical (but
+    different) /SMask and /ColorSpace objects become duplicates as well.
+    Objects whose identity matters are never merged: page tree objects,
+    annotations (all objects in the /Annots of a page, and widgets and links
+    anywhere), form fields, outline items, optional content groups (OCG,
+    OCMD) and structure tree objects. The duplicates are no longer
+    referenced afterwards: save with garbage collection to remove them.
+
+    Returns:
+        (number of objects replaced, bytes of the replaced objects).
+    """
+    if not doc.is_pdf:
+        raise ValueError("is no PDF")
+    keep = {int(x) for x in RE_REF_SUB.findall(doc.pdf_trailer(compressed=True))}
+    for pno in range(doc.page_count):  # annotations, which may lack /Type
+        kind, annots = doc.xref_get_key(doc.page_xref(pno), "Annots")
+        if kind == "xref":  # an indirect array
+            annots = doc.xref_object(int(annots.split()[0]), compressed=True)
+        keep.update(int(x) for x in RE_REF_SUB.findall(annots))
+    sources = {}  # xref -> object source
+    digests = {}  # xref -> hash of raw stream
+    sizes = {}  # xref -> bytes of object
+    for xref in range(1, doc.xref_length()):
+        try:
+            source = doc.xref_object(xref, compressed=True)
+        except Exception:
+            continue
+        sources[xref] = source
+        sizes[xref] = len(source)
+        if doc.xref_is_stream(xref):
+            raw = doc.xref_stream_raw(xref) or b""
+            digests[xref] = hashlib.sha256(raw).digest()
+            sizes[xref] += len(raw)
+            raw = None
+
+    replaced = {}  # duplicate xref -> xref replacing it
+
+    def canon(xref):
+        while xref in replaced:
+            xref = replaced[xref]
+        return xref
+
+    def normalize(source):
+        if not replaced:
+            return source
+        return RE_REF_SUB.sub(lambda m: "%i 0 R" % canon(int(m.group(1))), source)
+
+    candidates = [
+        x
+        for x, source in sources.items()
+        if x not in keep and not RE_NO_DEDUP.search(source)
+    ]
+    while True:
+        seen = {}
+        found = 0
+        for xref in candidates:
+            if xref in replaced:
+                continue
+            key = (digests.get(xref), normalize(sources[xref]))
+            first = seen.setdefault(key, xref)
+            if first != xref:
+                replaced[xref] = first
+                found += 1
+        if not found:
+            break
+
+    # rewrite the references in all remaining objects
+    for xref, source in sources.items():
+        if xref in replaced:
+            continue
+        new_source = normalize(source)
+        if new_source == source:
+            continue
+        if xref not in digests:
+            doc.update_object(xref, new_source)
+            continue
+        for key in doc.xref_get_keys(xref):  # update_object would drop the stream
+            t, value = doc.xref_get_key(xref, key)
+            new_value = normalize(value)
+            if new_value != value:
+                doc.xref_set_key(xref, key, new_value)
+    return len(replaced), sum(sizes[x] for x in replaced)
+
+
+def dedup_report(doc):
+    """Run dedup_objects and print the result."""
+    t0 = time.perf_counter()
+    count, nbytes = dedup_objects(doc)
+    print(
+        "replaced %i duplicate objects, %g MB saved, %g sec"
+        % (count, round(nbytes / 1024 / 1024, 2), round(time.perf_counter() - t0, 3))
+    )
 
 
 def clean(args):
@@ -249,10 +692,16 @@ def clean(args):
         encryption
     )
 
+    garbage = args.garbage
+    if args.dedup:
+        garbage = max(garbage, 1)  # remove the duplicates
+
     if not args.pages:  # simple cleaning
+        if args.dedup:
+            dedup_report(doc)
         doc.save(
             args.output,
-            garbage=args.garbage,
+            garbage=garbage,
             deflate=args.compress,
             pretty=args.pretty,
             clean=args.sanitize,
@@ -272,9 +721,11 @@ def clean(args):
         n = pno - 1
         outdoc.insert_pdf(doc, from_page=n, to_page=n)
     outdoc.set_metadata(doc.metadata)
+    if args.dedup:
+        dedup_report(outdoc)
     outdoc.save(
         args.output,
-        garbage=args.garbage,
+        garbage=garbage,
         deflate=args.compress,
         pretty=args.pretty,
         clean=args.sanitize,
@@ -386,6 +837,139 @@ def embedded_get(args):
     doc.close()
 
 
+class ByteBudget:
+    """Limit the number of bytes held in memory by concurrent workers.
+
+    'acquire(n)' blocks until n bytes fit into the budget. A request larger
+    than the whole budget is granted when nothing else is held.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.held = 0
+        self.cond = threading.Condition()
+
+    def acquire(self, n):
+        with self.cond:
+            while self.held and self.held + n > self.limit:
+                self.cond.wait()
+            self.held += n
+
+    def release(self, n):
+        with self.cond:
+            self.held -= n
+            self.cond.notify_all()
+
+    def resize(self, old, new):
+        """Replace a held amount 'old' by 'new'. Waits like 'acquire(new)',
+        but without counting 'old': so it cannot wait for itself.
+        """
+        with self.cond:
+            self.held -= old
+            self.cond.notify_all()
+            while self.held and self.held + new > self.limit:
+                self.cond.wait()
+            self.held += new
+
+
+def file_hash(filename, chunk=1 << 20):
+    """Return the SHA-256 of a file, reading it in chunks."""
+    h = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def embedded_extract_all(args):
+    """Extract all embedded files to a folder.
+
+    Only the main thread accesses the PDF. Worker threads hash the payloads
+    and write them. The payloads in memory never exceed '-memory' MB.
+    Identical payloads are written once, and files already on disk with
+    the same content are not written again.
+    """
+    doc = open_file(args.input, args.password, pdf=True)
+    out_dir = args.output if args.output else os.path.abspath(os.curdir)
+    if not os.path.isdir(out_dir):
+        sys.exit("output directory %s does not exist" % out_dir)
+
+    budget = ByteBudget(args.memory * 1024 * 1024)
+    lock = threading.Lock()
+    written = {}  # hash -> filename
+    counts = {"written": 0, "duplicate": 0, "on disk": 0, "bytes": 0}
+
+    def write_payload(name, outname, buffer):
+        try:
+            digest = hashlib.sha256(buffer).hexdigest()
+            with lock:
+                first = written.setdefault(digest, outname)
+            if first != outname:
+                with lock:
+                    counts["duplicate"] += 1
+                return "'%s' is identical to '%s'" % (name, first)
+            if (
+                os.path.exists(outname)
+                and os.path.getsize(outname) == len(buffer)
+                and file_hash(outname) == digest
+            ):
+                with lock:
+                    counts["on disk"] += 1
+                return "'%s' already on disk as '%s'" % (name, outname)
+            view = memoryview(buffer)
+            with open(outname + ".part", "wb") as f:
+                for i in range(0, len(view), 1 << 20):
+                    f.write(view[i : i + (1 << 20)])
+            os.replace(outname + ".part", outname)  # no partial files
+            with lock:
+                counts["written"] += 1
+                counts["bytes"] += len(buffer)
+            return "saved entry '%s' as '%s'" % (name, outname)
+        finally:
+            budget.release(len(buffer))
+
+    t0 = time.perf_counter()
+    outnames = set()
+    futures = []
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        for name in doc.embfile_names():
+            info = doc.embfile_info(name)
+            filename = os.path.basename(
+                (info["ufilename"] or info["filename"] or name).replace("\\", "/")
+            )
+            base, ext = os.path.splitext(filename or "embedded")
+            outname = os.path.join(out_dir, base + ext)
+            i = 0
+            while outname in outnames:  # different entries with equal names
+                i += 1
+                outname = os.path.join(out_dir, "%s-%i%s" % (base, i, ext))
+            outnames.add(outname)
+            budget.acquire(info["size"])
+            try:
+                buffer = doc.embfile_get(name)
+            except Exception:
+                budget.release(info["size"])
+                raise
+            if len(buffer) != info["size"]:  # budget is based on actual size
+                budget.resize(info["size"], len(buffer))
+            futures.append(executor.submit(write_payload, name, outname, buffer))
+            buffer = None
+        for future in futures:
+            print(future.result())
+    doc.close()
+    print(
+        "%i files: %i written (%g MB), %i duplicates, %i already on disk, %g sec"
+        % (
+            len(futures),
+            counts["written"],
+            round(counts["bytes"] / 1024 / 1024, 1),
+            counts["duplicate"],
+            counts["on disk"],
+            round(time.perf_counter() - t0, 2),
+        )
+    )
+
+
 def embedded_add(args):
     """Insert a new embedded file."""
     doc = open_file(args.input, args.password, pdf=True)
@@ -504,10 +1088,89 @@ def embedded_list(args):
     doc.close()
 
 
+def font_file_xref(doc, xref):
+    """Return the xref of the font file embedded for a font, or 0."""
+    desc = doc.xref_get_key(xref, "FontDescriptor")
+    if desc[0] != "xref":  # Type0 fonts: look at the descendant font
+        kids = doc.xref_get_key(xref, "DescendantFonts")
+        if kids[0] == "array" and kids[1][1:-1].split():
+            desc = doc.xref_get_key(int(kids[1][1:-1].split()[0]), "FontDescriptor")
+        elif kids[0] == "xref":
+            kid = doc.xref_object(int(kids[1].split()[0]), compressed=True)
+            if kid.startswith("[") and kid[1:-1].split():
+                desc = doc.xref_get_key(int(kid[1:-1].split()[0]), "FontDescriptor")
+    if desc[0] != "xref":
+        return 0
+    desc_xref = int(desc[1].split()[0])
+    for key in ("FontFile", "FontFile2", "FontFile3"):
+        ff = doc.xref_get_key(desc_xref, key)
+        if ff[0] == "xref":
+            return int(ff[1].split()[0])
+    return 0
+
+
+def content_key(doc, xref, *extra):
+    """Hash the raw stream of xref together with some properties."""
+    h = hashlib.sha256(doc.xref_stream_raw(xref) or b"")
+    h.update(repr(extra).encode())
+    return h.hexdigest()
+
+
+def extract_worker(filename, password, out_dir, jobs, separate_alpha=False):
+    """Extract one payload per job and write it to out_dir.
+
+    A job is (kind, key, xref, smask, basename). Runs in a separate process.
+    With 'separate_alpha', the /SMask of an image is written to a file with
+    suffix "-alpha.png" next to the unchanged image.
+    Returns a list of (key, output filename, alpha filename or None, number
+    of bytes).
+    """
+    doc = open_file(filename, password, pdf=True)
+    results = []
+    for kind, key, xref, smask, basename in jobs:
+        if kind == "font":
+            fontname, ext, _, buffer = doc.extract_font(xref)
+            if ext == "n/a" or not buffer:
+                continue
+            outname = os.path.join(out_dir, "%s.%s" % (basename, ext))
+            with open(outname, "wb") as outfile:
+                outfile.write(buffer)
+            results.append((key, outname, None, len(buffer)))
+            continue
+        pix = recoverpix(doc, (xref, smask), separate_alpha)
+        maskname = None
+        if type(pix) is dict:
+            outname = os.path.join(out_dir, "%s.%s" % (basename, pix["ext"]))
+            with open(outname, "wb") as outfile:
+                outfile.write(pix["image"])
+            if "mask" in pix:
+                maskname = os.path.join(out_dir, basename + "-alpha.png")
+                pix["mask"].save(maskname)
+        else:
+            outname = os.path.join(out_dir, basename + ".png")
+            if pix.colorspace.n >= 4:
+                pix = pymupdf.Pixmap(pymupdf.csRGB, pix)
+            pix.save(outname)
+        nbytes = os.path.getsize(outname)
+        if maskname:
+            nbytes += os.path.getsize(maskname)
+        results.append((key, outname, maskname, nbytes))
+    doc.close()
+    return results
+
+
 def extract_objects(args):
-    """Extract images and / or fonts from a PDF."""
+    """Extract images and / or fonts from a PDF.
+
+    Images and fonts are identified by a hash of their raw stream, so
+    equal content under different xrefs is written only once. File
+    "manifest.json" in the output folder maps every xref to its file, and
+    with '-separate-alpha' every image xref with an /SMask to its alpha file.
+    Decoding and writing is done by '-processes' worker processes.
+    """
     if not args.fonts and not args.images:
         sys.exit("neither fonts nor images requested")
+    t0 = time.perf_counter()
     doc = open_file(args.input, args.password, pdf=True)
 
     if args.pages:
@@ -522,55 +1185,98 @@ def extract_objects(args):
         if not (os.path.exists(out_dir) and os.path.isdir(out_dir)):
             sys.exit("output directory %s does not exist" % out_dir)
 
-    font_xrefs = set()  # already saved fonts
-    image_xrefs = set()  # already saved images
-
+    # find the xrefs to extract and hash their raw content
+    xref_keys = {"font": {}, "image": {}}  # xref -> content key
+    jobs = {}  # content key -> job
+    basenames = set()
     for pno in pages:
+        items = []
         if args.fonts:
-            itemlist = doc.get_page_fonts(pno - 1)
-            for item in itemlist:
-                xref = item[0]
-                if xref not in font_xrefs:
-                    font_xrefs.add(xref)
-                    fontname, ext, _, buffer = doc.extract_font(xref)
-                    if ext == "n/a" or not buffer:
-                        continue
-                    outname = os.path.join(
-                        out_dir, fontname.replace(" ", "-") + "." + ext
-                    )
-                    outfile = open(outname, "wb")
-                    outfile.write(buffer)
-                    outfile.close()
-                    buffer = None
+            items += [("font", item) for item in doc.get_page_fonts(pno - 1)]
         if args.images:
-            itemlist = doc.get_page_images(pno - 1)
-            for item in itemlist:
-                xref = item[0]
-                if xref not in image_xrefs:
-                    image_xrefs.add(xref)
-                    pix = recoverpix(doc, item)
-                    if type(pix) is dict:
-                        ext = pix["ext"]
-                        imgdata = pix["image"]
-                        outname = os.path.join(out_dir, "img-%i.%s" % (xref, ext))
-                        outfile = open(outname, "wb")
-                        outfile.write(imgdata)
-                        outfile.close()
-                    else:
-                        outname = os.path.join(out_dir, "img-%i.png" % xref)
-                        pix2 = (
-                            pix
-                            if pix.colorspace.n < 4
-                            else pymupdf.Pixmap(pymupdf.csRGB, pix)
-                        )
-                        pix2.save(outname)
-
-    if args.fonts:
-        print("saved %i fonts to '%s'" % (len(font_xrefs), out_dir))
-    if args.images:
-        print("saved %i images to '%s'" % (len(image_xrefs), out_dir))
+            items += [("image", item) for item in doc.get_page_images(pno - 1)]
+        for kind, item in items:
+            xref = item[0]
+            if xref in xref_keys[kind]:
+                continue
+            if kind == "font":
+                ff_xref = font_file_xref(doc, xref)
+                if not ff_xref:  # font not embedded
+                    continue
+                key = content_key(doc, ff_xref, kind)
+                smask = 0
+                basename = item[3].replace(" ", "-") or "font-%i" % xref
+            else:
+                smask = item[1]
+                key = content_key(doc, xref, kind, item[2:6], item[8])
+                if smask:
+                    key = content_key(doc, smask, key)
+                basename = "img-%i" % xref
+            xref_keys[kind][xref] = key
+            if key in jobs:
+                continue
+            while basename in basenames:  # different fonts with equal names
+                basename += "-%i" % xref
+            basenames.add(basename)
+            jobs[key] = (kind, key, xref, smask, basename)
     doc.close()
 
+    # decode and write the unique payloads in parallel
+    job_list = list(jobs.values())
+    processes = args.processes or os.cpu_count() or 1
+    size = max(1, -(-len(job_list) // (processes * 4)))
+    chunks = [job_list[i : i + size] for i in range(0, len(job_list), size)]
+    files = {}  # content key -> output filename
+    masks = {}  # content key -> alpha filename
+    written = 0
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(
+                extract_worker,
+                args.input,
+                args.password,
+                out_dir,
+                c,
+                args.separate_alpha,
+            )
+            for c in chunks
+        ]
+        for future in futures:
+            for key, outname, maskname, nbytes in future.result():
+                files[key] = os.path.basename(outname)
+                if maskname:
+                    masks[key] = os.path.basename(maskname)
+                written += nbytes
+
+    manifest = {
+        kind + "s": {
+            str(xref): files[key] for xref, key in keys.items() if key in files
+        }
+        for kind, keys in xref_keys.items()
+    }
+    if masks:
+        manifest["alphas"] = {
+            str(xref): masks[key]
+            for xref, key in xref_keys["image"].items()
+            if key in masks
+        }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=1)
+
+    t1 = time.perf_counter() - t0
+    for kind in ("font", "image"):
+        if getattr(args, kind + "s"):
+            n_xrefs = len(manifest[kind + "s"])
+            n_files = len(set(manifest[kind + "s"].values()))
+            print(
+                "saved %i %ss for %i xrefs to '%s', dedup ratio %.2f"
+                % (n_files, kind, n_xrefs, out_dir, n_xrefs / max(n_files, 1))
+            )
+    print(
+        "%i pages in %g sec: %.1f pages/sec, %.1f MB/sec written"
+        % (len(pages), round(t1, 3), len(pages) / t1, written / t1 / 1024 / 1024)
+    )
+
 
 def page_simple(page, textout, GRID, fontsize, noformfeed, skip_empty, flags):
     if noformfeed:
@@ -931,6 +1637,20 @@ def main():
     )
     ps_show.set_defaults(func=show)
 
+    # -------------------------------------------------------------------------
+    # 'stats' command
+    # -------------------------------------------------------------------------
+    ps_stats = subps.add_parser(
+        "stats", description=mycenter("object statistics of a PDF as JSON")
+    )
+    ps_stats.add_argument("input", type=str, help="PDF filename")
+    ps_stats.add_argument("-password", help="password")
+    ps_stats.add_argument(
+        "-top", type=int, default=10, help="number of largest items (default 10)"
+    )
+    ps_stats.add_argument("-output", help="JSON output filename, default stdout")
+    ps_stats.set_defaults(func=stats)
+
     # -------------------------------------------------------------------------
     # 'clean' command
     # -------------------------------------------------------------------------
@@ -993,6 +1713,12 @@ def main():
     ps_clean.add_argument(
         "-pages", help="output selected pages pages, format: 1,5-7,50-N"
     )
+    ps_clean.add_argument(
+        "-dedup",
+        action="store_true",
+        default=False,
+        help="merge duplicate objects, like images and fonts, before saving",
+    )
     ps_clean.set_defaults(func=clean)
 
     # -------------------------------------------------------------------------
@@ -1007,6 +1733,31 @@ def main():
     ps_join.add_argument("-output", required=True, help="output filename")
     ps_join.set_defaults(func=doc_join)
 
+    # -------------------------------------------------------------------------
+    # 'poster' command
+    # -------------------------------------------------------------------------
+    ps_poster = subps.add_parser(
+        "poster", description=mycenter("split pages into tiles of a poster")
+    )
+    ps_poster.add_argument("input", type=str, help="PDF filename")
+    ps_poster.add_argument("-output", required=True, help="output filename")
+    ps_poster.add_argument("-password", help="password")
+    ps_poster.add_argument(
+        "-pages", type=str, default="1-N", help="pages to split, format: 1,5-7,50-N"
+    )
+    ps_poster.add_argument("-x", type=int, default=2, help="tiles per row")
+    ps_poster.add_argument("-y", type=int, default=2, help="tiles per column")
+    ps_poster.add_argument(
+        "-overlap", type=float, default=0, help="overlap of adjacent tiles in points"
+    )
+    ps_poster.add_argument(
+        "-marks", action="store_true", help="draw cut lines at tile borders"
+    )
+    ps_poster.add_argument(
+        "-processes", type=int, help="number of processes, defaults to CPU count"
+    )
+    ps_poster.set_defaults(func=poster)
+
     # -------------------------------------------------------------------------
     # 'extract' command
     # -------------------------------------------------------------------------
@@ -1023,6 +1774,14 @@ def main():
     ps_extract.add_argument(
         "-pages", type=str, help="consider these pages only, format: 1,5-7,50-N"
     )
+    ps_extract.add_argument(
+        "-processes", type=int, help="number of processes, defaults to CPU count"
+    )
+    ps_extract.add_argument(
+        "-separate-alpha",
+        action="store_true",
+        help="write image masks to separate files",
+    )
     ps_extract.set_defaults(func=extract_objects)
 
     # -------------------------------------------------------------------------
@@ -1103,6 +1862,30 @@ def main():
     )
     ps_embed_extract.set_defaults(func=embedded_get)
 
+    # -------------------------------------------------------------------------
+    # 'embed-extract-all' command
+    # -------------------------------------------------------------------------
+    ps_embed_extract_all = subps.add_parser(
+        "embed-extract-all",
+        description=mycenter("extract all embedded files to disk"),
+        epilog="identical files are written once, files on disk are kept",
+    )
+    ps_embed_extract_all.add_argument("input", type=str, help="PDF filename")
+    ps_embed_extract_all.add_argument("-password", help="password")
+    ps_embed_extract_all.add_argument(
+        "-output", help="folder to receive output, defaults to current"
+    )
+    ps_embed_extract_all.add_argument(
+        "-threads", type=int, default=4, help="number of writer threads (default 4)"
+    )
+    ps_embed_extract_all.add_argument(
+        "-memory",
+        type=int,
+        default=256,
+        help="MB of file content held in memory at most (default 256)",
+    )
+    ps_embed_extract_all.set_defaults(func=embedded_extract_all)
+
     # -------------------------------------------------------------------------
     # 'embed-copy' command
     # -------------------------------------------------------------------------
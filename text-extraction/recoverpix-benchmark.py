@@ -0,0 +1,185 @@
+"""
+Benchmark 'recoverpix()' of fitzcli.py on very large images with /SMask
+-------------------------------------------------------------------------------
+License: GNU AFFERO GPL 3.0
+(c) 2020-2021 Harald Lieder
+
+Usage
+-----
+python recoverpix-benchmark.py [-megapixels 60]
+
+Description
+-----------
+Makes a PDF with an RGB (JPEG) and a CMYK (Flate) image of the given size
+in megapixels, each with an /SMask (soft mask). Then combines image and
+mask in three ways:
+
+* old: like 'recoverpix()' did before - copy the image with an alpha
+  channel, then 'set_alpha()' with the samples of the mask
+* merge: the current 'recoverpix()', which makes one pixmap of image and
+  mask in one step
+* separate: 'recoverpix(..., separate_alpha=True)', which returns the
+  image undecoded and the mask as a pixmap - images which are no JPEG
+  or JPX are converted to PNG by 'extract_image()' however
+
+Every run, including making the PDF, is a separate process, so that its
+peak memory (RSS) can be measured. Peak RSS is measured with os.wait4,
+which is not available on Windows. "baseline" only opens the PDF.
+
+Dependencies
+------------
+PyMuPDF, numpy
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pymupdf
+
+from fitzcli import recoverpix
+
+METHODS = ("baseline", "old", "merge", "separate")
+
+
+def recoverpix_old(doc, item):
+    """Return image for a given XREF, like 'recoverpix()' did before."""
+    x = item[0]
+    s = item[1]
+    if s == 0:
+        return doc.extract_image(x)
+
+    def getimage(pix):
+        if pix.colorspace.n != 4:
+            return pix
+        tpix = pymupdf.Pixmap(pymupdf.csRGB, pix)
+        return tpix
+
+    pix1 = pymupdf.Pixmap(doc, x)
+    pix2 = pymupdf.Pixmap(doc, s)
+    if not (pix1.irect == pix2.irect and pix1.alpha == pix2.alpha == 0 and pix2.n == 1):
+        pix2 = None
+        return getimage(pix1)
+
+    pix = pymupdf.Pixmap(pix1)
+    pix.set_alpha(pix2.samples)
+    pix1 = pix2 = None
+    return getimage(pix)
+
+
+def make_pdf(filename, megapixels):
+    """Make a PDF with an RGB and a CMYK image, both with an /SMask.
+
+    Returns a list of (xref, smask xref).
+    """
+    width = int((megapixels * 1e6 * 4 / 3) ** 0.5)
+    height = int(megapixels * 1e6 / width)
+    x = np.arange(width, dtype=np.uint32)[None, :]
+    y = np.arange(height, dtype=np.uint32)[:, None]
+    channels = [(x * 7 + y) % 256, (x + y * 3) % 256, (x * y) % 256, (x ^ y) % 256]
+    mask = ((x + y) % 256).astype(np.uint8)
+
+    doc = pymupdf.open()
+    doc.new_page()
+    items = []
+    for colorspace, n in (("DeviceRGB", 3), ("DeviceCMYK", 4)):
+        samples = np.dstack(channels[:n]).astype(np.uint8).tobytes()
+        xrefs = []
+        for cs, data in ((colorspace, samples), ("DeviceGray", mask.tobytes())):
+            xref = doc.get_new_xref()
+            doc.update_object(
+                xref,
+                "<</Type/XObject/Subtype/Image/Width %i/Height %i"
+                "/ColorSpace/%s/BitsPerComponent 8>>" % (width, height, cs),
+            )
+            if cs == "DeviceRGB":
+                pix = pymupdf.Pixmap(pymupdf.csRGB, width, height, data, 0)
+                data = pix.tobytes("jpg", jpg_quality=85)
+                pix = None
+                doc.update_stream(xref, data, compress=False)
+                doc.xref_set_key(xref, "Filter", "/DCTDecode")
+            else:
+                doc.update_stream(xref, data, compress=True)
+            xrefs.append(xref)
+        doc.xref_set_key(xrefs[0], "SMask", "%i 0 R" % xrefs[1])
+        items.append(tuple(xrefs))
+    doc.save(filename)
+    doc.close()
+    return items, width, height
+
+
+def run_child(method, filename, items):
+    """Run one method in this process and print its time."""
+    doc = pymupdf.open(filename)
+    t0 = time.perf_counter()
+    for item in items:
+        if method == "old":
+            pix = recoverpix_old(doc, item)
+        elif method == "merge":
+            pix = recoverpix(doc, item)
+        elif method == "separate":
+            pix = recoverpix(doc, item, separate_alpha=True)
+        pix = None
+    print(time.perf_counter() - t0)
+
+
+def run(method, filename, params):
+    """Run one method in a child process.
+
+    Returns (output of the child, peak RSS in MB).
+    """
+    cmd = [sys.executable, os.path.abspath(__file__), "-child", method, filename]
+    cmd += params
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
+    output = proc.stdout.read().decode()
+    _, status, usage = os.wait4(proc.pid, 0)
+    if os.waitstatus_to_exitcode(status):
+        sys.exit("method '%s' failed" % method)
+    rss = usage.ru_maxrss / 1024  # KB on Linux
+    if sys.platform == "darwin":  # bytes on macOS
+        rss /= 1024
+    return output, rss
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark 'recoverpix()'.")
+    parser.add_argument("-megapixels", type=float, default=60, help="image size")
+    parser.add_argument("-child", nargs="+", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        method, filename, *items = args.child
+        if method == "make":
+            items, width, height = make_pdf(filename, float(items[0]))
+            print(width, height, " ".join("%i,%i" % item for item in items))
+        else:
+            items = [tuple(map(int, item.split(","))) for item in items]
+            run_child(method, filename, items)
+        return
+
+    folder = tempfile.mkdtemp()
+    filename = os.path.join(folder, "smask.pdf")
+    t0 = time.perf_counter()
+    output, _ = run("make", filename, [str(args.megapixels)])
+    width, height, *items = output.split()
+    items = [tuple(map(int, item.split(","))) for item in items]
+    print(
+        "made %s x %s RGB and CMYK images with /SMask: %g sec"
+        % (width, height, round(time.perf_counter() - t0, 2))
+    )
+    print("%-6s %-10s %10s %12s" % ("image", "method", "sec", "peak MB"))
+    for label, image_items in (("RGB", items[:1]), ("CMYK", items[1:])):
+        for method in METHODS:
+            params = ["%i,%i" % item for item in image_items]
+            output, rss = run(method, filename, params)
+            print("%-6s %-10s %10.3f %12.1f" % (label, method, float(output), rss))
+    os.remove(filename)
+    os.rmdir(folder)
+
+
+if __name__ == "__main__":
+    main()